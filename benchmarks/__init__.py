@@ -0,0 +1,7 @@
+"""
+Benchmarks of RPQ and CFPQ algorithms.
+
+Run python -m benchmarks --help for the list of options, the report in json
+keeps times of every run and the environment (commit, python, platform), so
+reports of different commits can be compared
+"""
@@ -0,0 +1,82 @@
+import argparse
+import sys
+
+from benchmarks.cases import ALGORITHMS, make_cases
+from benchmarks.runner import run_cases, write_csv, write_json
+
+DEFAULT_GRAPHS = ["two_cycles:50,40", "worst_case:30", "random:200,600,0"]
+DEFAULT_REGEXES = ["a*", "a* b*", "(a | b)* a"]
+DEFAULT_GRAMMARS = ["S -> a S b | a b", "S -> S S | a S b | a b"]
+
+
+def _sources(value: str):
+    return None if value == "all" else int(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Measures RPQ and CFPQ algorithms on graphs",
+    )
+    parser.add_argument(
+        "--algorithms", nargs="+", choices=list(ALGORITHMS), default=list(ALGORITHMS)
+    )
+    parser.add_argument(
+        "--graphs",
+        nargs="+",
+        default=DEFAULT_GRAPHS,
+        help="graph specifications: two_cycles:n,m, worst_case:n, chain:n, "
+        "grid:rows,columns, random:nodes,edges,seed, dot:path or dataset:name",
+    )
+    parser.add_argument("--regexes", nargs="+", default=DEFAULT_REGEXES)
+    parser.add_argument(
+        "--grammars",
+        nargs="+",
+        default=DEFAULT_GRAMMARS,
+        help="grammars in pyformlang text format with start nonterminal S",
+    )
+    parser.add_argument(
+        "--sources",
+        nargs="+",
+        type=_sources,
+        default=[1, 10],
+        help="numbers of start vertices, all for every vertex",
+    )
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--no-isolate",
+        action="store_true",
+        help="run all cases in this process, peak RSS is then shared",
+    )
+    parser.add_argument("--json", help="path of json report")
+    parser.add_argument("--csv", help="path of csv report")
+    args = parser.parse_args(argv)
+
+    cases = make_cases(
+        args.algorithms, args.graphs, args.regexes, args.grammars, args.sources
+    )
+
+    def progress(result: dict):
+        print(
+            f"{result['algorithm']} {result['graph']} {result['query']!r} "
+            f"sources={result['sources']}: median {result['median']:.6f}s, "
+            f"peak RSS {result['peak_rss_kb']} KB",
+            file=sys.stderr,
+        )
+
+    results = run_cases(
+        cases, args.warmup, args.repeat, not args.no_isolate, progress=progress
+    )
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            write_json(results, file)
+    if args.csv is not None:
+        with open(args.csv, "w", newline="") as file:
+            write_csv(results, file)
+    if args.json is None and args.csv is None:
+        write_json(results, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
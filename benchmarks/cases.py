@@ -0,0 +1,157 @@
+import typing
+
+import networkx as nx
+from pyformlang.cfg import CFG, Variable
+from pyformlang.regular_expression import Regex
+
+from project import graph_generators, graph_utils
+from project.cfpq import hellings
+from project.rpq.all_pairs import regular_query_to_graph
+from project.rpq.multiple_sources import multiple_sources_regular_query_for_graph
+
+# Generators of graphs by the name in graph specification
+GRAPH_GENERATORS = {
+    "two_cycles": graph_generators.two_cycles_graph,
+    "worst_case": graph_generators.worst_case_cfpq_graph,
+    "chain": graph_generators.chain_graph,
+    "grid": graph_generators.grid_graph,
+    "random": lambda nodes, edges, seed=None: graph_generators.random_labeled_graph(
+        nodes, edges, seed=seed
+    ),
+}
+
+
+def make_graph(spec: str) -> nx.MultiDiGraph:
+    """
+    Creates graph by specification in the form kind:arguments
+
+    Examples
+    --------
+    two_cycles:50,40 - two cycles graph with labels a and b
+    random:1000,5000,42 - random graph with 1000 nodes, 5000 edges and seed 42
+    dot:path/to/graph.dot - graph from file
+    dataset:gzip - graph from cfpq_data dataset
+    """
+    kind, _, arguments = spec.partition(":")
+    if kind == "dot":
+        return graph_utils.load_graph_from_dot(arguments)
+    if kind == "dataset":
+        return graph_utils.get_graph_by_name(arguments)
+    if kind not in GRAPH_GENERATORS:
+        raise ValueError(f"Unknown graph kind {kind}")
+    args = [int(arg) for arg in arguments.split(",") if arg]
+    return GRAPH_GENERATORS[kind](*args).to_networkx()
+
+
+def _sources(graph: nx.Graph, sources: typing.Optional[int]) -> list:
+    nodes = sorted(graph.nodes)
+    return nodes if sources is None else nodes[:sources]
+
+
+def _rpq_tensor(graph: nx.Graph, query: str, sources: typing.Optional[int]):
+    return regular_query_to_graph(
+        Regex(query), graph, _sources(graph, sources), list(graph.nodes)
+    )
+
+
+def _rpq_bfs(graph: nx.Graph, query: str, sources: typing.Optional[int]):
+    return multiple_sources_regular_query_for_graph(
+        Regex(query), graph, _sources(graph, sources), list(graph.nodes), True
+    )
+
+
+def _cfpq(module) -> typing.Callable:
+    def run(graph: nx.Graph, query: str, sources: typing.Optional[int]):
+        cfg = CFG.from_text(query)
+        return module.cf_query_to_graph(
+            cfg,
+            graph,
+            Variable("S"),
+            set(_sources(graph, sources)),
+            set(graph.nodes),
+        )
+
+    return run
+
+
+class Algorithm:
+    """
+    Benchmarked algorithm
+
+    Parameters
+    ----------
+    run :
+        Function of graph, query text and number of sources (all nodes if None),
+        which returns a collection of results
+    query_kind :
+        regex or cfg, the kind of query text the algorithm accepts
+    """
+
+    def __init__(self, run: typing.Callable, query_kind: str):
+        self.run = run
+        self.query_kind = query_kind
+
+
+# Matrix CFPQ is not benchmarked, it returns more pairs than Hellings
+# algorithm on the same graphs
+ALGORITHMS = {
+    "rpq_tensor": Algorithm(_rpq_tensor, "regex"),
+    "rpq_bfs": Algorithm(_rpq_bfs, "regex"),
+    "cfpq_hellings": Algorithm(_cfpq(hellings), "cfg"),
+}
+
+
+class BenchmarkCase:
+    """
+    One measured combination of algorithm, graph, query and sources
+
+    Parameters
+    ----------
+    algorithm :
+        Name of algorithm in ALGORITHMS
+    graph :
+        Specification of graph for make_graph
+    query :
+        Regular expression or context free grammar with start nonterminal S
+    sources :
+        Number of start vertices, all vertices if None
+    """
+
+    def __init__(
+        self, algorithm: str, graph: str, query: str, sources: typing.Optional[int]
+    ):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm {algorithm}")
+        self.algorithm = algorithm
+        self.graph = graph
+        self.query = query
+        self.sources = sources
+
+    def to_dict(self) -> dict:
+        return {
+            "algorithm": self.algorithm,
+            "graph": self.graph,
+            "query": self.query,
+            "sources": self.sources,
+        }
+
+
+def make_cases(
+    algorithms: typing.Iterable[str],
+    graphs: typing.Iterable[str],
+    regexes: typing.Iterable[str],
+    grammars: typing.Iterable[str],
+    sources: typing.Iterable[typing.Optional[int]],
+) -> list[BenchmarkCase]:
+    """
+    Creates cases for all combinations, every algorithm gets only queries of
+    its kind
+    """
+    queries = {"regex": list(regexes), "cfg": list(grammars)}
+    return [
+        BenchmarkCase(algorithm, graph, query, source_number)
+        for algorithm in algorithms
+        for graph in graphs
+        for query in queries[ALGORITHMS[algorithm].query_kind]
+        for source_number in sources
+    ]
@@ -0,0 +1,190 @@
+import json
+import typing
+
+import numpy as np
+
+# Fields which identify the case in benchmark reports
+CASE_FIELDS = ("algorithm", "graph", "query", "sources")
+
+
+class Thresholds:
+    """
+    Allowed relative slowdowns of cases
+
+    Parameters
+    ----------
+    default :
+        Allowed slowdown, e.g. 0.1 means that new median may be 10% greater
+    algorithms :
+        Allowed slowdowns for algorithms which override default
+    graphs :
+        Allowed slowdowns for graph specifications which override the threshold
+        of algorithm, the greater of the two is used if both are set
+    """
+
+    def __init__(
+        self,
+        default: float = 0.1,
+        algorithms: typing.Optional[dict[str, float]] = None,
+        graphs: typing.Optional[dict[str, float]] = None,
+    ):
+        self.default = default
+        self.algorithms = algorithms if algorithms is not None else {}
+        self.graphs = graphs if graphs is not None else {}
+
+    def get(self, algorithm: str, graph: str) -> float:
+        overrides = [
+            threshold
+            for threshold in (self.algorithms.get(algorithm), self.graphs.get(graph))
+            if threshold is not None
+        ]
+        return max(overrides) if overrides else self.default
+
+
+def load_results(path: str) -> dict[tuple, dict]:
+    """
+    Reads results of json report of benchmarks by their case
+    """
+    with open(path) as file:
+        report = json.load(file)
+    return {
+        tuple(result[field] for field in CASE_FIELDS): result
+        for result in report["results"]
+    }
+
+
+def ratio_confidence_interval(
+    old_times: typing.Sequence[float],
+    new_times: typing.Sequence[float],
+    confidence: float = 0.95,
+    resamples: int = 2000,
+    seed: int = 0,
+) -> tuple[float, float]:
+    """
+    Returns bootstrap confidence interval of ratio of new median time to old
+    median time, the fixed seed makes comparison reproducible
+    """
+    rng = np.random.default_rng(seed)
+    old_times, new_times = np.asarray(old_times), np.asarray(new_times)
+    old_medians = np.median(rng.choice(old_times, (resamples, len(old_times))), axis=1)
+    new_medians = np.median(rng.choice(new_times, (resamples, len(new_times))), axis=1)
+    ratios = new_medians / old_medians
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(ratios, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+class Comparison:
+    """
+    Comparison of one case of two benchmark runs
+
+    Parameters
+    ----------
+    case :
+        Values of CASE_FIELDS of the case
+    old_median, new_median :
+        Median times of runs in seconds
+    interval :
+        Confidence interval of ratio of new median to old median
+    threshold :
+        Allowed relative slowdown of the case
+    """
+
+    def __init__(
+        self,
+        case: tuple,
+        old_median: float,
+        new_median: float,
+        interval: tuple[float, float],
+        threshold: float,
+    ):
+        self.case = case
+        self.old_median = old_median
+        self.new_median = new_median
+        self.interval = interval
+        self.threshold = threshold
+
+    @property
+    def ratio(self) -> float:
+        return self.new_median / self.old_median
+
+    @property
+    def is_regression(self) -> bool:
+        """
+        The case is slower even by the lower bound of the confidence interval,
+        so noise of repetitions doesn't fail the comparison
+        """
+        return self.interval[0] > 1 + self.threshold
+
+    @property
+    def is_improvement(self) -> bool:
+        return self.interval[1] < 1 / (1 + self.threshold)
+
+
+def compare(
+    old: dict[tuple, dict],
+    new: dict[tuple, dict],
+    thresholds: typing.Optional[Thresholds] = None,
+    confidence: float = 0.95,
+) -> list[Comparison]:
+    """
+    Compares cases which are in both runs
+
+    Parameters
+    ----------
+    old :
+        Results of the base run by case, as returned by load_results
+    new :
+        Results of the compared run by case
+    thresholds :
+        Allowed slowdowns, 10% for all cases if None
+    confidence :
+        Confidence level of intervals of ratios
+
+    Returns
+    -------
+    comparisons :
+        Comparisons of common cases in order of the new run
+    """
+    thresholds = thresholds if thresholds is not None else Thresholds()
+    comparisons = []
+    for case, new_result in new.items():
+        if case not in old:
+            continue
+        old_result = old[case]
+        algorithm, graph = case[0], case[1]
+        comparisons.append(
+            Comparison(
+                case,
+                old_result["median"],
+                new_result["median"],
+                ratio_confidence_interval(
+                    old_result["times"], new_result["times"], confidence
+                ),
+                thresholds.get(algorithm, graph),
+            )
+        )
+    return comparisons
+
+
+def format_comparisons(comparisons: typing.Iterable[Comparison]) -> str:
+    """
+    Returns text table of comparisons, one line per case
+    """
+    lines = []
+    for comparison in comparisons:
+        if comparison.is_regression:
+            status = "REGRESSION"
+        elif comparison.is_improvement:
+            status = "improvement"
+        else:
+            status = "ok"
+        algorithm, graph, query, sources = comparison.case
+        low, high = comparison.interval
+        lines.append(
+            f"{status:<11} {algorithm} {graph} {query!r} sources={sources}: "
+            f"{comparison.old_median:.6f}s -> {comparison.new_median:.6f}s "
+            f"x{comparison.ratio:.3f} [{low:.3f}, {high:.3f}] "
+            f"threshold {comparison.threshold:.0%}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,179 @@
+"""
+Start-up time of the library and of cli.py.
+
+Every target is measured in a fresh interpreter: modules with
+python -X importtime and cli.py by wall time of a trivial script. The run
+fails if the median of a target exceeds its budget, dependencies which must
+be imported lazily are reported for modules which import them.
+
+Usage: python -m benchmarks.importtime --repeat 5 --budget cli=1500
+"""
+import argparse
+import json
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import typing
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+CLI = "cli"
+
+# Budgets of medians in milliseconds, cli is the wall time of cli.py
+BUDGETS = {
+    "project.graph_binary": 250,
+    "project.graph_utils": 300,
+    "project.query_language.interpreter.interpreter": 600,
+    CLI: 1200,
+}
+
+# Dependencies which are imported on first use
+LAZY_DEPENDENCIES = ("pandas", "cfpq_data", "pydot", "scipy")
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """
+    Parses output of python -X importtime to self and cumulative import time
+    of every module in microseconds
+
+    Examples
+    --------
+    >>> parse_importtime(
+    ...     "import time: self [us] | cumulative | imported package\\n"
+    ...     "import time:       120 |        120 |   json.decoder\\n"
+    ...     "import time:       300 |        420 | json\\n"
+    ... )
+    {'json.decoder': (120, 120), 'json': (300, 420)}
+    """
+    result = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:") :].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        result[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return result
+
+
+def _run(command: list[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True)
+
+
+def measure_import(module: str, repeat: int = 5, top: int = 5) -> dict:
+    """
+    Measures import of module in fresh interpreters
+
+    Returns
+    -------
+    result :
+        Dict with times and median in milliseconds, the slowest imported
+        modules by self time and imported lazy dependencies
+    """
+    times = []
+    for _ in range(repeat):
+        modules = parse_importtime(
+            _run([sys.executable, "-X", "importtime", "-c", f"import {module}"]).stderr
+        )
+        times.append(modules[module][1] / 1000)
+    slowest = sorted(modules.items(), key=lambda item: -item[1][0])[:top]
+    return {
+        "target": module,
+        "times": times,
+        "median": statistics.median(times),
+        "slowest": {name: self_time / 1000 for name, (self_time, _) in slowest},
+        "lazy_imported": [
+            name
+            for name in LAZY_DEPENDENCIES
+            if any(imported.split(".")[0] == name for imported in modules)
+        ],
+    }
+
+
+def measure_cli(repeat: int = 5, script: str = "print 1\n") -> dict:
+    """
+    Measures wall time of cli.py running the script in milliseconds
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "script")
+        with open(path, "w") as file:
+            file.write(script)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            _run([sys.executable, str(ROOT / "cli.py"), path])
+            times.append((time.perf_counter() - start) * 1000)
+    return {"target": CLI, "times": times, "median": statistics.median(times)}
+
+
+def measure(targets: typing.Iterable[str], repeat: int = 5) -> list[dict]:
+    return [
+        measure_cli(repeat) if target == CLI else measure_import(target, repeat)
+        for target in targets
+    ]
+
+
+def over_budget(results: list[dict], budgets: dict[str, float]) -> list[dict]:
+    return [
+        result
+        for result in results
+        if result["target"] in budgets and result["median"] > budgets[result["target"]]
+    ]
+
+
+def _budgets(values: list[str]) -> dict[str, float]:
+    budgets = dict(BUDGETS)
+    for value in values:
+        target, _, milliseconds = value.rpartition("=")
+        budgets[target] = float(milliseconds)
+    return budgets
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.importtime",
+        description="Measures import time of modules and start-up of cli.py",
+    )
+    parser.add_argument(
+        "--targets",
+        nargs="+",
+        default=list(BUDGETS),
+        help=f"modules to import, {CLI} for cli.py with a trivial script",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        nargs="*",
+        default=[],
+        help="budgets of medians in milliseconds as target=ms",
+    )
+    parser.add_argument("--json", help="path of json report")
+    args = parser.parse_args(argv)
+
+    budgets = _budgets(args.budget)
+    results = measure(args.targets, args.repeat)
+    for result in results:
+        budget = budgets.get(result["target"])
+        line = f"{result['target']}: median {result['median']:.1f} ms"
+        if budget is not None:
+            line += f" (budget {budget:.0f} ms)"
+        if result.get("lazy_imported"):
+            line += f", imports {', '.join(result['lazy_imported'])}"
+        print(line)
+        for name, milliseconds in result.get("slowest", {}).items():
+            print(f"    {name}: {milliseconds:.1f} ms")
+    if args.json is not None:
+        with open(args.json, "w") as file:
+            json.dump({"budgets": budgets, "results": results}, file, indent=2)
+    exceeded = over_budget(results, budgets)
+    for result in exceeded:
+        print(f"{result['target']} exceeds its budget", file=sys.stderr)
+    return 1 if exceeded else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
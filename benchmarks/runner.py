@@ -0,0 +1,147 @@
+import csv
+import datetime
+import json
+import multiprocessing
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+from benchmarks.cases import ALGORITHMS, BenchmarkCase, make_graph
+
+# Fields of summary rows in csv report
+CSV_FIELDS = [
+    "algorithm",
+    "graph",
+    "query",
+    "sources",
+    "nodes",
+    "edges",
+    "result_size",
+    "repeat",
+    "median",
+    "mean",
+    "min",
+    "stdev",
+    "peak_rss_kb",
+]
+
+
+def _peak_rss_kb() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes on linux
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def run_case(case: BenchmarkCase, warmup: int = 1, repeat: int = 5) -> dict:
+    """
+    Measures the case in the current process
+
+    Parameters
+    ----------
+    case :
+        The measured case
+    warmup :
+        Number of runs before measurements
+    repeat :
+        Number of measured runs
+
+    Returns
+    -------
+    result :
+        Description of the case with times of runs in seconds, their
+        statistics, size of the result and peak RSS of the process
+    """
+    graph = make_graph(case.graph)
+    run = ALGORITHMS[case.algorithm].run
+    result = None
+    for _ in range(warmup):
+        result = run(graph, case.query, case.sources)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(graph, case.query, case.sources)
+        times.append(time.perf_counter() - start)
+    return {
+        **case.to_dict(),
+        "nodes": graph.number_of_nodes(),
+        "edges": graph.number_of_edges(),
+        "result_size": len(result),
+        "repeat": repeat,
+        "times": times,
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "min": min(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+def run_isolated(case: BenchmarkCase, warmup: int = 1, repeat: int = 5) -> dict:
+    """
+    Measures the case in a new process, so peak RSS belongs to the case only
+    """
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        return pool.apply(run_case, (case, warmup, repeat))
+
+
+def run_cases(
+    cases: typing.Iterable[BenchmarkCase],
+    warmup: int = 1,
+    repeat: int = 5,
+    isolate: bool = True,
+    progress: typing.Optional[typing.Callable[[dict], None]] = None,
+) -> list[dict]:
+    """
+    Measures all cases one after another, progress is called with the result
+    of every case
+    """
+    results = []
+    for case in cases:
+        if isolate:
+            result = run_isolated(case, warmup, repeat)
+        else:
+            result = run_case(case, warmup, repeat)
+        if progress is not None:
+            progress(result)
+        results.append(result)
+    return results
+
+
+def _commit() -> typing.Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    """
+    Returns description of the environment of the run to compare reports
+    """
+    return {
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+    }
+
+
+def write_json(results: list[dict], file: typing.TextIO) -> None:
+    json.dump({"environment": environment(), "results": results}, file, indent=2)
+
+
+def write_csv(results: list[dict], file: typing.TextIO) -> None:
+    writer = csv.DictWriter(file, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(results)
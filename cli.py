@@ -1,10 +1,73 @@
+import argparse
 import sys
 
 from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.printer import OUTPUT_FORMATS, REPR
+from project.query_language.interpreter.profiler import Profiler
+from project.query_language.interpreter.program_cache import ProgramCache
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("You need to specify path to program", file=sys.stderr)
-    else:
-        interpreter = Interpreter()
-        interpreter.execute_from_path(sys.argv[1])
+    arg_parser = argparse.ArgumentParser(description="Query language interpreter")
+    arg_parser.add_argument("path", help="path to program")
+    arg_parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="directory for parsed programs, unchanged scripts are not parsed again",
+    )
+    arg_parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="number of processes for map and filter with heavy lambdas",
+    )
+    arg_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="print wall time, CPU time, peak memory and engine calls of every "
+        "statement to stderr",
+    )
+    arg_parser.add_argument(
+        "--flamegraph",
+        default=None,
+        help="path of collapsed stacks of statements and engine calls, "
+        "implies --profile",
+    )
+    arg_parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=None,
+        help="maximum time of every statement in seconds",
+    )
+    arg_parser.add_argument(
+        "--memory-limit",
+        type=float,
+        default=None,
+        help="maximum growth of memory during every statement in megabytes",
+    )
+    arg_parser.add_argument(
+        "--output-format",
+        choices=OUTPUT_FORMATS,
+        default=REPR,
+        help="format of print output: repr of values, or a line per element "
+        "of sets and lists as JSON (ndjson) or tab separated fields (tsv)",
+    )
+    args = arg_parser.parse_args()
+    profiler = Profiler() if args.profile or args.flamegraph else None
+    interpreter = Interpreter(
+        cache=ProgramCache(directory=args.cache_dir),
+        workers=args.workers,
+        profiler=profiler,
+        time_limit=args.time_limit,
+        memory_limit=None
+        if args.memory_limit is None
+        else int(args.memory_limit * 1024 * 1024),
+        output_format=args.output_format,
+    )
+    try:
+        interpreter.execute_from_path(args.path)
+    finally:
+        if profiler is not None:
+            print(profiler.format_table(), file=sys.stderr)
+            if args.flamegraph is not None:
+                with open(args.flamegraph, "w") as file:
+                    profiler.write_collapsed(file)
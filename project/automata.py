@@ -1,7 +1,7 @@
+import typing
 from functools import reduce
 from typing import Optional, Iterable, Union
 
-import networkx as nx
 from pyformlang.finite_automaton import (
     DeterministicFiniteAutomaton,
     NondeterministicFiniteAutomaton,
@@ -12,6 +12,12 @@ from pyformlang.finite_automaton import (
 )
 from pyformlang.regular_expression import Regex
 
+from project import instrumentation
+from project.labeled_graph import LabeledGraph
+
+if typing.TYPE_CHECKING:
+    import networkx as nx
+
 
 class RFA:
     """
@@ -254,6 +260,7 @@ def automatas_union(
     return fa1.union(fa2).minimize()
 
 
+@instrumentation.timed("regex.compile")
 def get_deterministic_automata_from_regex(regex: Regex) -> DeterministicFiniteAutomaton:
     """
     Transforms the regular expression into a minimum DFA
@@ -281,7 +288,7 @@ def get_deterministic_automata_from_regex(regex: Regex) -> DeterministicFiniteAu
 
 
 def get_nondeterministic_automata_from_graph(
-    graph: nx.Graph,
+    graph: "nx.Graph",
     start_states: Optional[Iterable] = None,
     final_states: Optional[Iterable] = None,
 ) -> NondeterministicFiniteAutomaton:
@@ -328,3 +335,49 @@ def get_nondeterministic_automata_from_graph(
             nfa.add_final_state(state)
 
     return nfa
+
+
+def get_nondeterministic_automata_from_labeled_graph(
+    graph: LabeledGraph,
+    start_states: Optional[Iterable] = None,
+    final_states: Optional[Iterable] = None,
+) -> EpsilonNFA:
+    """
+    Transforms the labeled graph into a NFA without networkx graph, the
+    result is the same as of get_nondeterministic_automata_from_graph for
+    the networkx form of the graph
+
+    Parameters
+    ----------
+    graph :
+        The graph representation of the automaton
+    start_states :
+        States to be marked as start, all states by default
+    final_states :
+        States to be marked as final, all states by default
+
+    Returns
+    -------
+    nfa :
+        A epsilon nondeterministic finite automaton read from the graph
+    """
+    nfa = EpsilonNFA()
+    states = [State(node) for node in graph.nodes]
+    for label, (sources, destinations) in graph.edges.items():
+        if label is None:
+            continue
+        symbol = Symbol(label)
+        for src, dst in zip(sources.tolist(), destinations.tolist()):
+            nfa.add_transition(states[src], symbol, states[dst])
+    for i, attributes in graph.node_attributes.items():
+        if attributes.get("is_start", False):
+            nfa.add_start_state(states[i])
+        if attributes.get("is_final", False):
+            nfa.add_final_state(states[i])
+
+    all_states = list(nfa.states)
+    for state in all_states if start_states is None else start_states:
+        nfa.add_start_state(state)
+    for state in all_states if final_states is None else final_states:
+        nfa.add_final_state(state)
+    return nfa
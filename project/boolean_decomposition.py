@@ -6,9 +6,11 @@ from pyformlang.finite_automaton import NondeterministicFiniteAutomaton, Symbol,
 from pyformlang.cfg import Variable
 from scipy.sparse import dok_matrix, csr_matrix
 
+from project import budget, instrumentation
 from project.recursive_finite_state_machines import RecursiveFiniteAutomaton
 
 
+@instrumentation.timed("rpq.decomposition")
 def get_boolean_decomposition_of_fa(
     fa: NondeterministicFiniteAutomaton,
     states_order_fa: dict[State, int],
@@ -83,6 +85,20 @@ def get_transitive_closure_of_boolean_decomposition(
     for matrix in boolean_decomposition.values():
         sum_of_matrices += matrix
     result_matrix = sum_of_matrices.tocsc()
-    for _ in range(math.ceil(math.log2(states_number))):
-        result_matrix = result_matrix + result_matrix @ result_matrix
+    collector = instrumentation.current()
+    limit = budget.current()
+    if collector is None and limit is None:
+        for _ in range(math.ceil(math.log2(states_number))):
+            result_matrix = result_matrix + result_matrix @ result_matrix
+        return result_matrix
+    with instrumentation.timer("rpq.closure"):
+        for iteration in range(math.ceil(math.log2(states_number))):
+            result_matrix = result_matrix + result_matrix @ result_matrix
+            if collector is not None:
+                collector.count("rpq.closure.iterations")
+                collector.record("rpq.closure.nnz", result_matrix.nnz)
+            if limit is not None:
+                limit.check(
+                    "rpq.closure", iteration=iteration + 1, nnz=result_matrix.nnz
+                )
     return result_matrix
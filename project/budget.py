@@ -0,0 +1,166 @@
+"""
+Time and memory budgets and cooperative cancellation of long running queries.
+
+A budget is installed for a block by limited, the iterative engines (closure,
+multiple sources BFS, Hellings and matrix CFPQ) take the current budget once
+with current() and check it between iterations, so the query stops at the
+first check after the budget is exceeded or cancelled
+"""
+import contextlib
+import os
+import resource
+import threading
+import time
+import typing
+
+
+class BudgetExceeded(Exception):
+    """
+    Budget of query is exceeded or the query is cancelled
+
+    Parameters
+    ----------
+    reason :
+        Which limit is exceeded
+    statistics :
+        Statistics of the engine at the moment of the check: name of engine,
+        number of checks, elapsed time, memory growth and progress of the
+        engine (iteration, nnz, size of worklist)
+    """
+
+    def __init__(self, reason: str, statistics: dict):
+        super().__init__(reason, statistics)
+        self.reason = reason
+        self.statistics = statistics
+
+    def __str__(self):
+        details = ", ".join(
+            f"{name}={value}" for name, value in self.statistics.items()
+        )
+        return f"{self.reason} ({details})"
+
+
+def _memory_usage() -> int:
+    """
+    Returns resident memory of the process in bytes, peak resident memory on
+    systems without procfs
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+class Budget:
+    """
+    Limits of a query and its cancellation token
+
+    Parameters
+    ----------
+    time_limit :
+        Maximum time in seconds since creation of the budget
+    memory_limit :
+        Maximum growth of resident memory of the process in bytes since
+        creation of the budget
+    token :
+        Cancellation token, it can be shared by several budgets to cancel
+        all of them at once
+    """
+
+    def __init__(
+        self,
+        time_limit: typing.Optional[float] = None,
+        memory_limit: typing.Optional[int] = None,
+        token: typing.Optional[threading.Event] = None,
+    ):
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.start = time.monotonic()
+        self.start_memory = _memory_usage() if memory_limit is not None else 0
+        self.checks = 0
+        self._cancelled = threading.Event() if token is None else token
+
+    def cancel(self):
+        """
+        Requests cancellation, it is safe to call from other threads
+        """
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def remaining_time(self) -> typing.Optional[float]:
+        """
+        Returns time left of the time limit in seconds, None if time is not limited
+        """
+        if self.time_limit is None:
+            return None
+        return max(0.0, self.time_limit - (time.monotonic() - self.start))
+
+    def check(self, engine: str, **progress):
+        """
+        Raises BudgetExceeded if the budget is exceeded or cancelled
+
+        Parameters
+        ----------
+        engine :
+            Name of engine which checks the budget
+        progress :
+            Progress of the engine included in statistics of the exception
+        """
+        self.checks += 1
+        elapsed = time.monotonic() - self.start
+        reason = None
+        memory = None
+        if self._cancelled.is_set():
+            reason = "Query is cancelled"
+        elif self.time_limit is not None and elapsed > self.time_limit:
+            reason = f"Time limit of {self.time_limit} s is exceeded"
+        elif self.memory_limit is not None:
+            memory = _memory_usage() - self.start_memory
+            if memory > self.memory_limit:
+                reason = f"Memory limit of {self.memory_limit} bytes is exceeded"
+        if reason is not None:
+            statistics = {"engine": engine, "checks": self.checks, "elapsed": elapsed}
+            if memory is not None:
+                statistics["memory"] = memory
+            statistics.update(progress)
+            raise BudgetExceeded(reason, statistics)
+
+
+_budget: typing.Optional[Budget] = None
+
+
+def current() -> typing.Optional[Budget]:
+    """
+    Returns installed budget, None if queries are not limited
+    """
+    return _budget
+
+
+@contextlib.contextmanager
+def limited(budget: Budget) -> typing.Iterator[Budget]:
+    """
+    Limits queries inside the block by the budget
+
+    Examples
+    --------
+    >>> with limited(Budget()) as budget:
+    ...     budget.cancel()
+    ...     try:
+    ...         current().check("example", iteration=1)
+    ...     except BudgetExceeded as error:
+    ...         print(error.reason, error.statistics["iteration"])
+    Query is cancelled 1
+    """
+    global _budget
+    previous = _budget
+    _budget = budget
+    try:
+        yield budget
+    finally:
+        _budget = previous
@@ -1,8 +1,9 @@
+from typing import Iterable
+
 import networkx as nx
-import pydot
-from pyformlang.cfg import CFG, Terminal, Epsilon
+from pyformlang.cfg import CFG, Epsilon, Terminal, Variable
 
-from project.boolean_decomposition import *
+from project import budget, instrumentation
 from project.weak_chomsky_normal_form import (
     transform_to_weak_normal_form,
     read_grammar_from_file,
@@ -33,6 +34,8 @@ def get_reachable_pairs(
         N - non-terminal that allows reaching v from u
     """
     if isinstance(graph, str):
+        import pydot
+
         graph = nx.nx_pydot.from_pydot(pydot.graph_from_dot_file(graph)[0])
     if isinstance(cfg, str):
         cfg = read_grammar_from_file(cfg)
@@ -50,7 +53,14 @@ def get_reachable_pairs(
             }
 
     m = result.copy()
+    collector = instrumentation.current()
+    limit = budget.current()
     while m:
+        if collector is not None:
+            collector.count("cfpq.hellings.iterations")
+            collector.record("cfpq.hellings.worklist", len(m))
+        if limit is not None:
+            limit.check("cfpq.hellings", worklist=len(m), results=len(result))
         v, ni, u = m.pop()
         for v_hat, nj in [(ut, nt) for ut, nt, vt in result if vt == v]:
             for nk in [p.head for p in cfg.productions if p.body == [nj, ni]]:
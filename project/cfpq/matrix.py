@@ -1,14 +1,13 @@
-from typing import AbstractSet
+from typing import AbstractSet, Iterable
 
 import networkx as nx
-import pydot
-from pyformlang.cfg import CFG, Terminal, Epsilon
+from pyformlang.cfg import CFG, Epsilon, Terminal, Variable
 
 from project.weak_chomsky_normal_form import (
     transform_to_weak_normal_form,
     read_grammar_from_file,
 )
-from project.boolean_decomposition import *
+from project import budget, instrumentation
 from project.graph_utils import get_number_of_nodes
 from scipy.sparse import dok_matrix
 
@@ -37,6 +36,8 @@ def get_reachable_pairs(
         N - non-terminal that allows reaching v from u
     """
     if isinstance(graph, str):
+        import pydot
+
         graph = nx.nx_pydot.from_pydot(pydot.graph_from_dot_file(graph)[0])
     if isinstance(cfg, str):
         cfg = read_grammar_from_file(cfg)
@@ -52,11 +53,24 @@ def get_reachable_pairs(
             if isinstance(t, Terminal) and t.value == x:
                 T[production.head][i, j] = True
     T_prev = T
+    collector = instrumentation.current()
+    limit = budget.current()
+    iteration = 0
     while True:
         T = T.copy()
         for production in cfg.productions:
             if not isinstance(production.body[0], (Epsilon, Terminal)):
                 T[production.head] += T[production.body[0]] @ T[production.body[1]]
+        iteration += 1
+        if collector is not None:
+            collector.count("cfpq.matrix.iterations")
+            collector.record("cfpq.matrix.nnz", sum(m.nnz for m in T.values()))
+        if limit is not None:
+            limit.check(
+                "cfpq.matrix",
+                iteration=iteration,
+                nnz=sum(m.nnz for m in T.values()),
+            )
         if all((T[key] != T_prev[key]).nnz == 0 for key in T.keys() | T_prev.keys()):
             break
         T_prev = T
@@ -0,0 +1,276 @@
+"""
+Streaming reader and writer of graphs in DOT format.
+
+Only the subset of DOT which is written by pydot for networkx graphs
+(save_graph_to_dot, cfpq_data) is supported by the reader: one statement
+per line, node statements and edge statements of a digraph with attribute
+lists. Names of nodes and values of attributes are read the same way pydot
+reads them. The writer emits the same subset statement by statement, so the
+whole DOT text is never kept in memory
+"""
+import re
+from array import array
+from functools import lru_cache
+import typing
+from typing import Iterable, Iterator, Optional, TextIO
+
+import numpy as np
+
+from project.labeled_graph import LabeledGraph
+
+if typing.TYPE_CHECKING:
+    import networkx as nx
+
+_ID = (
+    r'(?:"(?:[^"\\]|\\.)*"'
+    r"|[A-Za-z_\x80-\U0010ffff][\w\x80-\U0010ffff]*"
+    r"|-?(?:\.\d+|\d+(?:\.\d*)?))"
+)
+_ATTRIBUTES = rf"\[\s*((?:{_ID}\s*=\s*{_ID}\s*[,;]?\s*)*)\]"
+# Compiled on the first parse by _patterns, compilation of unicode ranges of
+# names takes tens of milliseconds
+_HEADER = rf"\s*digraph\s*(?:{_ID})?\s*{{\s*"
+_EDGE = rf"\s*({_ID})\s*->\s*({_ID})\s*(?:{_ATTRIBUTES})?\s*;?\s*"
+_NODE = rf"\s*({_ID})\s*(?:{_ATTRIBUTES})?\s*;?\s*"
+_ATTRIBUTE = rf"({_ID})\s*=\s*({_ID})"
+_CLOSE = re.compile(r"\s*}\s*")
+# Edge statement as it is written by pydot for plain names and labels
+_SIMPLE_EDGE = re.compile(r"(\w+) -> (\w+)  \[(?:key=\d+, )?label=(\w+)\];\n?")
+
+# Edge attributes which are kept by the reader, key is the networkx edge key
+_EDGE_ATTRIBUTES = {"key", "label"}
+
+
+@lru_cache(maxsize=None)
+def _patterns() -> tuple[re.Pattern, re.Pattern, re.Pattern, re.Pattern]:
+    return tuple(re.compile(pattern) for pattern in (_HEADER, _EDGE, _NODE, _ATTRIBUTE))
+
+
+class UnsupportedDotError(ValueError):
+    """
+    DOT input uses syntax which is not supported by the streaming reader
+    """
+
+    pass
+
+
+def read_dot(path: str) -> LabeledGraph:
+    """
+    Reads graph from DOT file without building pydot or networkx objects
+
+    Parameters
+    ----------
+    path :
+        Path to DOT file
+
+    Returns
+    -------
+    graph :
+        Graph with per label integer edge arrays
+
+    Raises
+    ----------
+    UnsupportedDotError :
+        If the file is not in the supported subset of DOT, e.g. undirected
+        graph, subgraphs, multi-line statements or edge attributes besides label
+    """
+    with open(path, encoding="utf-8") as file:
+        return parse_dot_lines(file)
+
+
+def parse_dot_lines(lines: Iterable[str]) -> LabeledGraph:
+    nodes = []
+    index = {}
+    node_attributes = {}
+    edges: dict[Optional[str], tuple[array, array]] = {}
+
+    def node_index(name: str) -> int:
+        name = name.strip('"')
+        if name not in index:
+            index[name] = len(nodes)
+            nodes.append(name)
+        return index[name]
+
+    header, edge, node, attribute = _patterns()
+    lines = iter(lines)
+    for line in lines:
+        if line.strip():
+            if header.fullmatch(line) is None:
+                raise UnsupportedDotError(f"Unsupported graph header: {line!r}")
+            break
+    else:
+        raise UnsupportedDotError("Graph header not found")
+
+    closed = False
+    for line in lines:
+        match = _SIMPLE_EDGE.fullmatch(line)
+        if match is not None and not closed:
+            src, dst, label = match.groups()
+            if label not in edges:
+                edges[label] = (array("q"), array("q"))
+            sources, destinations = edges[label]
+            sources.append(index[src] if src in index else node_index(src))
+            destinations.append(index[dst] if dst in index else node_index(dst))
+            continue
+        if closed:
+            if line.strip():
+                raise UnsupportedDotError("Only one graph in file is supported")
+            continue
+        if not line.strip():
+            continue
+        match = edge.fullmatch(line)
+        if match is not None:
+            src, dst, attributes = match.groups()
+            label = None
+            for name, value in attribute.findall(attributes or ""):
+                if name not in _EDGE_ATTRIBUTES:
+                    raise UnsupportedDotError(f"Unsupported edge attribute {name}")
+                if name == "label":
+                    label = value
+            if label not in edges:
+                edges[label] = (array("q"), array("q"))
+            sources, destinations = edges[label]
+            sources.append(node_index(src))
+            destinations.append(node_index(dst))
+            continue
+        match = node.fullmatch(line)
+        if match is not None:
+            name, attributes = match.groups()
+            if name in ("node", "graph", "edge"):
+                raise UnsupportedDotError(f"Default attributes are not supported")
+            i = node_index(name)
+            if attributes:
+                node_attributes.setdefault(i, {}).update(attribute.findall(attributes))
+            continue
+        if _CLOSE.fullmatch(line) is not None:
+            closed = True
+            continue
+        raise UnsupportedDotError(f"Unsupported statement: {line!r}")
+    if not closed:
+        raise UnsupportedDotError("Graph is not closed")
+
+    return LabeledGraph(
+        nodes,
+        {
+            label: (
+                np.frombuffer(sources, dtype=np.int64),
+                np.frombuffer(destinations, dtype=np.int64),
+            )
+            for label, (sources, destinations) in edges.items()
+        },
+        node_attributes,
+    )
+
+
+# Names which must be quoted, pydot writes them as is
+_KEYWORDS = {"node", "edge", "graph", "digraph", "subgraph", "strict"}
+
+
+def _quote(value) -> str:
+    return _quote_string(str(value))
+
+
+@lru_cache(maxsize=65536)
+def _quote_string(value: str) -> str:
+    if value == "" or value.lower() in _KEYWORDS:
+        return '"' + value + '"'
+    from pydot import quote_if_necessary
+
+    return quote_if_necessary(value)
+
+
+def _attributes(attributes: dict, separator: str = "  ") -> str:
+    if not attributes:
+        return ""
+    items = ", ".join(f"{_quote(k)}={_quote(v)}" for k, v in attributes.items())
+    return f"{separator}[{items}]"
+
+
+def _write_chunked(file: TextIO, lines: Iterator[str], chunk_size: int):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            file.write("".join(chunk))
+            chunk.clear()
+    file.write("".join(chunk))
+
+
+def write_dot(graph: LabeledGraph, file: TextIO, chunk_size: int = 65536) -> None:
+    """
+    Writes graph in DOT format to the file, edges are written from edge arrays
+    by chunks of chunk_size statements
+
+    Parameters
+    ----------
+    graph :
+        The given graph
+    file :
+        Text file opened for writing
+    chunk_size :
+        Number of statements joined before writing to the file
+    """
+    names = [_quote(node) for node in graph.nodes]
+
+    def lines() -> Iterator[str]:
+        yield "digraph  {\n"
+        for i, name in enumerate(names):
+            yield f"{name}{_attributes(graph.node_attributes.get(i, {}), ' ')};\n"
+        for label, (sources, destinations) in graph.edges.items():
+            attributes = "" if label is None else _attributes({"label": label})
+            for start in range(0, len(sources), chunk_size):
+                end = start + chunk_size
+                yield from (
+                    f"{names[src]} -> {names[dst]}{attributes};\n"
+                    for src, dst in zip(
+                        sources[start:end].tolist(), destinations[start:end].tolist()
+                    )
+                )
+        yield "}\n"
+
+    _write_chunked(file, lines(), chunk_size)
+
+
+def write_networkx_dot(graph: "nx.Graph", file: TextIO, chunk_size: int = 65536):
+    """
+    Writes networkx graph in DOT format to the file statement by statement,
+    the output is read by pydot to the same graph as output of nx_pydot
+
+    Parameters
+    ----------
+    graph :
+        The given graph
+    file :
+        Text file opened for writing
+    chunk_size :
+        Number of statements joined before writing to the file
+    """
+    import networkx as nx
+
+    graph_type = "digraph" if graph.is_directed() else "graph"
+    edge_operator = "->" if graph.is_directed() else "--"
+    strict = nx.number_of_selfloops(graph) == 0 and not graph.is_multigraph()
+    name = f'"{graph.name}" ' if graph.name != "" else " "
+
+    names = {node: _quote(node) for node in graph.nodes}
+
+    def lines() -> Iterator[str]:
+        yield f"{'strict ' if strict else ''}{graph_type} {name}{{\n"
+        for statement in ("graph", "node", "edge"):
+            if graph.graph.get(statement):
+                yield f"{statement}{_attributes(graph.graph[statement], ' ')};\n"
+        for node, attributes in graph.nodes(data=True):
+            yield f"{names[node]}{_attributes(attributes, ' ')};\n"
+        if graph.is_multigraph():
+            edges = (
+                (src, dst, {"key": key, **attributes})
+                for src, dst, key, attributes in graph.edges(data=True, keys=True)
+            )
+        else:
+            edges = graph.edges(data=True)
+        for src, dst, attributes in edges:
+            edge = f"{names[src]} {edge_operator} {names[dst]}"
+            yield f"{edge}{_attributes(attributes)};\n"
+        yield "}\n"
+
+    _write_chunked(file, lines(), chunk_size)
@@ -0,0 +1,193 @@
+"""
+Binary on-disk format of labeled graphs.
+
+Graph is a directory with meta.json (labels and node attributes), the node
+table nodes.npy and CSR arrays of adjacency matrix of every label. Arrays are
+opened with numpy.memmap, so opening a graph does not depend on its size and
+processes which open the same graph share pages of the files
+
+Usage: python -m project.graph_binary graph.dot graph_directory
+"""
+import argparse
+import json
+import os
+import typing
+from typing import Optional
+
+import numpy as np
+
+from project.labeled_graph import LabeledGraph
+
+if typing.TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+NODES_FILE = "nodes.npy"
+
+
+def _label_files(i: int) -> tuple[str, str]:
+    return f"label_{i}_indptr.npy", f"label_{i}_indices.npy"
+
+
+class CsrGraph:
+    """
+    Labeled graph opened from binary format
+
+    Parameters
+    ----------
+    path :
+        Directory of the graph
+    nodes :
+        Names of nodes in order of their indexes
+    labels :
+        Labels of edges, None for edges without label
+    matrices :
+        indptr and indices arrays of adjacency matrix of every label
+    node_attributes :
+        Attributes of nodes which have any
+    """
+
+    def __init__(
+        self,
+        path: str,
+        nodes: np.ndarray,
+        labels: list[Optional[str]],
+        matrices: list[tuple[np.ndarray, np.ndarray]],
+        node_attributes: dict[int, dict],
+    ):
+        self.path = path
+        self.nodes = nodes
+        self.labels = labels
+        self.matrices = dict(zip(labels, matrices))
+        self.node_attributes = node_attributes
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def number_of_edges(self) -> int:
+        return sum(len(indices) for _, indices in self.matrices.values())
+
+    def matrix(self, label: Optional[str]) -> "csr_matrix":
+        """
+        Boolean adjacency matrix of edges with the label, index arrays of the
+        matrix are not copied from the mapped files
+        """
+        from scipy.sparse import csr_matrix
+
+        indptr, indices = self.matrices[label]
+        return csr_matrix(
+            (np.ones(len(indices), dtype=bool), indices, indptr),
+            shape=(self.number_of_nodes, self.number_of_nodes),
+            copy=False,
+        )
+
+    def boolean_decomposition(self) -> dict[str, "csr_matrix"]:
+        """
+        Boolean decomposition of the graph which can be passed to
+        multiple_sources_reachability_with_regular_constraints
+        """
+        return {label: self.matrix(label) for label in self.labels if label is not None}
+
+    def to_labeled_graph(self) -> LabeledGraph:
+        edges = {}
+        for label, (indptr, indices) in self.matrices.items():
+            sources = np.repeat(
+                np.arange(self.number_of_nodes, dtype=np.int64), np.diff(indptr)
+            )
+            edges[label] = (sources, np.asarray(indices, dtype=np.int64))
+        return LabeledGraph(self.nodes.tolist(), edges, self.node_attributes)
+
+
+def _nodes_array(nodes: typing.Sequence) -> np.ndarray:
+    if isinstance(nodes, range):
+        return np.arange(nodes.start, nodes.stop, nodes.step, dtype=np.int64)
+    if all(isinstance(node, int) and not isinstance(node, bool) for node in nodes):
+        return np.array(nodes, dtype=np.int64)
+    return np.array([str(node) for node in nodes], dtype=str)
+
+
+def save_graph_binary(graph: LabeledGraph, path: str) -> None:
+    """
+    Saves graph in binary format, nodes which are not integers are saved as
+    strings
+
+    Parameters
+    ----------
+    graph :
+        The given graph
+    path :
+        Directory where graph must be saved, it is created if it does not exist
+    """
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, NODES_FILE), _nodes_array(graph.nodes))
+    index_dtype = np.int32 if graph.number_of_nodes < 2**31 else np.int64
+    labels = list(graph.edges)
+    for i, label in enumerate(labels):
+        indptr, indices = graph.csr(label)
+        indptr_file, indices_file = _label_files(i)
+        np.save(
+            os.path.join(path, indptr_file),
+            indptr.astype(np.int32 if indptr[-1] < 2**31 else np.int64),
+        )
+        np.save(os.path.join(path, indices_file), indices.astype(index_dtype))
+    meta = {
+        "version": FORMAT_VERSION,
+        "labels": labels,
+        "node_attributes": {
+            str(i): attributes for i, attributes in graph.node_attributes.items()
+        },
+    }
+    # Meta is written last, so the graph is never opened with missing arrays
+    tmp_path = os.path.join(path, f"{META_FILE}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as file:
+        json.dump(meta, file)
+    os.replace(tmp_path, os.path.join(path, META_FILE))
+
+
+def open_graph_binary(path: str) -> CsrGraph:
+    """
+    Opens graph saved by save_graph_binary, arrays are mapped to memory and
+    are read only
+
+    Raises
+    ----------
+    ValueError :
+        If the graph was saved in other version of the format
+    """
+    with open(os.path.join(path, META_FILE)) as file:
+        meta = json.load(file)
+    if meta["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported binary graph version {meta['version']}")
+    nodes = np.load(os.path.join(path, NODES_FILE), mmap_mode="r")
+    matrices = []
+    for i in range(len(meta["labels"])):
+        indptr_file, indices_file = _label_files(i)
+        matrices.append(
+            (
+                np.load(os.path.join(path, indptr_file), mmap_mode="r"),
+                np.load(os.path.join(path, indices_file), mmap_mode="r"),
+            )
+        )
+    node_attributes = {
+        int(i): attributes for i, attributes in meta["node_attributes"].items()
+    }
+    return CsrGraph(path, nodes, meta["labels"], matrices, node_attributes)
+
+
+def convert_dot_to_binary(dot_path: str, path: str) -> None:
+    from project.graph_utils import load_labeled_graph_from_dot
+
+    save_graph_binary(load_labeled_graph_from_dot(dot_path), path)
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Converts graph in DOT format to binary format"
+    )
+    arg_parser.add_argument("dot_path", help="path to graph in DOT format")
+    arg_parser.add_argument("path", help="directory for graph in binary format")
+    args = arg_parser.parse_args()
+    convert_dot_to_binary(args.dot_path, args.path)
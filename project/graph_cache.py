@@ -0,0 +1,88 @@
+import os
+import shutil
+import typing
+from typing import Optional
+
+from project.graph_binary import CsrGraph, open_graph_binary, save_graph_binary
+from project.labeled_graph import LabeledGraph
+
+CACHE_DIRECTORY_VARIABLE = "FORMAL_LANG_GRAPH_CACHE"
+
+
+def _default_directory() -> str:
+    return os.environ.get(
+        CACHE_DIRECTORY_VARIABLE,
+        os.path.join(os.path.expanduser("~"), ".cache", "formal_lang_course", "graphs"),
+    )
+
+
+class GraphCache:
+    """
+    Cache of cfpq_data graphs converted to binary format
+
+    Graph is downloaded and its csv file is parsed only once per dataset
+    version, next loads open memory mapped arrays of the converted graph
+
+    Parameters
+    ----------
+    directory :
+        Directory of converted graphs, FORMAL_LANG_GRAPH_CACHE environment
+        variable or ~/.cache/formal_lang_course/graphs by default
+    download :
+        Function which returns path to csv file of graph by its name,
+        cfpq_data.download by default
+    version :
+        Version of dataset, graphs of other versions are not used, version
+        of installed cfpq_data by default
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        download: Optional[typing.Callable[[str], typing.Any]] = None,
+        version: Optional[str] = None,
+    ):
+        self.directory = directory
+        self._download = download
+        self._version = version
+
+    # cfpq_data and its dependencies are imported on first use of the cache,
+    # not by every module which imports graph_utils
+    @property
+    def download(self) -> typing.Callable[[str], typing.Any]:
+        if self._download is None:
+            import cfpq_data
+
+            self._download = cfpq_data.download
+        return self._download
+
+    @property
+    def version(self) -> str:
+        if self._version is None:
+            import cfpq_data
+
+            self._version = cfpq_data.__version__
+        return self._version
+
+    def path(self, name: str) -> str:
+        directory = _default_directory() if self.directory is None else self.directory
+        return os.path.join(directory, f"{name}-{self.version}")
+
+    def get(self, name: str) -> CsrGraph:
+        """
+        Returns converted graph, downloads and converts it on cache miss
+        """
+        path = self.path(name)
+        try:
+            return open_graph_binary(path)
+        except (OSError, ValueError):
+            pass
+        graph = LabeledGraph.from_edge_list_csv(str(self.download(name)))
+        save_graph_binary(graph, path)
+        return open_graph_binary(path)
+
+    def remove(self, name: str):
+        shutil.rmtree(self.path(name), ignore_errors=True)
+
+
+default_graph_cache = GraphCache()
@@ -0,0 +1,117 @@
+"""
+Generators of synthetic labeled graphs for benchmarks.
+
+Graphs are built as numpy edge arrays directly, nodes are integers from 0 to
+number_of_nodes - 1 (the node table is a range) and edges of every label
+are sorted by source, so the CSR form of LabeledGraph.csr and
+save_graph_binary is cheap to get
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+
+from project.labeled_graph import LabeledGraph
+
+
+def _graph(
+    number_of_nodes: int, edges: dict[str, tuple[np.ndarray, np.ndarray]]
+) -> LabeledGraph:
+    sorted_edges = {}
+    for label, (sources, destinations) in edges.items():
+        order = np.lexsort((destinations, sources))
+        sorted_edges[label] = (
+            sources[order].astype(np.int64),
+            destinations[order].astype(np.int64),
+        )
+    return LabeledGraph(range(number_of_nodes), sorted_edges)
+
+
+def two_cycles_graph(
+    n: int, m: int, labels: tuple[str, str] = ("a", "b")
+) -> LabeledGraph:
+    """
+    Returns a graph with two cycles connected by node 0, the same graph as
+    cfpq_data.labeled_two_cycles_graph
+
+    Parameters
+    ----------
+    n :
+        The number of nodes in the first cycle without a common node
+    m :
+        The number of nodes in the second cycle without a common node
+    labels :
+        Labels of edges of the first and the second cycle
+    """
+    first = np.arange(n + 1)
+    second = np.concatenate([[0], np.arange(n + 1, n + m + 1)])
+    return _graph(
+        n + m + 1,
+        {
+            labels[0]: (first, np.roll(first, -1)),
+            labels[1]: (second, np.roll(second, -1)),
+        },
+    )
+
+
+def worst_case_cfpq_graph(n: int, labels: tuple[str, str] = ("a", "b")) -> LabeledGraph:
+    """
+    Returns two cycles of coprime lengths n + 1 and n, the worst case for
+    CFPQ with grammar S -> a S b | a b, the number of reachable pairs and the
+    number of iterations of algorithms are quadratic in n
+    """
+    return two_cycles_graph(n, n - 1, labels)
+
+
+def chain_graph(n: int, labels: Sequence[str] = ("a",)) -> LabeledGraph:
+    """
+    Returns a path of n edges, i-th edge is labeled with labels[i % len(labels)]
+    """
+    sources = np.arange(n)
+    label_indexes = sources % len(labels)
+    return _graph(
+        n + 1,
+        {
+            label: (sources[label_indexes == i], sources[label_indexes == i] + 1)
+            for i, label in enumerate(labels)
+        },
+    )
+
+
+def grid_graph(
+    rows: int, columns: int, labels: tuple[str, str] = ("a", "b")
+) -> LabeledGraph:
+    """
+    Returns a grid where node of row r and column c is r * columns + c, edges
+    to the right are labeled with the first label, edges down with the second
+    """
+    nodes = np.arange(rows * columns).reshape(rows, columns)
+    return _graph(
+        rows * columns,
+        {
+            labels[0]: (nodes[:, :-1].ravel(), nodes[:, 1:].ravel()),
+            labels[1]: (nodes[:-1, :].ravel(), nodes[1:, :].ravel()),
+        },
+    )
+
+
+def random_labeled_graph(
+    number_of_nodes: int,
+    number_of_edges: int,
+    labels: Sequence[str] = ("a", "b"),
+    seed: Optional[int] = None,
+) -> LabeledGraph:
+    """
+    Returns a graph with uniformly random edges and labels, the same seed
+    gives the same graph. Parallel edges and loops are possible
+    """
+    rng = np.random.default_rng(seed)
+    sources = rng.integers(0, number_of_nodes, number_of_edges)
+    destinations = rng.integers(0, number_of_nodes, number_of_edges)
+    label_indexes = rng.integers(0, len(labels), number_of_edges)
+    return _graph(
+        number_of_nodes,
+        {
+            label: (sources[label_indexes == i], destinations[label_indexes == i])
+            for i, label in enumerate(labels)
+        },
+    )
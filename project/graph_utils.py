@@ -1,35 +1,69 @@
-import cfpq_data
-import networkx as nx
-import pydot
+import typing
+from typing import Optional, Union
 
+import numpy as np
 
-def load_graph_from_dot(path: str) -> nx.Graph:
-    return nx.nx_pydot.from_pydot(pydot.graph_from_dot_file(path)[0])
+from project.dot_io import UnsupportedDotError, read_dot, write_networkx_dot
+from project.graph_binary import CsrGraph
+from project.graph_cache import GraphCache, default_graph_cache
+from project.labeled_graph import LabeledGraph
 
+# networkx, pydot and cfpq_data are imported by the functions which use them,
+# so reading graphs in matrix form doesn't import them
+if typing.TYPE_CHECKING:
+    import networkx as nx
 
-def get_graph_by_name(name: str) -> nx.Graph:
+
+def load_graph_from_dot(path: str) -> "nx.Graph":
+    return load_labeled_graph_from_dot(path).to_networkx()
+
+
+def load_labeled_graph_from_dot(path: str) -> LabeledGraph:
     """
-    Loads graph from cfpq_data package by name
+    Loads graph from dot file, the streaming reader is used when the file is in
+    the subset of DOT it supports, otherwise the file is parsed by pydot
     """
-    path = cfpq_data.download(name)
-    return cfpq_data.graph_from_csv(path)
+    try:
+        return read_dot(path)
+    except UnsupportedDotError:
+        import networkx as nx
+        import pydot
+
+        graph = nx.nx_pydot.from_pydot(pydot.graph_from_dot_file(path)[0])
+        return LabeledGraph.from_networkx(graph)
 
 
-def get_number_of_nodes(graph: nx.Graph) -> int:
+def get_graph_by_name(name: str, cache: Optional[GraphCache] = None) -> "nx.Graph":
+    """
+    Loads graph from cfpq_data package by name, the graph is downloaded
+    only if it is not in the cache yet
+    """
+    return get_csr_graph_by_name(name, cache).to_labeled_graph().to_networkx()
+
+
+def get_csr_graph_by_name(name: str, cache: Optional[GraphCache] = None) -> CsrGraph:
+    """
+    Loads graph from cfpq_data package by name in matrix form, without
+    parsing of csv file and networkx graph when the graph is cached
+    """
+    return (default_graph_cache if cache is None else cache).get(name)
+
+
+def get_number_of_nodes(graph: "nx.Graph") -> int:
     """
     Returns the number of nodes in the graph
     """
     return graph.number_of_nodes()
 
 
-def get_number_of_edges(graph: nx.Graph) -> int:
+def get_number_of_edges(graph: "nx.Graph") -> int:
     """
     Returns the number of edges in the graph
     """
     return graph.number_of_edges()
 
 
-def get_labels(graph: nx.Graph) -> list[str]:
+def get_labels(graph: "nx.Graph") -> list[str]:
     """
     Returns labels of the graph
     """
@@ -37,18 +71,64 @@ def get_labels(graph: nx.Graph) -> list[str]:
     return labels
 
 
-def get_graph_info(graph: nx.Graph) -> dict:
+def get_graph_info(graph: Union["nx.Graph", LabeledGraph, CsrGraph]) -> dict:
     """
     Returns dict with an info about the given graph
     """
+    statistics = get_graph_statistics(graph)
+    return {
+        "number_of_nodes": statistics["number_of_nodes"],
+        "number_of_edges": statistics["number_of_edges"],
+        "labels": statistics["labels"],
+    }
+
+
+def get_graph_statistics(graph: Union["nx.Graph", LabeledGraph, CsrGraph]) -> dict:
+    """
+    Computes statistics of the graph in one pass over its edges, graphs in
+    matrix form are not converted to python objects
+
+    Parameters
+    ----------
+    graph :
+        The given graph, networkx graph is converted to edge arrays first
+
+    Returns
+    -------
+    statistics :
+        Dict with number_of_nodes, number_of_edges, labels, edges_per_label
+        and in/out degree distributions, the distribution is an array where
+        i-th element is the number of nodes with degree i
+    """
+    if not isinstance(graph, (LabeledGraph, CsrGraph)):
+        graph = LabeledGraph.from_networkx(graph)
+    n = graph.number_of_nodes
+    in_degrees = np.zeros(n, dtype=np.int64)
+    out_degrees = np.zeros(n, dtype=np.int64)
+    edges_per_label = {}
+    if isinstance(graph, CsrGraph):
+        for label, (indptr, indices) in graph.matrices.items():
+            edges_per_label[label] = len(indices)
+            out_degrees += np.diff(indptr)
+            in_degrees += np.bincount(indices, minlength=n)
+    else:
+        for label, (sources, destinations) in graph.edges.items():
+            edges_per_label[label] = len(sources)
+            out_degrees += np.bincount(sources, minlength=n)
+            in_degrees += np.bincount(destinations, minlength=n)
     return {
-        "number_of_nodes": get_number_of_nodes(graph),
-        "number_of_edges": get_number_of_edges(graph),
-        "labels": get_labels(graph),
+        "number_of_nodes": n,
+        "number_of_edges": sum(edges_per_label.values()),
+        "labels": list(edges_per_label),
+        "edges_per_label": edges_per_label,
+        "in_degree_distribution": np.bincount(in_degrees),
+        "out_degree_distribution": np.bincount(out_degrees),
     }
 
 
-def create_two_cycles_graph(n: int, m: int, labels: tuple[str, str]) -> nx.MultiDiGraph:
+def create_two_cycles_graph(
+    n: int, m: int, labels: tuple[str, str]
+) -> "nx.MultiDiGraph":
     """
     Returns a graph with two cycles connected by one node. With labeled edges.
 
@@ -68,10 +148,12 @@ def create_two_cycles_graph(n: int, m: int, labels: tuple[str, str]) -> nx.Multi
     graph :
         A graph with two cycles connected by one node.
     """
+    import cfpq_data
+
     return cfpq_data.labeled_two_cycles_graph(n, m, labels=labels)
 
 
-def save_graph_to_dot(graph: nx.Graph, path: str) -> None:
+def save_graph_to_dot(graph: "nx.Graph", path: str) -> None:
     """
     Saves networkx graph to file in dot format
 
@@ -83,8 +165,8 @@ def save_graph_to_dot(graph: nx.Graph, path: str) -> None:
       Path to file where dot representation of graph must be saved
 
     """
-    pydot_graph = nx.nx_pydot.to_pydot(graph)
-    pydot_graph.write_raw(path)
+    with open(path, "w", encoding="utf-8") as file:
+        write_networkx_dot(graph, file)
 
 
 def create_two_cycles_graph_and_save(n, m, labels, path):
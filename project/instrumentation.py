@@ -0,0 +1,201 @@
+"""
+Timers and counters of hot paths of rpq, cfpq and interpreter.
+
+Instrumentation is disabled until a collector is installed by collect or
+installed, the instrumented code takes the current collector once with
+current() and skips all measurements if it is None, so disabled
+instrumentation costs one check per call of an instrumented function
+
+Names of measurements
+---------------------
+rpq.decomposition, rpq.kron, rpq.closure :
+    Timers of boolean decomposition build, Kronecker product and transitive
+    closure of tensor RPQ
+rpq.closure.iterations, rpq.closure.nnz :
+    Iterations of closure and number of nonzero elements after each of them
+rpq.bfs.iterations, rpq.bfs.nnz :
+    Iterations of multiple sources BFS and nonzero elements of front matrix
+cfpq.hellings.iterations, cfpq.hellings.worklist :
+    Processed triples of Hellings algorithm and size of worklist before each
+cfpq.matrix.iterations, cfpq.matrix.nnz :
+    Iterations of matrix CFPQ and total nonzero elements after each of them
+rpq.intersection, regex.compile, graph.load :
+    Timers of intersection of automata, building automata from regular
+    expressions and loading of graphs
+interpreter.statement :
+    Time of every statement of interpreted program as pairs of statement
+    number and seconds
+"""
+import contextlib
+import functools
+import json
+import time
+import typing
+
+# Name of timer of statements of interpreted programs
+STATEMENT = "interpreter.statement"
+
+# Callback of collector, called with kind of event (timer, counter or value),
+# name of measurement and its value
+Callback = typing.Callable[[str, str, typing.Any], None]
+
+
+class Collector:
+    """
+    Storage of measurements
+
+    Parameters
+    ----------
+    callback :
+        Function called on every measurement in addition to storing it
+    """
+
+    def __init__(self, callback: typing.Optional[Callback] = None):
+        self.callback = callback
+        self.timers: dict[str, list[float]] = {}
+        self.counters: dict[str, int] = {}
+        self.values: dict[str, list] = {}
+        # Exclusive time of every stack of nested timers joined with ;
+        self.stacks: dict[str, float] = {}
+        self.stack: list[str] = []
+        self.children_times: list[float] = []
+
+    def add_time(self, name: str, seconds: float):
+        self.timers.setdefault(name, []).append(seconds)
+        if self.callback is not None:
+            self.callback("timer", name, seconds)
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + value
+        if self.callback is not None:
+            self.callback("counter", name, value)
+
+    def record(self, name: str, value):
+        """
+        Appends value to the series of measurement, e.g. nnz after iteration
+        """
+        self.values.setdefault(name, []).append(value)
+        if self.callback is not None:
+            self.callback("value", name, value)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, frame: typing.Optional[str] = None):
+        """
+        Measures time of the block, frame is the name of the block in stacks
+        of nested timers, name of the timer by default
+        """
+        self.stack.append(name if frame is None else frame)
+        self.children_times.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            stack = ";".join(self.stack)
+            self.stacks[stack] = (
+                self.stacks.get(stack, 0.0) + seconds - self.children_times.pop()
+            )
+            self.stack.pop()
+            if self.children_times:
+                self.children_times[-1] += seconds
+            self.add_time(name, seconds)
+
+    @contextlib.contextmanager
+    def statement(self, number: int, text: str = ""):
+        """
+        Measures time of statement of interpreted program
+        """
+        frame = f"statement {number}: {text}" if text else f"statement {number}"
+        with self.timer(STATEMENT, frame.replace(";", ",")):
+            yield
+        self.record(STATEMENT, (number, self.timers[STATEMENT][-1]))
+
+    def to_dict(self) -> dict:
+        return {
+            "timers": {
+                name: {"count": len(times), "total": sum(times), "times": times}
+                for name, times in self.timers.items()
+            },
+            "counters": dict(self.counters),
+            "values": {name: list(values) for name, values in self.values.items()},
+            "stacks": dict(self.stacks),
+        }
+
+    def to_json(self, file: typing.TextIO):
+        json.dump(self.to_dict(), file, indent=2, default=_to_builtin)
+
+
+def _to_builtin(value):
+    # numpy scalars in recorded values
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+_collector: typing.Optional[Collector] = None
+
+
+def current() -> typing.Optional[Collector]:
+    """
+    Returns installed collector, None if instrumentation is disabled
+    """
+    return _collector
+
+
+@contextlib.contextmanager
+def installed(collector: Collector) -> typing.Iterator[Collector]:
+    """
+    Enables instrumentation with the given collector inside the block,
+    measurements of nested blocks are not stored in outer collectors
+    """
+    global _collector
+    previous = _collector
+    _collector = collector
+    try:
+        yield collector
+    finally:
+        _collector = previous
+
+
+def collect(
+    callback: typing.Optional[Callback] = None,
+) -> typing.ContextManager[Collector]:
+    """
+    Enables instrumentation inside the block with a new collector
+
+    Examples
+    --------
+    >>> with collect() as collector:
+    ...     with timer("example"):
+    ...         pass
+    >>> collector.to_dict()["timers"]["example"]["count"]
+    1
+    """
+    return installed(Collector(callback))
+
+
+def timer(name: str) -> typing.ContextManager:
+    """
+    Measures time of the block if instrumentation is enabled
+    """
+    if _collector is None:
+        return contextlib.nullcontext()
+    return _collector.timer(name)
+
+
+def timed(name: str) -> typing.Callable:
+    """
+    Decorator which measures time of every call of function
+    """
+
+    def decorator(function: typing.Callable) -> typing.Callable:
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _collector is None:
+                return function(*args, **kwargs)
+            with _collector.timer(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,121 @@
+import typing
+from typing import Hashable, Optional, Sequence
+
+import numpy as np
+
+if typing.TYPE_CHECKING:
+    import networkx as nx
+
+
+class LabeledGraph:
+    """
+    Directed graph with labeled edges stored as integer arrays
+
+    Nodes are referenced by their index in the node table, edges of every label
+    are kept as two arrays of source and destination indexes, so large graphs
+    don't need a python object per edge
+
+    Parameters
+    ----------
+    nodes :
+        Names of nodes in order of their indexes
+    edges :
+        Dictionary from label to arrays of sources and destinations of edges,
+        edges without label are stored with None label
+    node_attributes :
+        Attributes of nodes which have any
+    """
+
+    def __init__(
+        self,
+        nodes: Sequence[Hashable],
+        edges: dict[Optional[str], tuple[np.ndarray, np.ndarray]],
+        node_attributes: Optional[dict[int, dict]] = None,
+    ):
+        self.nodes = nodes
+        self.edges = edges
+        self.node_attributes = node_attributes if node_attributes is not None else {}
+
+    @classmethod
+    def from_networkx(cls, graph: "nx.Graph") -> "LabeledGraph":
+        """
+        Converts networkx graph, all edge attributes except label are dropped
+        """
+        nodes = list(graph.nodes)
+        index = {node: i for i, node in enumerate(nodes)}
+        node_attributes = {
+            index[node]: dict(attributes)
+            for node, attributes in graph.nodes(data=True)
+            if attributes
+        }
+        edge_lists = {}
+        for src, dst, label in graph.edges(data="label"):
+            sources, destinations = edge_lists.setdefault(label, ([], []))
+            sources.append(index[src])
+            destinations.append(index[dst])
+        edges = {
+            label: (np.array(sources, dtype=np.int64), np.array(dsts, dtype=np.int64))
+            for label, (sources, dsts) in edge_lists.items()
+        }
+        return cls(nodes, edges, node_attributes)
+
+    @classmethod
+    def from_edge_list_csv(cls, path: str) -> "LabeledGraph":
+        """
+        Reads graph from csv file of cfpq_data dataset, lines of the file are
+        space separated source, destination and label of edges. Nodes are
+        numbered in the order graph_from_csv adds them to networkx graph
+        """
+        import pandas as pd
+
+        data = pd.read_csv(
+            path, sep=" ", header=None, names=["from", "to", "label"], engine="c"
+        )
+        ends = np.column_stack([data["from"].to_numpy(), data["to"].to_numpy()])
+        codes, nodes = pd.factorize(ends.ravel())
+        codes = codes.astype(np.int64)
+        sources, destinations = codes[0::2], codes[1::2]
+        label_codes, labels = pd.factorize(data["label"])
+        edges = {}
+        for i, label in enumerate(labels.tolist()):
+            mask = label_codes == i
+            edges[label] = (sources[mask], destinations[mask])
+        return cls(nodes.tolist(), edges)
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def number_of_edges(self) -> int:
+        return sum(len(sources) for sources, _ in self.edges.values())
+
+    @property
+    def labels(self) -> list[str]:
+        return [label for label in self.edges if label is not None]
+
+    def csr(self, label: Optional[str]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Returns indptr and indices of adjacency matrix of edges with the label,
+        destinations of every source are sorted
+        """
+        sources, destinations = self.edges[label]
+        order = np.lexsort((destinations, sources))
+        indptr = np.zeros(self.number_of_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=self.number_of_nodes), out=indptr[1:])
+        return indptr, destinations[order]
+
+    def to_networkx(self) -> "nx.MultiDiGraph":
+        import networkx as nx
+
+        graph = nx.MultiDiGraph()
+        for i, node in enumerate(self.nodes):
+            graph.add_node(node, **self.node_attributes.get(i, {}))
+        nodes = self.nodes
+        for label, (sources, destinations) in self.edges.items():
+            attributes = {} if label is None else {"label": label}
+            graph.add_edges_from(
+                (nodes[src], nodes[dst], attributes)
+                for src, dst in zip(sources.tolist(), destinations.tolist())
+            )
+        return graph
@@ -2,12 +2,14 @@ grammar QueryLanguage;
 
 prog: (stmt NEWLINE)+;
 
-stmt: declaration | print;
+stmt: declaration | print | explain;
 
 declaration: name ' = ' expr;
 
 print: 'print ' expr;
 
+explain: 'explain ' expr | 'explain analyze ' expr;
+
 name: CHAR | '_' | name literal;
 
 string: '/' | '.' | ' ' | ';' | literal | string string;
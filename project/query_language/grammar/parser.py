@@ -1,9 +1,22 @@
+import hashlib
+import typing
+
 from antlr4 import *
 from antlr4.error.ErrorListener import ErrorListener
-from pydot import Dot, Node, Edge
+from antlr4.Token import CommonToken
+from antlr4.tree.Tree import ParseTree, TerminalNodeImpl
 
 from project.query_language.grammar.QueryLanguageLexer import QueryLanguageLexer
-from project.query_language.grammar.QueryLanguageParser import QueryLanguageParser
+from project.query_language.grammar.QueryLanguageParser import (
+    QueryLanguageParser,
+    serializedATN,
+)
+
+# Parsing tree in plain python structures: rule is a list of rule index and
+# children, terminal is a pair of token type and text
+SerializedTree = typing.Union[list, tuple[int, str]]
+
+GRAMMAR_FINGERPRINT = hashlib.sha256(str(serializedATN()).encode()).hexdigest()
 
 
 class CountErrorListener(ErrorListener):
@@ -31,11 +44,16 @@ class CountErrorListener(ErrorListener):
 
 class DotGeneratorListener(ParseTreeListener):
     def __init__(self):
+        # pydot is imported only when parsing trees are written to DOT
+        from pydot import Dot
+
         self.tree = Dot("parsing_tree", graph_type="graph")
         self.path_to_root = []
         self.new_node_id = 0
 
     def enterEveryRule(self, ctx: ParserRuleContext):
+        from pydot import Edge
+
         current_node = self._new_node(QueryLanguageParser.ruleNames[ctx.getRuleIndex()])
         self.tree.add_node(current_node)
         if self.path_to_root:
@@ -48,6 +66,8 @@ class DotGeneratorListener(ParseTreeListener):
         self.path_to_root = self.path_to_root[:-1]
 
     def visitTerminal(self, node: TerminalNode):
+        from pydot import Edge
+
         current_node = self._new_node(node.getText())
         self.tree.add_node(current_node)
         if self.path_to_root:
@@ -57,6 +77,8 @@ class DotGeneratorListener(ParseTreeListener):
 
     def _new_node(self, rule_name):
         # escape special characters
+        from pydot import Node
+
         rule_name = rule_name.translate(str.maketrans({"\\": r"\\"}))
         node = Node(self.new_node_id, label=rule_name)
         self.new_node_id += 1
@@ -98,14 +120,65 @@ def check_script_file_correct(path: str) -> bool:
 
 
 def check_script_stream_correct(input_stream):
+    return parse_stream(input_stream) is not None
+
+
+def parse_stream(input_stream) -> typing.Optional[QueryLanguageParser.ProgContext]:
+    """
+    Parses input program on query language
+
+    Parameters
+    ----------
+    input_stream :
+        Antlr stream with input program
+
+    Returns
+    ----------
+    tree :
+        Parsing tree of program or None if input is not accepted by query
+        language grammar
+    """
     lexer = QueryLanguageLexer(input_stream)
     lexer_error_listener = CountErrorListener()
     lexer.addErrorListener(lexer_error_listener)
     stream = CommonTokenStream(lexer)
     parser = QueryLanguageParser(stream)
-    parser.prog()
+    tree = parser.prog()
     errors = parser.getNumberOfSyntaxErrors()
-    return errors == 0 and lexer_error_listener.errors_number == 0
+    if errors != 0 or lexer_error_listener.errors_number != 0:
+        return None
+    return tree
+
+
+def serialize_tree(tree: ParserRuleContext) -> SerializedTree:
+    """
+    Converts parsing tree to nested lists which can be stored in json
+    """
+    if isinstance(tree, TerminalNode):
+        return tree.symbol.type, tree.getText()
+    return [tree.getRuleIndex()] + [serialize_tree(child) for child in tree.children]
+
+
+def deserialize_tree(
+    data: SerializedTree, parent: typing.Optional[ParserRuleContext] = None
+) -> ParseTree:
+    """
+    Restores parsing tree from result of serialize_tree without parsing.
+    Restored tree has no tokens positions, but can be visited as usual
+    """
+    if isinstance(data[0], int) and len(data) == 2 and isinstance(data[1], str):
+        token = CommonToken(type=data[0])
+        token.text = data[1]
+        node = TerminalNodeImpl(token)
+        node.parentCtx = parent
+        return node
+    rule_name = QueryLanguageParser.ruleNames[data[0]]
+    context_class = getattr(
+        QueryLanguageParser, rule_name[0].upper() + rule_name[1:] + "Context"
+    )
+    ctx = context_class(None, parent)
+    ctx.children = [deserialize_tree(child, ctx) for child in data[1:]]
+    return ctx
 
 
 def export_script_to_dot(script: str, result_path: str):
@@ -0,0 +1,466 @@
+"""
+Finite automata values of query language in matrix form.
+
+States of automaton are indexes in a table of their values, transitions of
+every label are a boolean CSR matrix and start and final states are sorted
+arrays of indexes. Intersection and reachability work on the matrices
+directly, a pyformlang automaton is built only for operations which need one
+(concatenation, union, kleene star and comparison of values)
+"""
+import typing
+from typing import Hashable, Optional
+
+import numpy as np
+from pyformlang.finite_automaton import Epsilon, EpsilonNFA, State, Symbol
+
+from project import instrumentation
+from project.labeled_graph import LabeledGraph
+from project.query_language.interpreter.values import EncodedSetValue
+
+if typing.TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+# Label of epsilon transitions in getEdges and explain, they are stored with
+# None label
+EPSILON = Epsilon().value
+
+
+class StateTable:
+    """
+    Values of states of automaton in order of their indexes
+    """
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def __getitem__(self, i: int) -> Hashable:
+        raise NotImplementedError
+
+    def index(self, value: Hashable) -> Optional[int]:
+        """
+        Returns index of state with the value, None if there is no such state
+        """
+        raise NotImplementedError
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class ValueTable(StateTable):
+    """
+    Table of explicitly stored values
+    """
+
+    def __init__(self, values: typing.Sequence[Hashable]):
+        self.values = values
+        self._index: Optional[dict[Hashable, int]] = None
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i: int):
+        return self.values[i]
+
+    def index(self, value: Hashable) -> Optional[int]:
+        if self._index is None:
+            self._index = {value: i for i, value in enumerate(self.values)}
+        try:
+            return self._index.get(value)
+        except TypeError:
+            return None
+
+    def __iter__(self):
+        return iter(self.values)
+
+
+class ProductTable(StateTable):
+    """
+    Pairs of states of two automata in order of indexes of Kronecker product
+    of their matrices, pairs are not stored
+    """
+
+    def __init__(self, left: StateTable, right: StateTable):
+        self.left = left
+        self.right = right
+
+    def __len__(self):
+        return len(self.left) * len(self.right)
+
+    def __getitem__(self, i: int):
+        first, second = divmod(i, len(self.right))
+        return self.left[first], self.right[second]
+
+    def index(self, value: Hashable) -> Optional[int]:
+        if not isinstance(value, tuple) or len(value) != 2:
+            return None
+        first, second = self.left.index(value[0]), self.right.index(value[1])
+        if first is None or second is None:
+            return None
+        return first * len(self.right) + second
+
+
+class SubTable(StateTable):
+    """
+    States of another table with the given sorted indexes
+    """
+
+    def __init__(self, table: StateTable, ids: np.ndarray):
+        self.table = table
+        self.ids = ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i: int):
+        return self.table[int(self.ids[i])]
+
+    def index(self, value: Hashable) -> Optional[int]:
+        i = self.table.index(value)
+        if i is None:
+            return None
+        position = int(np.searchsorted(self.ids, i))
+        if position < len(self.ids) and self.ids[position] == i:
+            return position
+        return None
+
+
+def _encoded(table: typing.Iterable, columns: list[np.ndarray]) -> EncodedSetValue:
+    """
+    Returns set of rows of the columns of indexes in the table, rows are
+    sorted and deduplicated by columns, which is faster than by records
+    """
+    order = np.lexsort(columns[::-1])
+    columns = [column[order] for column in columns]
+    unique = np.ones(len(order), dtype=bool)
+    if len(order) > 1:
+        unique[1:] = np.logical_or.reduce([np.diff(column) != 0 for column in columns])
+    ids = np.empty(
+        np.count_nonzero(unique), dtype=EncodedSetValue.ids_dtype(len(columns))
+    )
+    for field, column in zip(ids.dtype.names, columns):
+        ids[field] = column[unique]
+    return EncodedSetValue(ids, table)
+
+
+def _concatenate(arrays: list[np.ndarray]) -> np.ndarray:
+    return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int64)
+
+
+def _matrix(
+    sources: np.ndarray, destinations: np.ndarray, number_of_states: int
+) -> "csr_matrix":
+    from scipy.sparse import coo_matrix
+
+    matrix = coo_matrix(
+        (np.ones(len(sources), dtype=bool), (sources, destinations)),
+        shape=(number_of_states, number_of_states),
+    ).tocsr()
+    matrix.sum_duplicates()
+    return matrix
+
+
+class AutomatonValue:
+    """
+    Immutable finite automaton of query language
+
+    Values made by setStart, setFinal, addStart and addFinal share the state
+    table and the matrices of the automaton they are made from, only states
+    which are not in the table yet make a new table
+
+    Parameters
+    ----------
+    states :
+        Values of states
+    matrices :
+        Boolean adjacency matrices of transitions by label, epsilon transitions
+        are stored with None label. Matrices without transitions are not stored
+    start_states, final_states :
+        Sorted arrays of indexes of start and final states
+    """
+
+    def __init__(
+        self,
+        states: StateTable,
+        matrices: dict[Optional[str], "csr_matrix"],
+        start_states: np.ndarray,
+        final_states: np.ndarray,
+    ):
+        self.states = states
+        self.matrices = matrices
+        self.start_states = start_states
+        self.final_states = final_states
+        self._nfa: Optional[EpsilonNFA] = None
+
+    @classmethod
+    def from_nfa(cls, fa: EpsilonNFA) -> "AutomatonValue":
+        states = list(fa.states)
+        index = {state: i for i, state in enumerate(states)}
+        transitions: dict[Optional[str], tuple[list, list]] = {}
+        for src, symbol, dst in fa:
+            label = None if isinstance(symbol, Epsilon) else symbol.value
+            sources, destinations = transitions.setdefault(label, ([], []))
+            sources.append(index[src])
+            destinations.append(index[dst])
+        matrices = {
+            label: _matrix(
+                np.array(sources, dtype=np.int64),
+                np.array(destinations, dtype=np.int64),
+                len(states),
+            )
+            for label, (sources, destinations) in transitions.items()
+        }
+        result = cls(
+            ValueTable([state.value for state in states]),
+            matrices,
+            np.unique(np.array([index[s] for s in fa.start_states], dtype=np.int64)),
+            np.unique(np.array([index[s] for s in fa.final_states], dtype=np.int64)),
+        )
+        result._nfa = fa
+        return result
+
+    @classmethod
+    def from_labeled_graph(cls, graph: LabeledGraph) -> "AutomatonValue":
+        """
+        Automaton of the graph with all states start and final, edges without
+        label are skipped as by get_nondeterministic_automata_from_labeled_graph
+        """
+        matrices = {
+            label: _matrix(sources, destinations, graph.number_of_nodes)
+            for label, (sources, destinations) in graph.edges.items()
+            if label is not None and len(sources) > 0
+        }
+        states = np.arange(graph.number_of_nodes, dtype=np.int64)
+        return cls(ValueTable(graph.nodes), matrices, states, states)
+
+    @property
+    def number_of_states(self) -> int:
+        return len(self.states)
+
+    @property
+    def labels(self) -> list[str]:
+        return [label for label in self.matrices if label is not None]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory of arrays of the matrices and of start and final states
+        """
+        return (
+            self.start_states.nbytes
+            + self.final_states.nbytes
+            + sum(
+                matrix.indptr.nbytes + matrix.indices.nbytes + matrix.data.nbytes
+                for matrix in self.matrices.values()
+            )
+        )
+
+    def number_of_transitions(self) -> dict[str, int]:
+        return {
+            EPSILON if label is None else label: matrix.nnz
+            for label, matrix in self.matrices.items()
+        }
+
+    def state_set(self) -> EncodedSetValue:
+        """
+        Set of values of all states, states are encoded by their indexes
+        without hashing of values
+        """
+        return _encoded(self.states, [np.arange(self.number_of_states)])
+
+    def start_set(self) -> EncodedSetValue:
+        return _encoded(
+            self._values(self.start_states), [np.arange(len(self.start_states))]
+        )
+
+    def final_set(self) -> EncodedSetValue:
+        return _encoded(
+            self._values(self.final_states), [np.arange(len(self.final_states))]
+        )
+
+    def label_set(self) -> EncodedSetValue:
+        return EncodedSetValue.from_values(self.labels)
+
+    def edge_set(self) -> EncodedSetValue:
+        """
+        Set of transitions as source value, label and destination value. The
+        columns of sources and destinations are taken from the matrices and
+        labels are added to the state table, so no tuple is created per edge
+        """
+        table = list(self.states)
+        label_ids: dict[str, int] = {}
+        sources, labels, destinations = [], [], []
+        for label, matrix in self.matrices.items():
+            label = EPSILON if label is None else label
+            if label not in label_ids:
+                label_id = self.states.index(label)
+                if label_id is None:
+                    label_id = len(table)
+                    table.append(label)
+                label_ids[label] = label_id
+            coo = matrix.tocoo()
+            sources.append(coo.row)
+            labels.append(np.full(coo.nnz, label_ids[label], dtype=np.int64))
+            destinations.append(coo.col)
+        return _encoded(
+            table,
+            [_concatenate(sources), _concatenate(labels), _concatenate(destinations)],
+        )
+
+    def _values(self, ids: np.ndarray) -> list[Hashable]:
+        states = self.states
+        return [states[i] for i in ids.tolist()]
+
+    def _indexes(
+        self, values: typing.Iterable[Hashable]
+    ) -> tuple["AutomatonValue", np.ndarray]:
+        """
+        Returns indexes of states with the values and automaton whose table
+        has them, values which are not in the table are added as new states
+        """
+        ids = []
+        added: dict[Hashable, int] = {}
+        number_of_states = self.number_of_states
+        for value in values:
+            i = self.states.index(value)
+            if i is None:
+                i = added.setdefault(value, number_of_states + len(added))
+            ids.append(i)
+        ids = np.unique(np.array(ids, dtype=np.int64))
+        if not added:
+            return self, ids
+        from scipy.sparse import csr_matrix
+
+        size = number_of_states + len(added)
+        matrices = {}
+        for label, matrix in self.matrices.items():
+            indptr = np.concatenate(
+                [matrix.indptr, np.full(len(added), matrix.indptr[-1])]
+            )
+            matrices[label] = csr_matrix(
+                (matrix.data, matrix.indices, indptr), shape=(size, size)
+            )
+        states = ValueTable(list(self.states) + list(added))
+        return (
+            AutomatonValue(states, matrices, self.start_states, self.final_states),
+            ids,
+        )
+
+    def with_start_states(self, values: typing.Iterable) -> "AutomatonValue":
+        result, ids = self._indexes(values)
+        return AutomatonValue(result.states, result.matrices, ids, result.final_states)
+
+    def with_final_states(self, values: typing.Iterable) -> "AutomatonValue":
+        result, ids = self._indexes(values)
+        return AutomatonValue(result.states, result.matrices, result.start_states, ids)
+
+    def add_start_state(self, value) -> "AutomatonValue":
+        result, ids = self._indexes([value])
+        return result.with_start_state_ids(np.union1d(result.start_states, ids))
+
+    def add_final_state(self, value) -> "AutomatonValue":
+        result, ids = self._indexes([value])
+        return result.with_final_state_ids(np.union1d(result.final_states, ids))
+
+    def with_start_state_ids(self, ids: np.ndarray) -> "AutomatonValue":
+        return AutomatonValue(self.states, self.matrices, ids, self.final_states)
+
+    def with_final_state_ids(self, ids: np.ndarray) -> "AutomatonValue":
+        return AutomatonValue(self.states, self.matrices, self.start_states, ids)
+
+    @instrumentation.timed("rpq.intersection")
+    def intersection(self, other: "AutomatonValue") -> "AutomatonValue":
+        """
+        Builds intersection through the Kronecker product of matrices, states
+        of the result are pairs of states of the automata. Only states with
+        transitions and start and final states are kept
+        """
+        from scipy.sparse import kron
+
+        size = other.number_of_states
+        labels = [label for label in self.labels if label in other.matrices]
+        with instrumentation.timer("rpq.kron"):
+            products = {
+                label: kron(self.matrices[label], other.matrices[label], format="coo")
+                for label in labels
+            }
+        products = {
+            label: product for label, product in products.items() if product.nnz > 0
+        }
+        start_states = (
+            self.start_states[:, np.newaxis] * size + other.start_states
+        ).ravel()
+        final_states = (
+            self.final_states[:, np.newaxis] * size + other.final_states
+        ).ravel()
+        used = np.unique(
+            np.concatenate(
+                [start_states, final_states]
+                + [product.row for product in products.values()]
+                + [product.col for product in products.values()]
+            ).astype(np.int64)
+        )
+        matrices = {
+            label: _matrix(
+                np.searchsorted(used, product.row),
+                np.searchsorted(used, product.col),
+                len(used),
+            )
+            for label, product in products.items()
+        }
+        return AutomatonValue(
+            SubTable(ProductTable(self.states, other.states), used),
+            matrices,
+            np.searchsorted(used, np.unique(start_states)),
+            np.searchsorted(used, np.unique(final_states)),
+        )
+
+    def reachable_pairs(self) -> list[tuple[Hashable, Hashable]]:
+        """
+        Returns pairs of values of start and final states connected by a
+        non-empty path
+        """
+        from project.rpq.all_pairs import (
+            get_transitive_closure_of_boolean_decomposition,
+        )
+
+        if self.number_of_states == 0:
+            return []
+        closure = get_transitive_closure_of_boolean_decomposition(self.matrices)
+        if closure is None:
+            return []
+        reachable = closure.tocsr()[self.start_states][:, self.final_states].tocoo()
+        states, starts, finals = self.states, self.start_states, self.final_states
+        return [
+            (states[int(starts[i])], states[int(finals[j])])
+            for i, j in zip(reachable.row.tolist(), reachable.col.tolist())
+        ]
+
+    def to_nfa(self) -> EpsilonNFA:
+        """
+        Returns pyformlang automaton of the value, it is built once and must
+        not be modified
+        """
+        if self._nfa is None:
+            nfa = EpsilonNFA()
+            states = [State(value) for value in self.states]
+            for i in self.start_states.tolist():
+                nfa.add_start_state(states[i])
+            for i in self.final_states.tolist():
+                nfa.add_final_state(states[i])
+            for label, matrix in self.matrices.items():
+                symbol = Epsilon() if label is None else Symbol(label)
+                coo = matrix.tocoo()
+                for src, dst in zip(coo.row.tolist(), coo.col.tolist()):
+                    nfa.add_transition(states[src], symbol, states[dst])
+            self._nfa = nfa
+        return self._nfa
+
+    def accepts(self, word: typing.Iterable) -> bool:
+        return self.to_nfa().accepts(word)
+
+    def __eq__(self, other):
+        if not isinstance(other, AutomatonValue):
+            return NotImplemented
+        return self.to_nfa().is_equivalent_to(other.to_nfa())
+
+    __hash__ = None
@@ -0,0 +1,641 @@
+import contextlib
+import sys
+import typing
+
+from antlr4 import ParserRuleContext
+
+from project import budget, instrumentation
+from project.automata import RFA
+from project.query_language.grammar.QueryLanguageParser import QueryLanguageParser
+from project.query_language.grammar.QueryLanguageVisitor import QueryLanguageVisitor
+from project.query_language.interpreter import explain, operations
+from project.query_language.interpreter.execution import (
+    CONTEXT_SLOT,
+    ExecutionContext,
+    LambdaInfo,
+)
+from project.query_language.interpreter.exceptions import (
+    BudgetException,
+    InterpretException,
+    UnknownVariable,
+    TypesException,
+)
+from project.query_language.interpreter.expression import Expression
+from project.query_language.interpreter.types import *
+
+# Variable slots of program run, slot CONTEXT_SLOT holds ExecutionContext
+Slots = list[typing.Optional[Expression]]
+CompiledExpression = typing.Callable[[Slots], Expression]
+CompiledStatement = typing.Callable[[Slots, typing.TextIO], None]
+CompiledElements = typing.Callable[
+    [Slots], tuple[operations.Elements, typing.Optional[Type]]
+]
+
+
+class CompiledProgram:
+    """
+    Query language program compiled to python closures
+
+    Parameters
+    ----------
+    statements :
+        Closures of program statements in order of execution
+    slots_number :
+        Number of variable slots used by the program
+    global_slots :
+        Slots of variables declared on the top level of the program
+    lambdas :
+        Lambdas of the program in order of their index
+    source :
+        Text of the program, lambdas of programs without source are always
+        evaluated serially
+    texts :
+        Texts of statements from parsing tree for profiling
+    """
+
+    def __init__(
+        self,
+        statements: list[CompiledStatement],
+        slots_number: int,
+        global_slots: dict[str, int],
+        lambdas: typing.Sequence[LambdaInfo] = (),
+        source: typing.Optional[str] = None,
+        texts: typing.Sequence[str] = (),
+    ):
+        self.statements = statements
+        self.slots_number = slots_number
+        self.global_slots = global_slots
+        self.lambdas = lambdas
+        self.source = source
+        self.texts = texts
+
+    def new_slots(self, context: ExecutionContext) -> Slots:
+        slots: Slots = [None] * self.slots_number
+        slots[CONTEXT_SLOT] = context
+        return slots
+
+    def run(
+        self, file=sys.stdout, context: typing.Optional[ExecutionContext] = None
+    ) -> dict[str, Expression]:
+        """
+        Executes program and returns values of declared variables
+        """
+        context = ExecutionContext() if context is None else context
+        slots = self.new_slots(context)
+        collector = instrumentation.current()
+        if collector is None and not context.is_limited:
+            for statement in self.statements:
+                statement(slots, file)
+        else:
+            texts = self.texts or [""] * len(self.statements)
+            for number, (statement, text) in enumerate(zip(self.statements, texts), 1):
+                with contextlib.ExitStack() as stack:
+                    if collector is not None:
+                        stack.enter_context(collector.statement(number, text))
+                    try:
+                        if context.is_limited:
+                            limit = stack.enter_context(
+                                budget.limited(context.statement_budget())
+                            )
+                            limit.check("interpreter")
+                        statement(slots, file)
+                    except budget.BudgetExceeded as error:
+                        raise BudgetException(
+                            number, error.reason, error.statistics
+                        ) from error
+        return {
+            name: slots[slot]
+            for name, slot in self.global_slots.items()
+            if slots[slot] is not None
+        }
+
+
+class Compiler(QueryLanguageVisitor):
+    """
+    Compiles parsing tree of program to closures.
+
+    Every variable gets its own slot in a flat list at compile time, so
+    evaluation does not walk the parsing tree and does not look up names
+    in frames. The semantics of operations are shared with InterpretVisitor
+    """
+
+    def __init__(self, source: typing.Optional[str] = None):
+        self.source = source
+        self.global_slots: dict[str, int] = {}
+        self.scopes: list[dict[str, int]] = []
+        self.slots_number = CONTEXT_SLOT + 1
+        self.lambdas: list[LambdaInfo] = []
+        # Slots referenced by bodies of lambdas which are being compiled
+        self.captures: list[set[int]] = []
+        self.statement_count = 0
+        self.constants: dict[CompiledExpression, Expression] = {}
+
+    def compile(self, tree: QueryLanguageParser.ProgContext) -> CompiledProgram:
+        return self.visit(tree)
+
+    def _new_slot(self) -> int:
+        self.slots_number += 1
+        return self.slots_number - 1
+
+    def _resolve(self, name: str) -> int:
+        slot = self._lookup(name)
+        for captured in self.captures:
+            captured.add(slot)
+        return slot
+
+    def _lookup(self, name: str) -> int:
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        if name not in self.global_slots:
+            self.global_slots[name] = self._new_slot()
+        return self.global_slots[name]
+
+    def _constant(self, expr: Expression) -> CompiledExpression:
+        def constant(slots: Slots) -> Expression:
+            return expr
+
+        self.constants[constant] = expr
+        return constant
+
+    def _lazy_constant(
+        self, factory: typing.Callable[[], Expression]
+    ) -> CompiledExpression:
+        """
+        Constant which is computed only when it is needed for the first time
+        """
+        cache = []
+
+        def lazy_constant(slots: Slots) -> Expression:
+            if not cache:
+                cache.append(factory())
+            return cache[0]
+
+        return lazy_constant
+
+    def visitProg(self, ctx: QueryLanguageParser.ProgContext):
+        statement_contexts = [
+            child
+            for child in ctx.children
+            if isinstance(child, QueryLanguageParser.StmtContext)
+        ]
+        statements = [self.visit(child) for child in statement_contexts]
+        return CompiledProgram(
+            statements,
+            self.slots_number,
+            self.global_slots,
+            self.lambdas,
+            self.source,
+            [child.getText() for child in statement_contexts],
+        )
+
+    def visitStmt(self, ctx: QueryLanguageParser.StmtContext):
+        self.statement_count += 1
+        return self.visit(ctx.children[0])
+
+    def visitDeclaration(self, ctx: QueryLanguageParser.DeclarationContext):
+        statement = self.statement_count
+        var_name = ctx.children[0].getText()
+        slot = self._resolve(var_name)
+        expr_fn = self.visit(ctx.children[2])
+
+        def declaration(slots: Slots, file: typing.TextIO):
+            if slots[slot] is not None:
+                raise InterpretException(statement, "Redeclaring a variable")
+            try:
+                expr = expr_fn(slots)
+            except UnknownVariable:
+                slots[slot] = Expression(RFA(), RSMType())
+                expr = expr_fn(slots)
+                if not isinstance(expr.type, RSMType):
+                    raise InterpretException(
+                        statement,
+                        f"Recursion allowed only for RSM, not for {expr.type}",
+                    )
+            slots[slot] = expr
+
+        return declaration
+
+    def visitPrint(self, ctx: QueryLanguageParser.PrintContext):
+        expr_fn = self.visit(ctx.children[1])
+
+        def print_(slots: Slots, file: typing.TextIO):
+            operations.write_expression(
+                file, expr_fn(slots), slots[CONTEXT_SLOT].output_format
+            )
+
+        return print_
+
+    def visitExplain(self, ctx: QueryLanguageParser.ExplainContext):
+        expr_ctx = ctx.children[1]
+        names = {name: self._resolve(name) for name in explain.free_names(expr_ctx)}
+        expr_fn = self.visit(expr_ctx) if explain.is_analyze(ctx) else None
+
+        def explain_(slots: Slots, file: typing.TextIO):
+            def lookup(name: str) -> typing.Optional[Expression]:
+                return slots[names[name]] if name in names else None
+
+            plan = explain.Planner(lookup).plan(expr_ctx)
+            if expr_fn is None:
+                explain.write_plan(file, plan)
+            else:
+                explain.analyze(file, plan, lambda: expr_fn(slots))
+
+        return explain_
+
+    def visitExpr(self, ctx: QueryLanguageParser.ExprContext):
+        return self.visit(ctx.children[0])
+
+    def visitVal(self, ctx: QueryLanguageParser.ValContext):
+        return self.visit(ctx.children[0])
+
+    def visitBrakets(self, ctx: QueryLanguageParser.BraketsContext):
+        return self.visit(ctx.children[1])
+
+    def visitName(self, ctx: QueryLanguageParser.NameContext):
+        statement = self.statement_count
+        var_name = ctx.getText()
+        slot = self._resolve(var_name)
+
+        def name(slots: Slots) -> Expression:
+            value = slots[slot]
+            if value is None:
+                raise UnknownVariable(statement, f"Unknown name - {var_name}")
+            return value
+
+        return name
+
+    def visitStringVal(self, ctx: QueryLanguageParser.StringValContext):
+        if len(ctx.children) == 1:
+            return self._constant(operations.string_value(""))
+        return self._constant(operations.string_value(ctx.children[1].getText()))
+
+    def visitInteger(self, ctx: QueryLanguageParser.IntegerContext):
+        return self._constant(operations.int_value(int(ctx.getText())))
+
+    def visitBool(self, ctx: QueryLanguageParser.BoolContext):
+        return self._constant(operations.bool_value(ctx.getText() == str(True)))
+
+    def _binary(
+        self,
+        operation: typing.Callable[[int, Expression, Expression], Expression],
+        first_fn: CompiledExpression,
+        second_fn: CompiledExpression,
+        reverse: bool = False,
+    ) -> CompiledExpression:
+        """
+        Compiles operation with two operands, operands are evaluated from first to
+        second and passed to operation in reversed order if reverse is True
+        """
+        statement = self.statement_count
+        if reverse:
+
+            def binary(slots: Slots) -> Expression:
+                first = first_fn(slots)
+                return operation(statement, second_fn(slots), first)
+
+        else:
+
+            def binary(slots: Slots) -> Expression:
+                first = first_fn(slots)
+                return operation(statement, first, second_fn(slots))
+
+        return binary
+
+    def _unary(
+        self,
+        operation: typing.Callable[[int, Expression], Expression],
+        operand_fn: CompiledExpression,
+    ) -> CompiledExpression:
+        statement = self.statement_count
+
+        def unary(slots: Slots) -> Expression:
+            return operation(statement, operand_fn(slots))
+
+        return unary
+
+    def visitSetStart(self, ctx: QueryLanguageParser.SetStartContext):
+        return self._binary(
+            operations.set_start,
+            self.visit(ctx.children[3]),
+            self.visit(ctx.children[1]),
+            reverse=True,
+        )
+
+    def visitSetFinal(self, ctx: QueryLanguageParser.SetFinalContext):
+        return self._binary(
+            operations.set_final,
+            self.visit(ctx.children[3]),
+            self.visit(ctx.children[1]),
+            reverse=True,
+        )
+
+    def visitAddStart(self, ctx: QueryLanguageParser.AddStartContext):
+        return self._binary(
+            operations.add_start,
+            self.visit(ctx.children[3]),
+            self.visit(ctx.children[1]),
+            reverse=True,
+        )
+
+    def visitAddFinal(self, ctx: QueryLanguageParser.AddFinalContext):
+        return self._binary(
+            operations.add_final,
+            self.visit(ctx.children[3]),
+            self.visit(ctx.children[1]),
+            reverse=True,
+        )
+
+    def visitGetStart(self, ctx: QueryLanguageParser.GetStartContext):
+        return self._unary(operations.get_start, self.visit(ctx.children[1]))
+
+    def visitGetFinal(self, ctx: QueryLanguageParser.GetFinalContext):
+        return self._unary(operations.get_final, self.visit(ctx.children[1]))
+
+    def visitGetReachable(self, ctx: QueryLanguageParser.GetReachableContext):
+        if len(ctx.children) == 4:
+            return self._binary(
+                operations.get_reachable,
+                self.visit(ctx.children[1]),
+                self.visit(ctx.children[3]),
+            )
+        return self._unary(operations.get_reachable, self.visit(ctx.children[1]))
+
+    def visitGetVertices(self, ctx: QueryLanguageParser.GetVerticesContext):
+        return self._unary(operations.get_vertices, self.visit(ctx.children[1]))
+
+    def visitGetEdges(self, ctx: QueryLanguageParser.GetEdgesContext):
+        return self._unary(operations.get_edges, self.visit(ctx.children[1]))
+
+    def visitGetLabels(self, ctx: QueryLanguageParser.GetLabelsContext):
+        return self._unary(operations.get_labels, self.visit(ctx.children[1]))
+
+    def _compile_lambda(
+        self, ctx: QueryLanguageParser.LambdaContext
+    ) -> tuple[list[str], LambdaInfo]:
+        """
+        Compiles lambda body in a new scope, returns lambda arguments and
+        compiled lambda
+        """
+        args = self.visit(ctx.children[1])
+        scope = {arg: self._new_slot() for arg in args}
+        self.scopes.append(scope)
+        self.captures.append(set())
+        body_fn = self.visit(ctx.children[3])
+        captured = self.captures.pop()
+        self.scopes.pop()
+        lambda_info = LambdaInfo(
+            len(self.lambdas),
+            scope[args[0]],
+            body_fn,
+            frozenset(captured - set(scope.values())),
+            _is_heavy(ctx.children[3]),
+        )
+        self.lambdas.append(lambda_info)
+        return args, lambda_info
+
+    def _pipeline(self, ctx: QueryLanguageParser.ExprContext) -> CompiledElements:
+        """
+        Compiles expression which is iterated by map or filter. Nested map,
+        filter and range are fused into one lazy pass without materializing
+        intermediate lists, closure returns elements and their common type if
+        it is known
+        """
+        while True:
+            if isinstance(ctx, QueryLanguageParser.BraketsContext):
+                ctx = ctx.children[1]
+            elif isinstance(
+                ctx, (QueryLanguageParser.ExprContext, QueryLanguageParser.ValContext)
+            ):
+                ctx = ctx.children[0]
+            else:
+                break
+
+        if isinstance(ctx, QueryLanguageParser.MapContext):
+            return self._map_elements(ctx)
+        if isinstance(ctx, QueryLanguageParser.FilterContext):
+            return self._filter_elements(ctx)
+        if isinstance(
+            ctx, (QueryLanguageParser.ListContext, QueryLanguageParser.SetContext)
+        ) and isinstance(ctx.children[1], QueryLanguageParser.RangeContext):
+            start, end = self.visit(ctx.children[1])
+            int_type = IntType()
+            return lambda slots: (operations.range_elements(start, end), int_type)
+
+        statement = self.statement_count
+        container_fn = self.visit(ctx)
+
+        def elements(slots: Slots) -> tuple[operations.Elements, typing.Optional[Type]]:
+            container_expr = container_fn(slots)
+            operations.check_container(statement, container_expr)
+            return (
+                operations.container_elements(container_expr),
+                container_expr.type.elem,
+            )
+
+        return elements
+
+    def _map_elements(self, ctx: QueryLanguageParser.MapContext) -> CompiledElements:
+        statement = self.statement_count
+        source_fn = self._pipeline(ctx.children[3])
+        args, lambda_info = self._compile_lambda(ctx.children[1])
+        arg_slot, body_fn = lambda_info.arg_slot, lambda_info.body_fn
+        program_source = self.source
+
+        def map_elements(slots: Slots):
+            source, _ = source_fn(slots)
+            operations.check_lambda_args(statement, args)
+            context = slots[CONTEXT_SLOT]
+            if context.is_parallel(lambda_info, program_source):
+                source = list(source)
+                if len(source) > 1:
+                    return (
+                        context.apply(program_source, lambda_info, slots, source),
+                        None,
+                    )
+
+            def function(arg: Expression) -> Expression:
+                slots[arg_slot] = arg
+                return body_fn(slots)
+
+            return operations.map_elements(source, function), None
+
+        return map_elements
+
+    def _filter_elements(
+        self, ctx: QueryLanguageParser.FilterContext
+    ) -> CompiledElements:
+        statement = self.statement_count
+        source_fn = self._pipeline(ctx.children[3])
+        args, lambda_info = self._compile_lambda(ctx.children[1])
+        arg_slot, body_fn = lambda_info.arg_slot, lambda_info.body_fn
+        program_source = self.source
+
+        def filter_elements(slots: Slots):
+            source, elem = source_fn(slots)
+            operations.check_lambda_args(statement, args)
+            context = slots[CONTEXT_SLOT]
+            if context.is_parallel(lambda_info, program_source):
+                source = list(source)
+                if len(source) > 1:
+                    decisions = zip(
+                        source,
+                        context.apply(program_source, lambda_info, slots, source),
+                    )
+                    return operations.select_elements(statement, decisions), elem
+
+            def predicate(arg: Expression) -> Expression:
+                slots[arg_slot] = arg
+                return body_fn(slots)
+
+            return operations.filter_elements(statement, source, predicate), elem
+
+        return filter_elements
+
+    def _collected(self, elements_fn: CompiledElements) -> CompiledExpression:
+        def collected(slots: Slots) -> Expression:
+            return operations.collect_list(*elements_fn(slots))
+
+        return collected
+
+    def visitMap(self, ctx: QueryLanguageParser.MapContext):
+        return self._collected(self._map_elements(ctx))
+
+    def visitFilter(self, ctx: QueryLanguageParser.FilterContext):
+        return self._collected(self._filter_elements(ctx))
+
+    def visitLoad(self, ctx: QueryLanguageParser.LoadContext):
+        return self._unary(operations.load, self.visit(ctx.children[1]))
+
+    def visitIntersect(self, ctx: QueryLanguageParser.IntersectContext):
+        return self._binary(
+            operations.intersect,
+            self.visit(ctx.children[1]),
+            self.visit(ctx.children[3]),
+        )
+
+    def visitConcat(self, ctx: QueryLanguageParser.ConcatContext):
+        return self._binary(
+            operations.concat,
+            self.visit(ctx.children[1]),
+            self.visit(ctx.children[3]),
+        )
+
+    def visitUnion(self, ctx: QueryLanguageParser.UnionContext):
+        return self._binary(
+            operations.union,
+            self.visit(ctx.children[1]),
+            self.visit(ctx.children[3]),
+        )
+
+    def visitStar(self, ctx: QueryLanguageParser.StarContext):
+        return self._unary(operations.star, self.visit(ctx.children[1]))
+
+    def visitSmb(self, ctx: QueryLanguageParser.SmbContext):
+        expr_fn = self.visit(ctx.children[1])
+        if expr_fn in self.constants:
+            # Automata of constant label is built once, operations never mutate it
+            try:
+                return self._constant(
+                    operations.smb(self.statement_count, self.constants[expr_fn])
+                )
+            except TypesException:
+                pass
+        return self._unary(operations.smb, expr_fn)
+
+    def visitIn(self, ctx: QueryLanguageParser.InContext):
+        return self._binary(
+            operations.contains,
+            self.visit(ctx.children[1]),
+            self.visit(ctx.children[3]),
+        )
+
+    def visitListElement(self, ctx: QueryLanguageParser.ListElementContext):
+        return self._binary(
+            operations.list_element,
+            self.visit(ctx.children[1]),
+            self.visit(ctx.children[3]),
+        )
+
+    def _container(
+        self,
+        ctx: typing.Union[
+            QueryLanguageParser.ListContext, QueryLanguageParser.SetContext
+        ],
+        make: typing.Callable[[typing.Sequence[Expression]], Expression],
+        make_range: typing.Callable[[int, int], Expression],
+    ) -> CompiledExpression:
+        if len(ctx.children) == 1:
+            return self._lazy_constant(lambda: make([]))
+        if isinstance(ctx.children[1], QueryLanguageParser.RangeContext):
+            start, end = self.visit(ctx.children[1])
+            return self._lazy_constant(lambda: make_range(start, end))
+        element_fns = self.visit(ctx.children[1])
+        if all(element_fn in self.constants for element_fn in element_fns):
+            elements = [self.constants[element_fn] for element_fn in element_fns]
+            return self._lazy_constant(lambda: make(elements))
+
+        def container(slots: Slots) -> Expression:
+            return make([element_fn(slots) for element_fn in element_fns])
+
+        return container
+
+    def visitList(self, ctx: QueryLanguageParser.ListContext):
+        return self._container(ctx, operations.make_list, operations.make_range_list)
+
+    def visitSet(self, ctx: QueryLanguageParser.SetContext):
+        return self._container(ctx, operations.make_set, operations.make_range_set)
+
+    def visitElements(self, ctx: QueryLanguageParser.ElementsContext):
+        element_fn = self.visit(ctx.children[0])
+        if len(ctx.children) > 2:
+            return [element_fn] + self.visit(ctx.children[2])
+        return [element_fn]
+
+    def visitRange(self, ctx: QueryLanguageParser.RangeContext):
+        return int(ctx.children[0].getText()), int(ctx.children[2].getText())
+
+    def visitLambdaArgs(self, ctx: QueryLanguageParser.LambdaArgsContext):
+        arg_name = ctx.children[0].getText()
+        if len(ctx.children) > 2:
+            return [arg_name] + self.visit(ctx.children[2])
+        return [arg_name]
+
+
+# Operations which dominate the cost of lambda body if they are present
+HEAVY_CONTEXTS = (
+    QueryLanguageParser.GetReachableContext,
+    QueryLanguageParser.IntersectContext,
+    QueryLanguageParser.LoadContext,
+)
+
+
+def _is_heavy(ctx: ParserRuleContext) -> bool:
+    if isinstance(ctx, HEAVY_CONTEXTS):
+        return True
+    return any(
+        _is_heavy(child)
+        for child in ctx.getChildren()
+        if isinstance(child, ParserRuleContext)
+    )
+
+
+def compile_program(
+    tree: QueryLanguageParser.ProgContext, source: typing.Optional[str] = None
+) -> CompiledProgram:
+    """
+    Compiles parsing tree of query language program
+
+    Parameters
+    ----------
+    tree :
+        Parsing tree of the whole program
+    source :
+        Text of the program, required for parallel evaluation of lambdas
+
+    Returns
+    ----------
+    program :
+        Program which can be executed many times without tree walking
+    """
+    return Compiler(source).compile(tree)
@@ -0,0 +1,36 @@
+class InterpretException(Exception):
+    """
+    Base exception for interpretation
+    """
+
+    def __init__(self, statement, msg):
+        super().__init__(statement, msg)
+        self.statement = statement
+        self.msg = msg
+
+    def __str__(self):
+        return f"Statement - {self.statement}: {self.msg}"
+
+
+class UnknownVariable(InterpretException):
+    """
+    Exception for undefined variable usage
+    """
+
+    pass
+
+
+class TypesException(InterpretException):
+    pass
+
+
+class BudgetException(InterpretException):
+    """
+    Exception for statement which exceeded its time or memory limit or was
+    cancelled, statistics are the partial statistics of the interrupted engine
+    """
+
+    def __init__(self, statement, msg, statistics=None):
+        super().__init__(statement, msg)
+        self.args = (statement, msg, statistics)
+        self.statistics = statistics if statistics is not None else {}
@@ -0,0 +1,206 @@
+"""
+Per run state of compiled programs and parallel evaluation of lambdas.
+
+Compiled closures are not picklable, so a worker process compiles the same
+program text itself (or takes it from its own program cache) and evaluates
+lambda bodies by their index in the program. Only lambda arguments and
+values of variables referenced by the lambda body are sent to the worker.
+
+Chunks carry the time left of the statement and its memory limit, workers
+evaluate them under their own budget. Cancellation tokens can not be sent
+with tasks, so the token of the run is given to workers when the pool starts
+"""
+import threading
+import typing
+from concurrent.futures import Executor
+
+from project import budget
+from project.budget import Budget
+from project.query_language.interpreter import printer
+from project.query_language.interpreter.expression import Expression
+
+CONTEXT_SLOT = 0
+
+_worker_token: typing.Optional[threading.Event] = None
+
+
+def initialize_worker(token: typing.Optional[threading.Event]):
+    """
+    Initializer of worker processes, the token must be a multiprocessing event
+    to be shared with the pool
+    """
+    global _worker_token
+    _worker_token = token
+
+
+class ExecutionContext:
+    """
+    State of one program run, it is stored in the reserved slot of variables
+    so compiled closures can reach it without extra arguments
+
+    Parameters
+    ----------
+    executor :
+        Process pool for lambda applications, lambdas are evaluated serially if None
+    workers :
+        Number of workers of the executor
+    always_parallel :
+        Evaluate every map and filter on the executor, by default only lambdas
+        with heavy automata operations in the body are evaluated in parallel
+    chunks_per_worker :
+        Number of chunks elements are split into per worker of the executor
+    time_limit :
+        Maximum time of every statement in seconds
+    memory_limit :
+        Maximum growth of resident memory during every statement in bytes
+    token :
+        Cancellation token of the run
+    output_format :
+        Format of output of print statements, one of printer.OUTPUT_FORMATS
+    """
+
+    def __init__(
+        self,
+        executor: typing.Optional[Executor] = None,
+        workers: int = 1,
+        always_parallel: bool = False,
+        chunks_per_worker: int = 4,
+        time_limit: typing.Optional[float] = None,
+        memory_limit: typing.Optional[int] = None,
+        token: typing.Optional[threading.Event] = None,
+        output_format: str = printer.REPR,
+    ):
+        self.executor = executor
+        self.workers = workers
+        self.always_parallel = always_parallel
+        self.chunks_per_worker = chunks_per_worker
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.token = token
+        self.output_format = output_format
+
+    @property
+    def is_limited(self) -> bool:
+        return (
+            self.time_limit is not None
+            or self.memory_limit is not None
+            or self.token is not None
+        )
+
+    def statement_budget(self) -> Budget:
+        return Budget(self.time_limit, self.memory_limit, self.token)
+
+    def is_parallel(self, lambda_info: "LambdaInfo", source: typing.Optional[str]):
+        return (
+            self.executor is not None
+            and source is not None
+            and (self.always_parallel or lambda_info.is_heavy)
+        )
+
+    def apply(
+        self,
+        source: str,
+        lambda_info: "LambdaInfo",
+        slots: list,
+        elements: list[Expression],
+    ) -> typing.Iterator[Expression]:
+        """
+        Evaluates lambda for every element on the executor and returns results
+        in the order of elements
+        """
+        chunk_size = max(1, len(elements) // (self.workers * self.chunks_per_worker))
+        captured = {
+            slot: slots[slot]
+            for slot in lambda_info.captured_slots
+            if slots[slot] is not None
+        }
+        limit = budget.current()
+        time_limit = None if limit is None else limit.remaining_time
+        memory_limit = None if limit is None else limit.memory_limit
+        chunks = [
+            (
+                source,
+                lambda_info.index,
+                captured,
+                elements[i : i + chunk_size],
+                time_limit,
+                memory_limit,
+            )
+            for i in range(0, len(elements), chunk_size)
+        ]
+        results = self.executor.map(apply_lambda_chunk, chunks)
+        return (result for chunk_results in results for result in chunk_results)
+
+
+class LambdaInfo:
+    """
+    Compiled lambda of a program
+
+    Parameters
+    ----------
+    index :
+        Index of lambda in the program
+    arg_slot :
+        Slot of lambda argument
+    body_fn :
+        Compiled body of lambda
+    captured_slots :
+        Slots of variables referenced by the body
+    is_heavy :
+        Whether the body contains expensive automata operations
+    """
+
+    def __init__(
+        self,
+        index: int,
+        arg_slot: int,
+        body_fn: typing.Callable,
+        captured_slots: frozenset[int],
+        is_heavy: bool,
+    ):
+        self.index = index
+        self.arg_slot = arg_slot
+        self.body_fn = body_fn
+        self.captured_slots = captured_slots
+        self.is_heavy = is_heavy
+
+
+def apply_lambda_chunk(
+    chunk: tuple[
+        str,
+        int,
+        dict[int, Expression],
+        list[Expression],
+        typing.Optional[float],
+        typing.Optional[int],
+    ]
+) -> list[Expression]:
+    """
+    Worker side of parallel map and filter, BudgetExceeded of the chunk is
+    raised in the process which applies the lambda
+    """
+    from project.query_language.interpreter.program_cache import (
+        default_program_cache,
+    )
+
+    source, index, captured, elements, time_limit, memory_limit = chunk
+    program = default_program_cache.get(source)
+    lambda_info = program.lambdas[index]
+    context = ExecutionContext(
+        time_limit=time_limit, memory_limit=memory_limit, token=_worker_token
+    )
+    slots = program.new_slots(context)
+    for slot, expr in captured.items():
+        slots[slot] = expr
+    results = []
+    if not context.is_limited:
+        for el in elements:
+            slots[lambda_info.arg_slot] = el
+            results.append(lambda_info.body_fn(slots))
+        return results
+    with budget.limited(context.statement_budget()) as limit:
+        for el in elements:
+            limit.check("lambda", elements=len(results))
+            slots[lambda_info.arg_slot] = el
+            results.append(lambda_info.body_fn(slots))
+    return results
@@ -0,0 +1,496 @@
+"""
+Evaluation plans of query language expressions for explain statements.
+
+The plan is built from the parsing tree without evaluation of the expression,
+only values of already declared variables and automata of smb of string
+literals are inspected, so sizes of results of operators are upper bounds
+"""
+import contextlib
+import math
+import os
+import time
+import typing
+from collections import Counter
+
+from project import instrumentation
+from project.query_language.grammar.QueryLanguageParser import QueryLanguageParser
+from project.query_language.grammar.QueryLanguageVisitor import QueryLanguageVisitor
+from project.query_language.interpreter import operations
+from project.query_language.interpreter.exceptions import InterpretException
+from project.query_language.interpreter.expression import Expression
+from project.query_language.interpreter.types import *
+
+
+class Estimate:
+    """
+    Known or estimated size of value of expression, None means unknown
+
+    Parameters
+    ----------
+    kind :
+        Name of type of value
+    states :
+        Number of states of automaton
+    transitions :
+        Number of transitions of automaton by label
+    starts, finals :
+        Numbers of start and final states of automaton
+    elements :
+        Number of elements of container
+    """
+
+    def __init__(
+        self,
+        kind: typing.Optional[str] = None,
+        states: typing.Optional[int] = None,
+        transitions: typing.Optional[dict[str, int]] = None,
+        starts: typing.Optional[int] = None,
+        finals: typing.Optional[int] = None,
+        elements: typing.Optional[int] = None,
+    ):
+        self.kind = kind
+        self.states = states
+        self.transitions = transitions
+        self.starts = starts
+        self.finals = finals
+        self.elements = elements
+
+    @classmethod
+    def of(cls, expr: Expression) -> "Estimate":
+        """
+        Returns exact size of evaluated expression
+        """
+        if isinstance(expr.type, FAType):
+            fa = expr.value
+            return cls(
+                "FA",
+                fa.number_of_states,
+                fa.number_of_transitions(),
+                len(fa.start_states),
+                len(fa.final_states),
+            )
+        if isinstance(expr.type, RSMType):
+            nfa = expr.value.nfa
+            return cls(
+                "RSM",
+                len(nfa.states),
+                dict(Counter(label.value for _, label, _ in nfa)),
+                len(nfa.start_states),
+                len(nfa.final_states),
+            )
+        if isinstance(expr.type, ContainerType):
+            kind = "Set" if isinstance(expr.type, SetType) else "List"
+            return cls(kind, elements=len(expr.value))
+        return cls(str(expr.type).removesuffix("Type"))
+
+    @property
+    def is_fa(self) -> bool:
+        return self.kind == "FA"
+
+    @property
+    def number_of_transitions(self) -> typing.Optional[int]:
+        if self.transitions is None:
+            return None
+        return sum(self.transitions.values())
+
+    def __str__(self):
+        parts = [self.kind or "?"]
+        for name, value in [
+            ("states", self.states),
+            ("transitions", self.number_of_transitions),
+            ("starts", self.starts),
+            ("finals", self.finals),
+            ("elements", self.elements),
+        ]:
+            if value is not None:
+                parts.append(f"{name} {value}")
+        return ", ".join(parts)
+
+
+class PlanNode:
+    """
+    Operator of evaluation plan
+
+    Parameters
+    ----------
+    operator :
+        Name of operator
+    estimate :
+        Size of the result of operator
+    children :
+        Plans of operands
+    algorithm :
+        Description of the way the operator is evaluated
+    """
+
+    def __init__(
+        self,
+        operator: str,
+        estimate: Estimate,
+        children: typing.Sequence["PlanNode"] = (),
+        algorithm: str = "",
+    ):
+        self.operator = operator
+        self.estimate = estimate
+        self.children = children
+        self.algorithm = algorithm
+
+    def lines(self, depth: int = 0) -> typing.Iterator[str]:
+        algorithm = f" [{self.algorithm}]" if self.algorithm else ""
+        yield f"{'  ' * depth}{self.operator}: {self.estimate}{algorithm}"
+        for child in self.children:
+            yield from child.lines(depth + 1)
+
+    def __str__(self):
+        return "\n".join(self.lines())
+
+
+def _product(first: typing.Optional[int], second: typing.Optional[int]):
+    if first is None or second is None:
+        return None
+    return first * second
+
+
+def _sum(*values: typing.Optional[int]):
+    if any(value is None for value in values):
+        return None
+    return sum(values)
+
+
+def _closure(states: typing.Optional[int]) -> str:
+    if states is None:
+        return "transitive closure of boolean matrix"
+    squarings = math.ceil(math.log2(states)) if states > 1 else 0
+    return f"transitive closure of {states}x{states} matrix, {squarings} squarings"
+
+
+class Planner(QueryLanguageVisitor):
+    """
+    Builds evaluation plan of expression
+
+    Parameters
+    ----------
+    lookup :
+        Returns value of variable, None if the variable is not declared yet
+    """
+
+    def __init__(self, lookup: typing.Callable[[str], typing.Optional[Expression]]):
+        self.lookup = lookup
+        self.lambda_args: list[set[str]] = []
+
+    def plan(self, ctx: QueryLanguageParser.ExprContext) -> PlanNode:
+        return self.visit(ctx)
+
+    def visitExpr(self, ctx: QueryLanguageParser.ExprContext):
+        return self.visit(ctx.children[0])
+
+    def visitVal(self, ctx: QueryLanguageParser.ValContext):
+        return self.visit(ctx.children[0])
+
+    def visitBrakets(self, ctx: QueryLanguageParser.BraketsContext):
+        return self.visit(ctx.children[1])
+
+    def visitName(self, ctx: QueryLanguageParser.NameContext):
+        name = ctx.getText()
+        if any(name in args for args in self.lambda_args):
+            return PlanNode(f"{name} (lambda argument)", Estimate())
+        value = self.lookup(name)
+        if value is None:
+            return PlanNode(f"{name} (undeclared variable)", Estimate())
+        return PlanNode(f"{name} (variable)", Estimate.of(value))
+
+    def visitStringVal(self, ctx: QueryLanguageParser.StringValContext):
+        return PlanNode(ctx.getText(), Estimate("String"))
+
+    def visitInteger(self, ctx: QueryLanguageParser.IntegerContext):
+        return PlanNode(ctx.getText(), Estimate("Int"))
+
+    def visitBool(self, ctx: QueryLanguageParser.BoolContext):
+        return PlanNode(ctx.getText(), Estimate("Bool"))
+
+    def _container(self, ctx, kind: str) -> PlanNode:
+        if len(ctx.children) == 1:
+            return PlanNode(kind.lower(), Estimate(kind, elements=0))
+        if isinstance(ctx.children[1], QueryLanguageParser.RangeContext):
+            start, end = ctx.children[1].children[0], ctx.children[1].children[2]
+            elements = max(int(end.getText()) - int(start.getText()), 0)
+            return PlanNode(f"{kind.lower()} range", Estimate(kind, elements=elements))
+        children = []
+        elements = ctx.children[1]
+        while True:
+            children.append(self.visit(elements.children[0]))
+            if len(elements.children) < 3:
+                break
+            elements = elements.children[2]
+        return PlanNode(kind.lower(), Estimate(kind, elements=len(children)), children)
+
+    def visitList(self, ctx: QueryLanguageParser.ListContext):
+        return self._container(ctx, "List")
+
+    def visitSet(self, ctx: QueryLanguageParser.SetContext):
+        return self._container(ctx, "Set")
+
+    def _states_operator(self, ctx, operator: str, update: typing.Callable):
+        automaton = self.visit(ctx.children[1])
+        states = self.visit(ctx.children[3])
+        source = automaton.estimate
+        estimate = Estimate(
+            source.kind, source.states, source.transitions, source.starts, source.finals
+        )
+        update(estimate, states.estimate)
+        return PlanNode(operator, estimate, [automaton, states])
+
+    def visitSetStart(self, ctx: QueryLanguageParser.SetStartContext):
+        def update(estimate, states):
+            estimate.starts = states.elements
+
+        return self._states_operator(ctx, "setStart", update)
+
+    def visitSetFinal(self, ctx: QueryLanguageParser.SetFinalContext):
+        def update(estimate, states):
+            estimate.finals = states.elements
+
+        return self._states_operator(ctx, "setFinal", update)
+
+    def visitAddStart(self, ctx: QueryLanguageParser.AddStartContext):
+        def update(estimate, state):
+            estimate.starts = _sum(estimate.starts, 1)
+
+        return self._states_operator(ctx, "addStart", update)
+
+    def visitAddFinal(self, ctx: QueryLanguageParser.AddFinalContext):
+        def update(estimate, state):
+            estimate.finals = _sum(estimate.finals, 1)
+
+        return self._states_operator(ctx, "addFinal", update)
+
+    def _automaton_property(self, ctx, operator: str, elements) -> PlanNode:
+        automaton = self.visit(ctx.children[1])
+        return PlanNode(
+            operator,
+            Estimate("Set", elements=elements(automaton.estimate)),
+            [automaton],
+        )
+
+    def visitGetStart(self, ctx: QueryLanguageParser.GetStartContext):
+        return self._automaton_property(ctx, "getStart", lambda fa: fa.starts)
+
+    def visitGetFinal(self, ctx: QueryLanguageParser.GetFinalContext):
+        return self._automaton_property(ctx, "getFinal", lambda fa: fa.finals)
+
+    def visitGetVertices(self, ctx: QueryLanguageParser.GetVerticesContext):
+        return self._automaton_property(ctx, "getVertices", lambda fa: fa.states)
+
+    def visitGetEdges(self, ctx: QueryLanguageParser.GetEdgesContext):
+        return self._automaton_property(
+            ctx, "getEdges", lambda fa: fa.number_of_transitions
+        )
+
+    def visitGetLabels(self, ctx: QueryLanguageParser.GetLabelsContext):
+        def labels(fa: Estimate):
+            return None if fa.transitions is None else len(fa.transitions)
+
+        return self._automaton_property(ctx, "getLabels", labels)
+
+    def _intersection(self, first: Estimate, second: Estimate) -> Estimate:
+        transitions = None
+        if first.transitions is not None and second.transitions is not None:
+            transitions = {
+                label: count * second.transitions[label]
+                for label, count in first.transitions.items()
+                if label in second.transitions
+            }
+        return Estimate(
+            "FA",
+            _product(first.states, second.states),
+            transitions,
+            _product(first.starts, second.starts),
+            _product(first.finals, second.finals),
+        )
+
+    def visitGetReachable(self, ctx: QueryLanguageParser.GetReachableContext):
+        children = [self.visit(ctx.children[1])]
+        if len(ctx.children) == 4:
+            children.append(self.visit(ctx.children[3]))
+        estimates = [child.estimate for child in children]
+        if not all(estimate.is_fa for estimate in estimates):
+            return PlanNode(
+                "getReachable",
+                Estimate("Set"),
+                children,
+                "tensor RPQ, CFPQ of RSM operands is not supported",
+            )
+        if len(estimates) == 2:
+            automaton = self._intersection(estimates[1], estimates[0])
+            algorithm = "tensor RPQ: Kronecker product of query and graph, "
+        else:
+            automaton = estimates[0]
+            algorithm = "tensor RPQ: "
+        pairs = _product(automaton.starts, automaton.finals)
+        return PlanNode(
+            "getReachable",
+            Estimate("Set", elements=pairs),
+            children,
+            algorithm + _closure(automaton.states),
+        )
+
+    def _lambda(self, ctx, operator: str) -> PlanNode:
+        container = self.visit(ctx.children[3])
+        lambda_ctx = ctx.children[1]
+        self.lambda_args.append(_lambda_args(lambda_ctx))
+        body = self.visit(lambda_ctx.children[3])
+        self.lambda_args.pop()
+        elements = container.estimate.elements
+        return PlanNode(
+            operator,
+            Estimate(container.estimate.kind, elements=elements),
+            [container, body],
+            f"lambda is evaluated for each of {'?' if elements is None else elements}"
+            " elements",
+        )
+
+    def visitMap(self, ctx: QueryLanguageParser.MapContext):
+        return self._lambda(ctx, "map")
+
+    def visitFilter(self, ctx: QueryLanguageParser.FilterContext):
+        return self._lambda(ctx, "filter")
+
+    def visitLoad(self, ctx: QueryLanguageParser.LoadContext):
+        path = ctx.children[1].getText().strip('"')
+        try:
+            size = f"{os.path.getsize(path)} bytes"
+        except OSError:
+            size = "file not found"
+        return PlanNode(
+            f"load {path}", Estimate("FA"), algorithm=f"streaming DOT reader, {size}"
+        )
+
+    def visitIntersect(self, ctx: QueryLanguageParser.IntersectContext):
+        left, right = self.visit(ctx.children[1]), self.visit(ctx.children[3])
+        if left.estimate.is_fa and right.estimate.is_fa:
+            return PlanNode(
+                "intersect",
+                self._intersection(left.estimate, right.estimate),
+                [left, right],
+                "Kronecker product of boolean decompositions",
+            )
+        elements = None
+        if left.estimate.elements is not None and right.estimate.elements is not None:
+            elements = min(left.estimate.elements, right.estimate.elements)
+        return PlanNode(
+            "intersect", Estimate(left.estimate.kind, elements=elements), [left, right]
+        )
+
+    def _automata_operator(self, ctx, operator: str, algorithm: str) -> PlanNode:
+        left, right = self.visit(ctx.children[1]), self.visit(ctx.children[3])
+        first, second = left.estimate, right.estimate
+        if first.kind in ("FA", "RSM") and second.kind in ("FA", "RSM"):
+            kind = "RSM" if "RSM" in (first.kind, second.kind) else "FA"
+            estimate = Estimate(kind, _sum(first.states, second.states))
+        else:
+            estimate = Estimate(
+                first.kind, elements=_sum(first.elements, second.elements)
+            )
+            algorithm = ""
+        return PlanNode(operator, estimate, [left, right], algorithm)
+
+    def visitConcat(self, ctx: QueryLanguageParser.ConcatContext):
+        return self._automata_operator(ctx, "concat", "epsilon transitions")
+
+    def visitUnion(self, ctx: QueryLanguageParser.UnionContext):
+        return self._automata_operator(ctx, "union", "minimized after union")
+
+    def visitStar(self, ctx: QueryLanguageParser.StarContext):
+        automaton = self.visit(ctx.children[1])
+        estimate = Estimate(automaton.estimate.kind, _sum(automaton.estimate.states, 1))
+        return PlanNode("star", estimate, [automaton])
+
+    def visitSmb(self, ctx: QueryLanguageParser.SmbContext):
+        child = ctx.children[1].children[0]
+        if isinstance(child, QueryLanguageParser.ValContext) and isinstance(
+            child.children[0], QueryLanguageParser.StringValContext
+        ):
+            label = child.children[0]
+            text = "" if len(label.children) == 1 else label.children[1].getText()
+            try:
+                estimate = Estimate.of(operations.smb(0, operations.string_value(text)))
+            except InterpretException:
+                # The statement reports the error when it is evaluated
+                estimate = Estimate("FA")
+            return PlanNode(f"smb {label.getText()}", estimate)
+        operand = self.visit(ctx.children[1])
+        return PlanNode("smb", Estimate("FA"), [operand], "regex of runtime string")
+
+    def visitIn(self, ctx: QueryLanguageParser.InContext):
+        children = [self.visit(ctx.children[1]), self.visit(ctx.children[3])]
+        return PlanNode("in", Estimate("Bool"), children)
+
+    def visitListElement(self, ctx: QueryLanguageParser.ListElementContext):
+        children = [self.visit(ctx.children[1]), self.visit(ctx.children[3])]
+        return PlanNode("listElement", Estimate(), children)
+
+
+def _lambda_args(ctx: QueryLanguageParser.LambdaContext) -> set[str]:
+    return {arg.strip() for arg in ctx.children[1].getText().split(",")}
+
+
+def free_names(ctx) -> set[str]:
+    """
+    Returns names of variables used in expression, except lambda arguments
+    """
+    if isinstance(ctx, QueryLanguageParser.NameContext):
+        return {ctx.getText()}
+    if isinstance(ctx, QueryLanguageParser.LambdaContext):
+        return free_names(ctx.children[3]) - _lambda_args(ctx)
+    names = set()
+    for child in getattr(ctx, "children", None) or ():
+        names |= free_names(child)
+    return names
+
+
+def write_plan(file, plan: PlanNode):
+    file.write(f"{plan}\n")
+
+
+def is_analyze(ctx: QueryLanguageParser.ExplainContext) -> bool:
+    return ctx.children[0].getText() == "explain analyze "
+
+
+def analyze(file, plan: PlanNode, evaluate: typing.Callable[[], Expression]):
+    """
+    Evaluates expression and writes plan and actual costs of evaluation: time
+    of engine operators, iterations and nnz growth
+    """
+    # Measurements go to the installed collector, e.g. of profiler, and only
+    # the ones of this expression are written
+    outer = instrumentation.current()
+    if outer is None:
+        collecting = instrumentation.collect()
+    else:
+        collecting = contextlib.nullcontext(outer)
+    with collecting as collector:
+        timers_before = {name: len(times) for name, times in collector.timers.items()}
+        counters_before = dict(collector.counters)
+        values_before = {name: len(series) for name, series in collector.values.items()}
+        start = time.perf_counter()
+        expr = evaluate()
+        seconds = time.perf_counter() - start
+    write_plan(file, plan)
+    file.write(f"actual: {Estimate.of(expr)}, {seconds:.6f} s\n")
+    for name, times in collector.timers.items():
+        times = times[timers_before.get(name, 0) :]
+        if times:
+            file.write(f"  {name}: {len(times)} calls, {sum(times):.6f} s\n")
+    for name, count in collector.counters.items():
+        count -= counters_before.get(name, 0)
+        if count:
+            file.write(f"  {name}: {count}\n")
+    for name, values in collector.values.items():
+        values = values[values_before.get(name, 0) :]
+        if not values:
+            continue
+        if name.endswith(".nnz"):
+            growth = " -> ".join(str(value) for value in values)
+            file.write(f"  {name}: {growth}\n")
+        else:
+            file.write(f"  {name}: max {max(values)}, {len(values)} values\n")
@@ -0,0 +1,14 @@
+import typing
+
+from project.query_language.interpreter.types import Type
+
+
+class Expression:
+    def __init__(self, value: typing.Any, expr_type: Type):
+        self.value = value
+        self.type = expr_type
+
+    def __str__(self):
+        # if isinstance(self.type, SetType):
+        #     return '{' + str(self.value)[1: -1] + '}'
+        return str(self.value)
@@ -1,59 +1,25 @@
 import sys
 import typing
 
-from project.automata import *
-from project.graph_utils import load_graph_from_dot
+from project.automata import RFA
 from project.query_language.grammar.QueryLanguageParser import QueryLanguageParser
 from project.query_language.grammar.QueryLanguageVisitor import QueryLanguageVisitor
-from project.query_language.interpreter.types import *
-from project.rpq.all_pairs import (
-    finite_automata_intersection,
-    get_reachable_by_intersection_pairs,
-    regular_query_fa,
+from project.query_language.interpreter import explain, operations, printer
+from project.query_language.interpreter.exceptions import (
+    InterpretException,
+    UnknownVariable,
+    TypesException,
 )
-
-
-class InterpretException(Exception):
-    """
-    Base exception for interpretation
-    """
-
-    def __init__(self, statement, msg):
-        self.statement = statement
-        self.msg = msg
-
-    def __str__(self):
-        return f"Statement - {self.statement}: {self.msg}"
-
-
-class UnknownVariable(InterpretException):
-    """
-    Exception for undefined variable usage
-    """
-
-    pass
-
-
-class TypesException(InterpretException):
-    pass
-
-
-class Expression:
-    def __init__(self, value: typing.Any, expr_type: Type):
-        self.value = value
-        self.type = expr_type
-
-    def __str__(self):
-        # if isinstance(self.type, SetType):
-        #     return '{' + str(self.value)[1: -1] + '}'
-        return str(self.value)
+from project.query_language.interpreter.expression import Expression
+from project.query_language.interpreter.types import *
 
 
 class InterpretVisitor(QueryLanguageVisitor):
-    def __init__(self, file=sys.stdout):
+    def __init__(self, file=sys.stdout, output_format: str = printer.REPR):
         self.frames = []
         self.cur_frame: dict[str, Expression] = {}
         self.file = file
+        self.output_format = output_format
         self.statement_count = 0
 
     def _get_value(self, name: str) -> typing.Optional[Expression]:
@@ -99,10 +65,16 @@ class InterpretVisitor(QueryLanguageVisitor):
 
     def visitPrint(self, ctx: QueryLanguageParser.PrintContext):
         expr = self.visit(ctx.children[1])
-        if isinstance(expr.type, AutomataType):
-            self.file.write(str(expr.type) + "\n")
+        operations.write_expression(self.file, expr, self.output_format)
+        return self.defaultResult()
+
+    def visitExplain(self, ctx: QueryLanguageParser.ExplainContext):
+        expr_ctx = ctx.children[1]
+        plan = explain.Planner(self._get_value).plan(expr_ctx)
+        if explain.is_analyze(ctx):
+            explain.analyze(self.file, plan, lambda: self.visit(expr_ctx))
         else:
-            self.file.write(str(expr) + "\n")
+            explain.write_plan(self.file, plan)
         return self.defaultResult()
 
     def visitBrakets(self, ctx: QueryLanguageParser.BraketsContext):
@@ -117,326 +89,145 @@ class InterpretVisitor(QueryLanguageVisitor):
 
     def visitStringVal(self, ctx: QueryLanguageParser.StringValContext):
         if len(ctx.children) == 1:
-            return Expression("", StringType())
-        return Expression(ctx.children[1].getText(), StringType())
+            return operations.string_value("")
+        return operations.string_value(ctx.children[1].getText())
 
     def visitInteger(self, ctx: QueryLanguageParser.IntegerContext):
-        return Expression(int(ctx.getText()), IntType())
+        return operations.int_value(int(ctx.getText()))
 
     def visitBool(self, ctx: QueryLanguageParser.BoolContext):
-        return Expression(ctx.getText() == str(True), BoolType())
+        return operations.bool_value(ctx.getText() == str(True))
 
     def visitSetStart(self, ctx: QueryLanguageParser.SetStartContext):
         starts_expr = self.visit(ctx.children[3])
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        if isinstance(starts_expr.type, SetType):
-            new_fa: EpsilonNFA = expr.value.copy()
-            new_fa.start_states.clear()
-            for state in starts_expr.value:
-                new_fa.add_start_state(state)
-            return Expression(new_fa, expr.type)
-        raise TypesException(
-            self.statement_count, "States can't defined as {starts_expr.type}"
-        )
+        return operations.set_start(self.statement_count, expr, starts_expr)
 
     def visitSetFinal(self, ctx: QueryLanguageParser.SetFinalContext):
         finals_expr = self.visit(ctx.children[3])
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        if isinstance(finals_expr.type, SetType):
-            new_fa: EpsilonNFA = expr.value.copy()
-            new_fa.final_states.clear()
-            for state in finals_expr.value:
-                new_fa.add_final_state(state)
-            return Expression(new_fa, expr.type)
-        # if finals_expr.type == SetType(
-        #     tuple([ListType([IntType(), SetType([StringType])])])
-        # ):
-        #     return Expression(expr.value.set, RSMType())
-        raise TypesException(
-            self.statement_count, "States can't defined as {finals_expr.type}"
-        )
+        return operations.set_final(self.statement_count, expr, finals_expr)
 
     def visitAddStart(self, ctx: QueryLanguageParser.AddStartContext):
         start_expr = self.visit(ctx.children[3])
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        new_fa: EpsilonNFA = expr.value.copy()
-        new_fa.add_start_state(start_expr.value)
-        return Expression(new_fa, expr.type)
-        # if start_expr.type == ListType([IntType(), SetType([StringType])]):
-        #     return Expression(expr.value.set, RSMType())
-        # raise Exception(
-        #     f"Statement - {self.statement_count}: States can't defined as {start_expr.type}"
-        # )
+        return operations.add_start(self.statement_count, expr, start_expr)
 
     def visitAddFinal(self, ctx: QueryLanguageParser.AddFinalContext):
         final_expr = self.visit(ctx.children[3])
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        # if isinstance(final_expr.type, IntType):
-        new_fa: EpsilonNFA = expr.value.copy()
-        new_fa.add_final_state(final_expr.value)
-        return Expression(new_fa, expr.type)
-        # if final_expr.type == ListType([IntType(), SetType([StringType])]):
-        #     return Expression(expr.value.set, RSMType())
-        # raise Exception(
-        #     f"Statement - {self.statement_count}: States can't defined as {final_expr.type}"
-        # )
+        return operations.add_final(self.statement_count, expr, final_expr)
 
     def visitGetStart(self, ctx: QueryLanguageParser.GetStartContext):
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        return Expression(
-            tuple([el.value for el in expr.value.start_states]), SetType()
-        )
+        return operations.get_start(self.statement_count, expr)
 
     def visitGetFinal(self, ctx: QueryLanguageParser.GetFinalContext):
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        return Expression(
-            tuple([el.value for el in expr.value.final_states]), SetType()
-        )
+        return operations.get_final(self.statement_count, expr)
 
     def visitGetReachable(self, ctx: QueryLanguageParser.GetReachableContext):
         expr = self.visit(ctx.children[1])
         if len(ctx.children) == 4:
             query_expr = self.visit(ctx.children[3])
-            self._check_automata_operation(expr)
-            self._check_automata_operation(query_expr)
-            return Expression(
-                tuple(set(regular_query_fa(query_expr.value, expr.value))),
-                SetType(),
-            )
-        self._check_automata_operation(expr)
-        return Expression(
-            tuple(set(get_reachable_by_intersection_pairs(expr.value))),
-            SetType(),
-        )
-
-    def _check_automata_operation(self, expr: Expression):
-        if not isinstance(expr.type, AutomataType):
-            raise TypesException(
-                self.statement_count, "Can't apply automata operation to non automata"
-            )
+            return operations.get_reachable(self.statement_count, expr, query_expr)
+        return operations.get_reachable(self.statement_count, expr)
 
     def visitGetVertices(self, ctx: QueryLanguageParser.GetVerticesContext):
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        return Expression(tuple([el.value for el in expr.value.states]), SetType())
+        return operations.get_vertices(self.statement_count, expr)
 
     def visitGetEdges(self, ctx: QueryLanguageParser.GetEdgesContext):
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        return Expression(
-            tuple(set([(v.value, label.value, u.value) for v, label, u in expr.value])),
-            SetType(),
-        )
+        return operations.get_edges(self.statement_count, expr)
 
     def visitGetLabels(self, ctx: QueryLanguageParser.GetLabelsContext):
         expr = self.visit(ctx.children[1])
-        self._check_automata_operation(expr)
-        return Expression(
-            tuple(map(lambda sym: sym.value, expr.value.symbols)),
-            SetType(),
-        )
+        return operations.get_labels(self.statement_count, expr)
 
     def visitMap(self, ctx: QueryLanguageParser.MapContext):
         container_expr = self.visit(ctx.children[3])
-        if not isinstance(container_expr.type, ContainerType):
-            raise TypesException(
-                self.statement_count, "Can't map lambda to {container_expr.type}"
-            )
+        operations.check_container(self.statement_count, container_expr)
         lambda_func = self.visit(ctx.children[1])
-        if len(lambda_func.args) != 1:
-            raise InterpretException(
-                self.statement_count, "Wrong number of parameters in lambda"
-            )
+        operations.check_lambda_args(self.statement_count, lambda_func.args)
         self._enter_frame()
-        result = []
-        for el, el_type in zip(container_expr.value, container_expr.type.params):
-            self._set_value(lambda_func.args[0], Expression(el, el_type))
-            result.append(self.visit(lambda_func.expr_ctx))
-        self._exit_frame()
-        return Expression(
-            tuple([el.value for el in result]),
-            ListType(tuple([el.type for el in result])),
+        result = operations.map_container(
+            container_expr, self._lambda_function(lambda_func)
         )
+        self._exit_frame()
+        return result
 
     def visitFilter(self, ctx: QueryLanguageParser.FilterContext):
         container_expr = self.visit(ctx.children[3])
-        if not isinstance(container_expr.type, ContainerType):
-            raise TypesException(
-                self.statement_count, f"Can't map lambda to {container_expr.type}"
-            )
+        operations.check_container(self.statement_count, container_expr)
         lambda_func = self.visit(ctx.children[1])
-        if len(lambda_func.args) != 1:
-            raise InterpretException(
-                self.statement_count, f"Wrong number of parameters in lambda"
-            )
+        operations.check_lambda_args(self.statement_count, lambda_func.args)
         self._enter_frame()
-        result = []
-        result_types = []
-        for el, el_type in zip(container_expr.value, container_expr.type.params):
-            self._set_value(lambda_func.args[0], Expression(el, el_type))
-            is_accepted = self.visit(lambda_func.expr_ctx)
-            if not isinstance(is_accepted.type, BoolType):
-                raise InterpretException(
-                    self.statement_count,
-                    f"Filter accepts lambda which returns bool value",
-                )
-            if is_accepted.value:
-                result.append(el)
-                result_types.append(el_type)
+        result = operations.filter_container(
+            self.statement_count, container_expr, self._lambda_function(lambda_func)
+        )
         self._exit_frame()
-        return Expression(tuple(result), ListType(tuple(result_types)))
+        return result
+
+    def _lambda_function(
+        self, lambda_func: "Lambda"
+    ) -> typing.Callable[[Expression], Expression]:
+        def function(arg: Expression) -> Expression:
+            self._set_value(lambda_func.args[0], arg)
+            return self.visit(lambda_func.expr_ctx)
+
+        return function
 
     def visitLoad(self, ctx: QueryLanguageParser.LoadContext):
         path_expr = self.visit(ctx.children[1])
-        try:
-            graph = load_graph_from_dot(path_expr.value)
-            fa = get_nondeterministic_automata_from_graph(graph)
-        except Exception:
-            raise InterpretException(self.statement_count, "Can't load graph")
-        return Expression(fa, FAType())
+        return operations.load(self.statement_count, path_expr)
 
     def visitIntersect(self, ctx: QueryLanguageParser.IntersectContext):
         left = self.visit(ctx.children[1])
         right = self.visit(ctx.children[3])
-        if isinstance(left.type, SetType) and isinstance(right.type, SetType):
-            types = dict(
-                list(zip(left.value, left.type.params))
-                + list(zip(right.value, right.type.params))
-            )
-            result = tuple(set(left.value).intersection(set(right.value)))
-            return Expression(result, SetType([types[el] for el in result]))
-        if isinstance(left.type, FAType) and isinstance(right.type, FAType):
-            return Expression(
-                finite_automata_intersection(left.value, right.value), FAType()
-            )
-        if isinstance(left.type, RSMType) and isinstance(right.type, RSMType):
-            raise InterpretException(
-                self.statement_count, f"Intersections for RSM is not supported"
-            )
-        if isinstance(left.type, RSMType) or isinstance(right.type, RSMType):
-            raise InterpretException(
-                self.statement_count, f"Intersections for RSM is not implemented"
-            )
-        raise TypesException(
-            self.statement_count, f"Intersection possible only for automata and set"
-        )
+        return operations.intersect(self.statement_count, left, right)
 
     def visitConcat(self, ctx: QueryLanguageParser.ConcatContext):
         left = self.visit(ctx.children[1])
         right = self.visit(ctx.children[3])
-        if isinstance(left.type, ListType) and isinstance(right.type, ListType):
-            result = list(zip(left.value, left.type.params)) + list(
-                zip(right.value, right.type.params)
-            )
-            return Expression(
-                tuple([val for val, _ in result]),
-                ListType([type_ for _, type_ in result]),
-            )
-        if not (
-            isinstance(left.type, AutomataType) and isinstance(right.type, AutomataType)
-        ):
-            raise TypesException(
-                self.statement_count, f"Concat possible only for automatas or lists"
-            )
-        result_type = (
-            RSMType()
-            if isinstance(left.type, RSMType) or isinstance(right.type, RSMType)
-            else FAType()
-        )
-        return Expression(automatas_concat(left.value, right.value), result_type)
+        return operations.concat(self.statement_count, left, right)
 
     def visitUnion(self, ctx: QueryLanguageParser.UnionContext):
         left = self.visit(ctx.children[1])
         right = self.visit(ctx.children[3])
-        if isinstance(left.type, SetType) and isinstance(right.type, SetType):
-            types = dict(
-                list(zip(left.value, left.type.params))
-                + list(zip(right.value, right.type.params))
-            )
-            result = tuple(set(left.value + right.value))
-            return Expression(result, SetType([types[el] for el in result]))
-        if not (
-            isinstance(left.type, AutomataType) and isinstance(right.type, AutomataType)
-        ):
-            raise TypesException(
-                self.statement_count, f"Union possible only for automatas or sets"
-            )
-        result_type = (
-            RSMType()
-            if isinstance(left.type, RSMType) or isinstance(right.type, RSMType)
-            else FAType()
-        )
-        return Expression(automatas_union(left.value, right.value), result_type)
+        return operations.union(self.statement_count, left, right)
 
     def visitStar(self, ctx: QueryLanguageParser.StarContext):
         automata_expr = self.visit(ctx.children[1])
-        if isinstance(automata_expr.type, AutomataType):
-            return Expression(automata_expr.value.kleene_star(), automata_expr.type)
-        raise TypesException(
-            self.statement_count, f"Can't apply kleene star to non automata"
-        )
+        return operations.star(self.statement_count, automata_expr)
 
     def visitSmb(self, ctx: QueryLanguageParser.SmbContext):
         expr = self.visit(ctx.children[1])
-        if expr.type != StringType():
-            raise TypesException(
-                self.statement_count, f"Automatas with non string labels are forbidden"
-            )
-        return Expression(Regex(expr.value).to_epsilon_nfa().minimize(), FAType())
+        return operations.smb(self.statement_count, expr)
 
     def visitIn(self, ctx: QueryLanguageParser.InContext):
         expr = self.visit(ctx.children[1])
         container_expr = self.visit(ctx.children[3])
-        if not isinstance(container_expr.type, ContainerType):
-            raise TypesException(
-                self.statement_count,
-                f"'in' operator works for containers not for {container_expr.type}",
-            )
-        return Expression(expr.value in container_expr.value, BoolType())
+        return operations.contains(self.statement_count, expr, container_expr)
 
     def visitListElement(self, ctx: QueryLanguageParser.ListElementContext):
-        listExpr = self.visit(ctx.children[1])
+        list_expr = self.visit(ctx.children[1])
         expr = self.visit(ctx.children[3])
-        if not isinstance(listExpr.type, ListType):
-            raise TypesException(
-                self.statement_count, f"{listExpr.type} is not subscriptable"
-            )
-        if not isinstance(expr.type, IntType):
-            raise TypesException(
-                self.statement_count, f"List indices must be integers, not {expr.type}"
-            )
-        return Expression(listExpr.value[expr.value], listExpr.type.params[expr.value])
+        return operations.list_element(self.statement_count, list_expr, expr)
 
     def visitList(self, ctx: QueryLanguageParser.ListContext):
         if len(ctx.children) == 1:
-            return Expression(tuple(), ListType([]))
-        elements = self.visit(ctx.children[1])
-        return Expression(
-            tuple(map(lambda el: el.value, elements)),
-            ListType([el.type for el in elements]),
-        )
+            return operations.make_list([])
+        if isinstance(ctx.children[1], QueryLanguageParser.RangeContext):
+            return operations.make_range_list(*self.visit(ctx.children[1]))
+        return operations.make_list(self.visit(ctx.children[1]))
 
     def visitSet(self, ctx: QueryLanguageParser.SetContext):
         if len(ctx.children) == 1:
-            return Expression(tuple(), SetType())
-        elements = set(self.visit(ctx.children[1]))
-        visited = set()
-        result = []
-        for el in elements:
-            if el.value not in visited:
-                result.append(el)
-                visited.add(el.value)
-        result = list(result)
-        return Expression(
-            tuple(map(lambda el: el.value, result)),
-            SetType(tuple([el.type for el in result])),
-        )
+            return operations.make_set([])
+        if isinstance(ctx.children[1], QueryLanguageParser.RangeContext):
+            return operations.make_range_set(*self.visit(ctx.children[1]))
+        return operations.make_set(self.visit(ctx.children[1]))
 
     def visitElements(self, ctx: QueryLanguageParser.ElementsContext):
         element_expr = self.visit(ctx.children[0])
@@ -445,12 +236,7 @@ class InterpretVisitor(QueryLanguageVisitor):
         return [element_expr]
 
     def visitRange(self, ctx: QueryLanguageParser.RangeContext):
-        return [
-            Expression(i, IntType())
-            for i in range(
-                int(ctx.children[0].getText()), int(ctx.children[2].getText())
-            )
-        ]
+        return int(ctx.children[0].getText()), int(ctx.children[2].getText())
 
     def visitLambdaArgs(self, ctx: QueryLanguageParser.LambdaArgsContext):
         arg_name = ctx.children[0].getText()
@@ -1,47 +1,129 @@
+import multiprocessing
 import sys
+import threading
+import typing
+from concurrent.futures import ProcessPoolExecutor
 
-from antlr4 import *
-
-from project.query_language.grammar.QueryLanguageLexer import QueryLanguageLexer
-from project.query_language.grammar.QueryLanguageParser import QueryLanguageParser
-from project.query_language.grammar.parser import (
-    check_script_file_correct,
-    check_script_correct,
+from project.query_language.interpreter import printer
+from project.query_language.interpreter.compiler import CompiledProgram
+from project.query_language.interpreter.execution import (
+    ExecutionContext,
+    initialize_worker,
+)
+from project.query_language.interpreter.profiler import Profiler
+from project.query_language.interpreter.program_cache import (
+    ProgramCache,
+    default_program_cache,
 )
-from project.query_language.interpreter.interpret_visitor import InterpretVisitor
 
 
 class Interpreter:
     """
     Class for query language scripts execution
+
+    Parameters
+    ----------
+    file :
+        File for output of print statements, stdout by default
+    cache :
+        Cache of compiled programs, process wide in memory cache by default
+    workers :
+        Number of processes for map and filter lambdas, if None then lambdas
+        are evaluated serially
+    always_parallel :
+        Evaluate all lambdas in worker processes, by default only lambdas
+        with heavy automata operations are, cheap ones are faster serially
+    profiler :
+        Profiler which gets costs of every executed statement, programs are
+        not profiled if None
+    time_limit :
+        Maximum time of every statement in seconds, statements which exceed
+        it raise BudgetException
+    memory_limit :
+        Maximum growth of resident memory during every statement in bytes
+    cancellable :
+        Allow to stop running scripts with cancel, statements of scripts
+        which can not be stopped and are not limited skip the checks
+    output_format :
+        Format of output of print statements: repr of values, NDJSON or TSV
+        with a line per element of containers
     """
 
-    def __init__(self, file=None):
+    def __init__(
+        self,
+        file=None,
+        cache: typing.Optional[ProgramCache] = None,
+        workers: typing.Optional[int] = None,
+        always_parallel: bool = False,
+        profiler: typing.Optional[Profiler] = None,
+        time_limit: typing.Optional[float] = None,
+        memory_limit: typing.Optional[int] = None,
+        cancellable: bool = False,
+        output_format: str = printer.REPR,
+    ):
+        if output_format not in printer.OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format {output_format}")
         if file is None:
             self.file = sys.stdout
         else:
             self.file = file
+        self.cache = default_program_cache if cache is None else cache
+        self.workers = workers
+        self.always_parallel = always_parallel
+        self.profiler = profiler
+        self.time_limit = time_limit
+        self.memory_limit = memory_limit
+        self.output_format = output_format
+        self.token = None
+        if cancellable:
+            # Workers can only share events of multiprocessing
+            self.token = (
+                threading.Event() if workers is None else multiprocessing.Event()
+            )
 
     def execute_from_path(self, path: str):
         """
         Method for executing script from file
         """
-        if not check_script_file_correct(path):
-            raise Exception("Parse error")
-        self._interpret_stream(FileStream(path))
+        with open(path, encoding="utf-8") as file:
+            self.execute_script(file.read())
+
+    def cancel(self):
+        """
+        Stops the running script at the next check of engines, it is safe to
+        call from other threads. The interpreter must be cancellable
+        """
+        if self.token is None:
+            raise ValueError("Interpreter is not cancellable")
+        self.token.set()
 
     def execute_script(self, script: str):
         """
         Method for executing script from string
         """
-        if not check_script_correct(script):
-            raise Exception("Parse error")
-        self._interpret_stream(InputStream(script))
-
-    def _interpret_stream(self, input_stream):
-        lexer = QueryLanguageLexer(input_stream)
-        stream = CommonTokenStream(lexer)
-        parser = QueryLanguageParser(stream)
-        tree = parser.prog()
-        visitor = InterpretVisitor(self.file)
-        visitor.visit(tree)
+        if self.token is not None:
+            self.token.clear()
+        program = self.cache.get(script)
+        if self.profiler is None:
+            self._run(program)
+            return
+        with self.profiler:
+            self._run(program)
+
+    def _run(self, program: CompiledProgram):
+        options = {
+            "time_limit": self.time_limit,
+            "memory_limit": self.memory_limit,
+            "token": self.token,
+            "output_format": self.output_format,
+        }
+        if self.workers is None:
+            program.run(self.file, ExecutionContext(**options))
+            return
+        with ProcessPoolExecutor(
+            self.workers, initializer=initialize_worker, initargs=(self.token,)
+        ) as executor:
+            context = ExecutionContext(
+                executor, self.workers, self.always_parallel, **options
+            )
+            program.run(self.file, context)
@@ -0,0 +1,138 @@
+import os
+import typing
+from collections import OrderedDict
+
+from pyformlang.finite_automaton import EpsilonNFA
+
+from project.graph_utils import load_labeled_graph_from_dot
+from project.labeled_graph import LabeledGraph
+from project.query_language.interpreter.automaton import AutomatonValue
+
+# Estimated size of a node in the state table and its index in bytes
+_STATE_BYTES = 128
+
+
+class LoadedGraph:
+    """
+    Graph loaded from DOT file in matrix form and as automaton
+
+    Parameters
+    ----------
+    graph :
+        Graph with per label edge arrays
+    automaton :
+        Automaton of the graph with all states start and final. It is shared
+        by all loads of the file, values made from it share its matrices
+    """
+
+    def __init__(self, graph: LabeledGraph, automaton: AutomatonValue):
+        self.graph = graph
+        self.automaton = automaton
+        # Estimated memory of the graph and the automaton in bytes
+        self.size = (
+            sum(
+                sources.nbytes + destinations.nbytes
+                for sources, destinations in graph.edges.values()
+            )
+            + automaton.nbytes
+            + graph.number_of_nodes * _STATE_BYTES
+        )
+
+    @property
+    def fa(self) -> EpsilonNFA:
+        """
+        pyformlang automaton of the graph, it is built on first access
+        """
+        return self.automaton.to_nfa()
+
+
+class LoadedGraphCache:
+    """
+    Cache of graphs loaded by load statements keyed by absolute path of the
+    file, its size and modification time, so a changed file is loaded again.
+    Graphs which are kept in memory by the process, like graphs of the query
+    server, are added by name and load statements with the name get them
+    instead of files
+
+    Parameters
+    ----------
+    max_bytes :
+        Maximum estimated memory of cached graphs, least recently used graphs
+        are evicted first and graphs larger than the limit are not cached
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.graphs: OrderedDict[str, tuple[tuple, LoadedGraph]] = OrderedDict()
+        self.resident: dict[str, typing.Callable[[], AutomatonValue]] = {}
+
+    def add(self, name: str, automaton: typing.Callable[[], AutomatonValue]):
+        """
+        Adds resident graph, it is not evicted and is not counted in the size
+
+        Parameters
+        ----------
+        name :
+            Name of the graph in load statements
+        automaton :
+            Returns automaton of the graph, it is called on every load
+        """
+        self.resident[name] = automaton
+
+    def automaton(self, path: str) -> AutomatonValue:
+        """
+        Returns automaton of resident graph if path is its name and of the
+        DOT file otherwise
+
+        Raises
+        ----------
+        OSError :
+            If the file can't be read
+        """
+        if path in self.resident:
+            return self.resident[path]()
+        return self.get(path).automaton
+
+    def get(self, path: str) -> LoadedGraph:
+        """
+        Returns graph of the DOT file, parses it only on cache miss
+
+        Raises
+        ----------
+        OSError :
+            If the file can't be read
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = self.graphs.get(path)
+        if cached is not None and cached[0] == key:
+            self.hits += 1
+            self.graphs.move_to_end(path)
+            return cached[1]
+
+        self.misses += 1
+        self._remove(path)
+        graph = load_labeled_graph_from_dot(path)
+        loaded = LoadedGraph(graph, AutomatonValue.from_labeled_graph(graph))
+        if loaded.size <= self.max_bytes:
+            self.graphs[path] = (key, loaded)
+            self.size += loaded.size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self.graphs)))
+        return loaded
+
+    def clear(self):
+        self.graphs.clear()
+        self.size = 0
+
+    def _remove(self, path: str):
+        cached = self.graphs.pop(path, None)
+        if cached is not None:
+            self.size -= cached[1].size
+
+
+default_loaded_graph_cache = LoadedGraphCache()
@@ -0,0 +1,376 @@
+"""
+Semantics of query language operations over already evaluated expressions.
+
+Both the tree walking InterpretVisitor and the closure compiler evaluate
+operands in their own way and delegate the operation itself to this module,
+so the two execution strategies can not diverge
+"""
+import typing
+
+from pyformlang.regular_expression.regex_objects import MisformedRegexError
+
+from project import instrumentation
+from project.automata import *
+from project.query_language.interpreter import printer
+from project.query_language.interpreter.automaton import AutomatonValue
+from project.query_language.interpreter.exceptions import (
+    InterpretException,
+    TypesException,
+)
+from project.query_language.interpreter.expression import Expression
+from project.query_language.interpreter.loaded_graph_cache import (
+    default_loaded_graph_cache,
+)
+from project.query_language.interpreter.types import *
+from project.query_language.interpreter.values import (
+    EncodedSetValue,
+    SetValue,
+    type_of_value,
+)
+
+Elements = typing.Iterator[Expression]
+
+
+def check_automata_operation(statement: int, expr: Expression):
+    if not isinstance(expr.type, AutomataType):
+        raise TypesException(
+            statement, "Can't apply automata operation to non automata"
+        )
+
+
+def check_container(statement: int, container_expr: Expression):
+    if not isinstance(container_expr.type, ContainerType):
+        raise TypesException(statement, f"Can't map lambda to {container_expr.type}")
+
+
+def write_expression(file, expr: Expression, output_format: str = printer.REPR):
+    """
+    Writes printable representation of expression to the file
+    """
+    printer.write_expression(file, expr, output_format)
+
+
+def string_value(value: str) -> Expression:
+    return Expression(value, StringType())
+
+
+def int_value(value: int) -> Expression:
+    return Expression(value, IntType())
+
+
+def bool_value(value: bool) -> Expression:
+    return Expression(value, BoolType())
+
+
+def fa_value(statement: int, expr: Expression, operation: str) -> AutomatonValue:
+    """
+    Returns value of FA expression, operation is the name of operation for
+    the error on RSM
+    """
+    check_automata_operation(statement, expr)
+    if isinstance(expr.type, RSMType):
+        raise InterpretException(statement, f"{operation} for RSM is not supported")
+    return expr.value
+
+
+def set_start(statement: int, expr: Expression, starts_expr: Expression):
+    value = fa_value(statement, expr, "setStart")
+    if isinstance(starts_expr.type, SetType):
+        return Expression(value.with_start_states(starts_expr.value), expr.type)
+    raise TypesException(statement, f"States can't defined as {starts_expr.type}")
+
+
+def set_final(statement: int, expr: Expression, finals_expr: Expression):
+    value = fa_value(statement, expr, "setFinal")
+    if isinstance(finals_expr.type, SetType):
+        return Expression(value.with_final_states(finals_expr.value), expr.type)
+    raise TypesException(statement, f"States can't defined as {finals_expr.type}")
+
+
+def add_start(statement: int, expr: Expression, start_expr: Expression):
+    value = fa_value(statement, expr, "addStart")
+    return Expression(value.add_start_state(start_expr.value), expr.type)
+
+
+def add_final(statement: int, expr: Expression, final_expr: Expression):
+    value = fa_value(statement, expr, "addFinal")
+    return Expression(value.add_final_state(final_expr.value), expr.type)
+
+
+def automaton(value: typing.Any) -> typing.Any:
+    """
+    Returns pyformlang automaton of FA value, RSM values are returned as is
+    """
+    if isinstance(value, AutomatonValue):
+        return value.to_nfa()
+    return value
+
+
+def automaton_expression(value: typing.Any, expr_type: AutomataType) -> Expression:
+    if isinstance(value, EpsilonNFA):
+        return Expression(AutomatonValue.from_nfa(value), expr_type)
+    return Expression(value, expr_type)
+
+
+def set_expression(value: SetValue) -> Expression:
+    if isinstance(value, EncodedSetValue):
+        # Types of elements are not tracked for results of automata operations
+        return Expression(value, SetType())
+    if value.element_type is not None:
+        return Expression(value, SetType(elem=value.element_type))
+    return Expression(value, SetType(value.types()))
+
+
+def encoded_set_expression(values: typing.Iterable, arity: int = 1) -> Expression:
+    return set_expression(EncodedSetValue.from_values(values, arity))
+
+
+def get_start(statement: int, expr: Expression):
+    return set_expression(fa_value(statement, expr, "getStart").start_set())
+
+
+def get_final(statement: int, expr: Expression):
+    return set_expression(fa_value(statement, expr, "getFinal").final_set())
+
+
+def get_reachable(
+    statement: int, expr: Expression, query_expr: typing.Optional[Expression] = None
+):
+    value = fa_value(statement, expr, "getReachable")
+    if query_expr is not None:
+        query = fa_value(statement, query_expr, "getReachable")
+        return encoded_set_expression(
+            (
+                (start[1], final[1])
+                for start, final in query.intersection(value).reachable_pairs()
+            ),
+            arity=2,
+        )
+    return encoded_set_expression(value.reachable_pairs(), arity=2)
+
+
+def get_vertices(statement: int, expr: Expression):
+    return set_expression(fa_value(statement, expr, "getVertices").state_set())
+
+
+def get_edges(statement: int, expr: Expression):
+    return set_expression(fa_value(statement, expr, "getEdges").edge_set())
+
+
+def get_labels(statement: int, expr: Expression):
+    return set_expression(fa_value(statement, expr, "getLabels").label_set())
+
+
+def check_lambda_args(statement: int, args: typing.Sequence[str]):
+    if len(args) != 1:
+        raise InterpretException(statement, "Wrong number of parameters in lambda")
+
+
+def container_elements(container_expr: Expression) -> Elements:
+    container_type = container_expr.type
+    if container_type.elem is None and not container_type.params:
+        # Types of elements of automata operation results are not tracked
+        return (
+            Expression(value, type_of_value(value)) for value in container_expr.value
+        )
+    return map(Expression, container_expr.value, container_type.element_types())
+
+
+def range_elements(start: int, end: int) -> Elements:
+    int_type = IntType()
+    return (Expression(i, int_type) for i in range(start, end))
+
+
+def map_elements(
+    elements: Elements, function: typing.Callable[[Expression], Expression]
+) -> Elements:
+    return map(function, elements)
+
+
+def filter_elements(
+    statement: int,
+    elements: Elements,
+    predicate: typing.Callable[[Expression], Expression],
+) -> Elements:
+    return select_elements(statement, ((el, predicate(el)) for el in elements))
+
+
+def select_elements(
+    statement: int, decisions: typing.Iterable[tuple[Expression, Expression]]
+) -> Elements:
+    """
+    Yields elements paired with True, predicate results are computed by caller
+    """
+    for el, is_accepted in decisions:
+        if not isinstance(is_accepted.type, BoolType):
+            raise InterpretException(
+                statement,
+                f"Filter accepts lambda which returns bool value",
+            )
+        if is_accepted.value:
+            yield el
+
+
+def collect_list(elements: Elements, elem: typing.Optional[Type] = None):
+    """
+    Materializes elements to list, if the type of elements is known then
+    their types are not collected
+    """
+    values = []
+    if elem is not None:
+        for el in elements:
+            values.append(el.value)
+        return Expression(tuple(values), ListType(elem=elem))
+    types = []
+    for el in elements:
+        values.append(el.value)
+        types.append(el.type)
+    return Expression(tuple(values), ListType(types))
+
+
+def map_container(
+    container_expr: Expression,
+    function: typing.Callable[[Expression], Expression],
+):
+    """
+    Applies function to each element of container and collects results to list
+    """
+    return collect_list(map_elements(container_elements(container_expr), function))
+
+
+def filter_container(
+    statement: int,
+    container_expr: Expression,
+    predicate: typing.Callable[[Expression], Expression],
+):
+    """
+    Collects to list elements of container for which predicate returns True
+    """
+    return collect_list(
+        filter_elements(statement, container_elements(container_expr), predicate),
+        container_expr.type.elem,
+    )
+
+
+def load(statement: int, path_expr: Expression):
+    try:
+        with instrumentation.timer("graph.load"):
+            fa = default_loaded_graph_cache.automaton(path_expr.value)
+    except Exception:
+        raise InterpretException(statement, "Can't load graph")
+    return Expression(fa, FAType())
+
+
+def intersect(statement: int, left: Expression, right: Expression):
+    if isinstance(left.type, SetType) and isinstance(right.type, SetType):
+        return set_expression(left.value.intersection(right.value))
+    if isinstance(left.type, FAType) and isinstance(right.type, FAType):
+        return Expression(left.value.intersection(right.value), FAType())
+    if isinstance(left.type, RSMType) and isinstance(right.type, RSMType):
+        raise InterpretException(statement, f"Intersections for RSM is not supported")
+    if isinstance(left.type, RSMType) or isinstance(right.type, RSMType):
+        raise InterpretException(statement, f"Intersections for RSM is not implemented")
+    raise TypesException(statement, f"Intersection possible only for automata and set")
+
+
+def concat(statement: int, left: Expression, right: Expression):
+    if isinstance(left.type, ListType) and isinstance(right.type, ListType):
+        if left.type.elem is not None and left.type.elem == right.type.elem:
+            return Expression(left.value + right.value, ListType(elem=left.type.elem))
+        result = list(zip(left.value, left.type.element_types())) + list(
+            zip(right.value, right.type.element_types())
+        )
+        return Expression(
+            tuple([val for val, _ in result]),
+            ListType([type_ for _, type_ in result]),
+        )
+    if not (
+        isinstance(left.type, AutomataType) and isinstance(right.type, AutomataType)
+    ):
+        raise TypesException(statement, f"Concat possible only for automatas or lists")
+    result_type = (
+        RSMType()
+        if isinstance(left.type, RSMType) or isinstance(right.type, RSMType)
+        else FAType()
+    )
+    return automaton_expression(
+        automatas_concat(automaton(left.value), automaton(right.value)), result_type
+    )
+
+
+def union(statement: int, left: Expression, right: Expression):
+    if isinstance(left.type, SetType) and isinstance(right.type, SetType):
+        return set_expression(left.value.union(right.value))
+    if not (
+        isinstance(left.type, AutomataType) and isinstance(right.type, AutomataType)
+    ):
+        raise TypesException(statement, f"Union possible only for automatas or sets")
+    result_type = (
+        RSMType()
+        if isinstance(left.type, RSMType) or isinstance(right.type, RSMType)
+        else FAType()
+    )
+    return automaton_expression(
+        automatas_union(automaton(left.value), automaton(right.value)), result_type
+    )
+
+
+def star(statement: int, automata_expr: Expression):
+    if isinstance(automata_expr.type, AutomataType):
+        return automaton_expression(
+            automaton(automata_expr.value).kleene_star(), automata_expr.type
+        )
+    raise TypesException(statement, f"Can't apply kleene star to non automata")
+
+
+def smb(statement: int, expr: Expression):
+    if expr.type != StringType():
+        raise TypesException(
+            statement, f"Automatas with non string labels are forbidden"
+        )
+    try:
+        with instrumentation.timer("regex.compile"):
+            fa = Regex(expr.value).to_epsilon_nfa().minimize()
+    except MisformedRegexError:
+        raise InterpretException(statement, f"Misformed regex {expr.value!r}")
+    return Expression(AutomatonValue.from_nfa(fa), FAType())
+
+
+def contains(statement: int, expr: Expression, container_expr: Expression):
+    if not isinstance(container_expr.type, ContainerType):
+        raise TypesException(
+            statement,
+            f"'in' operator works for containers not for {container_expr.type}",
+        )
+    return Expression(expr.value in container_expr.value, BoolType())
+
+
+def list_element(statement: int, list_expr: Expression, expr: Expression):
+    if not isinstance(list_expr.type, ListType):
+        raise TypesException(statement, f"{list_expr.type} is not subscriptable")
+    if not isinstance(expr.type, IntType):
+        raise TypesException(
+            statement, f"List indices must be integers, not {expr.type}"
+        )
+    return Expression(
+        list_expr.value[expr.value], list_expr.type.element_type(expr.value)
+    )
+
+
+def make_list(elements: typing.Sequence[Expression]):
+    return Expression(
+        tuple(map(lambda el: el.value, elements)),
+        ListType([el.type for el in elements]),
+    )
+
+
+def make_set(elements: typing.Iterable[Expression]):
+    return set_expression(SetValue.from_expressions(elements))
+
+
+def make_range_list(start: int, end: int):
+    return Expression(tuple(range(start, end)), ListType(elem=IntType()))
+
+
+def make_range_set(start: int, end: int):
+    return set_expression(SetValue.from_range(start, end))
@@ -0,0 +1,131 @@
+"""
+Streaming output of print statements.
+
+Containers are written element by element through a buffer which goes to the
+file when it grows over its size and at the end of every print, so printing a
+set of millions of pairs takes memory of the buffer instead of the whole
+representation. Besides the default repr of values, elements can be written
+as NDJSON or TSV lines for other tools
+"""
+import json
+import typing
+
+from project.query_language.interpreter.expression import Expression
+from project.query_language.interpreter.types import *
+from project.query_language.interpreter.values import SetValue
+
+REPR = "repr"
+NDJSON = "ndjson"
+TSV = "tsv"
+OUTPUT_FORMATS = (REPR, NDJSON, TSV)
+
+_TSV_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+class BufferedWriter:
+    """
+    Collects written text and writes it to the file in chunks
+
+    Parameters
+    ----------
+    file :
+        File to write to
+    buffer_size :
+        Number of characters which are collected before writing to the file
+    """
+
+    def __init__(self, file: typing.TextIO, buffer_size: int = 64 * 1024):
+        self.file = file
+        self.buffer_size = buffer_size
+        self._parts: list[str] = []
+        self._size = 0
+
+    def write(self, text: str):
+        self._parts.append(text)
+        self._size += len(text)
+        if self._size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._parts:
+            self.file.write("".join(self._parts))
+            self._parts = []
+            self._size = 0
+
+
+def _is_container(value: typing.Any) -> bool:
+    return isinstance(value, (tuple, SetValue))
+
+
+def _json_value(value: typing.Any) -> typing.Any:
+    if _is_container(value):
+        return [_json_value(element) for element in value]
+    return value
+
+
+def _tsv_field(value: typing.Any) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text.translate(_TSV_ESCAPES)
+
+
+def _write_repr(writer: BufferedWriter, value: typing.Any):
+    """
+    Writes the same text as repr of tuple of elements
+    """
+    writer.write("(")
+    count = 0
+    for element in value:
+        if count > 0:
+            writer.write(", ")
+        writer.write(repr(element))
+        count += 1
+    writer.write(",)" if count == 1 else ")")
+
+
+def _write_line(writer: BufferedWriter, value: typing.Any, output_format: str):
+    if output_format == NDJSON:
+        writer.write(json.dumps(_json_value(value)))
+    elif isinstance(value, tuple):
+        writer.write("\t".join(_tsv_field(component) for component in value))
+    else:
+        writer.write(_tsv_field(value))
+    writer.write("\n")
+
+
+def write_expression(
+    file: typing.TextIO,
+    expr: Expression,
+    output_format: str = REPR,
+    buffer_size: int = 64 * 1024,
+):
+    """
+    Writes value of expression to the file. In repr format a value is one
+    line, in NDJSON and TSV formats every element of container is a line
+    and other values are one line. Automata are written as their type
+
+    Parameters
+    ----------
+    output_format :
+        One of OUTPUT_FORMATS
+    buffer_size :
+        Number of characters which are collected before writing to the file
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format {output_format}")
+    writer = BufferedWriter(file, buffer_size)
+    if isinstance(expr.type, AutomataType):
+        value = str(expr.type)
+    else:
+        value = expr.value
+    if output_format == REPR:
+        if _is_container(value):
+            _write_repr(writer, value)
+        else:
+            writer.write(str(value))
+        writer.write("\n")
+    elif _is_container(value):
+        for element in value:
+            _write_line(writer, element, output_format)
+    else:
+        _write_line(writer, value, output_format)
+    writer.flush()
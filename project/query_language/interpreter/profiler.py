@@ -0,0 +1,132 @@
+import contextlib
+import time
+import tracemalloc
+import typing
+
+from project import instrumentation
+
+
+class StatementProfile:
+    """
+    Cost of one execution of statement
+
+    Parameters
+    ----------
+    number :
+        Number of statement in program, the same as in errors of interpreter
+    text :
+        Text of statement from parsing tree
+    wall, cpu :
+        Wall clock and CPU time of the process in seconds
+    peak_memory :
+        Peak of memory allocated during statement in bytes above memory
+        allocated before it
+    engine :
+        Time of instrumented engine calls (intersection, closure, regex
+        compile and others) made by the statement, nested calls are included
+        in the time of outer ones
+    """
+
+    def __init__(
+        self,
+        number: int,
+        text: str,
+        wall: float,
+        cpu: float,
+        peak_memory: int,
+        engine: dict[str, float],
+    ):
+        self.number = number
+        self.text = text
+        self.wall = wall
+        self.cpu = cpu
+        self.peak_memory = peak_memory
+        self.engine = engine
+
+
+class Profiler(instrumentation.Collector):
+    """
+    Collector of per statement costs of interpreted programs.
+
+    Memory is traced with tracemalloc while the profiler is entered, which
+    slows down execution. Lambdas evaluated in worker processes are
+    measured only as a part of the statement in the main process
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.statements: list[StatementProfile] = []
+        self._current: typing.Optional[StatementProfile] = None
+        self._started_tracing = False
+        self._installed = None
+
+    def __enter__(self) -> "Profiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._installed = instrumentation.installed(self)
+        self._installed.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._installed.__exit__(*exc_info)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    @contextlib.contextmanager
+    def statement(self, number: int, text: str = ""):
+        profile = StatementProfile(number, text, 0.0, 0.0, 0, {})
+        outer, self._current = self._current, profile
+        tracemalloc.reset_peak()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        cpu_start, wall_start = time.process_time(), time.perf_counter()
+        try:
+            with super().statement(number, text):
+                yield
+        finally:
+            profile.wall = time.perf_counter() - wall_start
+            profile.cpu = time.process_time() - cpu_start
+            profile.peak_memory = max(
+                tracemalloc.get_traced_memory()[1] - memory_before, 0
+            )
+            self._current = outer
+            self.statements.append(profile)
+
+    def add_time(self, name: str, seconds: float):
+        super().add_time(name, seconds)
+        if self._current is not None and name != instrumentation.STATEMENT:
+            engine = self._current.engine
+            engine[name] = engine.get(name, 0.0) + seconds
+
+    def format_table(self, top: int = 3) -> str:
+        """
+        Returns table with a row per executed statement, the slowest engine
+        calls of statement are listed in the last column
+        """
+        header = (
+            f"{'stmt':>5} {'wall, s':>10} {'cpu, s':>10} {'peak, KB':>10}  "
+            f"{'engine calls':<40}  statement"
+        )
+        lines = [header]
+        for profile in self.statements:
+            calls = sorted(profile.engine.items(), key=lambda item: -item[1])
+            engine = ", ".join(f"{name} {seconds:.3f}" for name, seconds in calls[:top])
+            text = (
+                profile.text if len(profile.text) <= 60 else profile.text[:57] + "..."
+            )
+            lines.append(
+                f"{profile.number:>5} {profile.wall:>10.4f} {profile.cpu:>10.4f} "
+                f"{profile.peak_memory // 1024:>10}  {engine:<40}  {text}"
+            )
+        return "\n".join(lines)
+
+    def write_collapsed(self, file: typing.TextIO):
+        """
+        Writes exclusive time of stacks of statements and engine calls in
+        collapsed stack format of flamegraph.pl and speedscope, in microseconds
+        """
+        for stack, seconds in self.stacks.items():
+            microseconds = round(seconds * 1e6)
+            if microseconds > 0:
+                file.write(f"{stack} {microseconds}\n")
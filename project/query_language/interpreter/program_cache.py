@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import typing
+from collections import OrderedDict
+
+from antlr4 import InputStream
+
+from project.query_language.grammar.parser import (
+    GRAMMAR_FINGERPRINT,
+    deserialize_tree,
+    parse_stream,
+    serialize_tree,
+)
+from project.query_language.interpreter.compiler import (
+    CompiledProgram,
+    compile_program,
+)
+
+
+class ProgramCache:
+    """
+    Cache of compiled query language programs keyed by hash of the program text
+
+    Compiled programs are kept in memory, parsing trees are optionally stored
+    on disk, so an unchanged script is parsed only once even across processes
+
+    Parameters
+    ----------
+    max_size :
+        Maximum number of compiled programs kept in memory
+    directory :
+        Directory for parsing trees, if None then disk is not used
+    """
+
+    def __init__(self, max_size: int = 64, directory: typing.Optional[str] = None):
+        self.max_size = max_size
+        self.directory = directory
+        self.programs: OrderedDict[str, CompiledProgram] = OrderedDict()
+
+    def get(self, script: str) -> CompiledProgram:
+        """
+        Returns compiled program for the script, parses it only on cache miss
+
+        Raises
+        ----------
+        Exception :
+            If script is not accepted by query language grammar
+        """
+        key = hashlib.sha256((GRAMMAR_FINGERPRINT + script).encode()).hexdigest()
+        if key in self.programs:
+            self.programs.move_to_end(key)
+            return self.programs[key]
+
+        tree = self._load_tree(key)
+        if tree is None:
+            tree = parse_stream(InputStream(script))
+            if tree is None:
+                raise Exception("Parse error")
+            self._store_tree(key, tree)
+
+        program = compile_program(tree, script)
+        self.programs[key] = program
+        if len(self.programs) > self.max_size:
+            self.programs.popitem(last=False)
+        return program
+
+    def clear(self):
+        self.programs.clear()
+
+    def _tree_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_tree(self, key: str):
+        if self.directory is None:
+            return None
+        try:
+            with open(self._tree_path(key)) as file:
+                return deserialize_tree(json.load(file))
+        except (OSError, ValueError):
+            return None
+
+    def _store_tree(self, key: str, tree):
+        if self.directory is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to temporary file first, so concurrent readers never see a partial tree
+        tmp_path = self._tree_path(key) + f".{os.getpid()}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump(serialize_tree(tree), file)
+        os.replace(tmp_path, self._tree_path(key))
+
+
+default_program_cache = ProgramCache()
@@ -1,3 +1,7 @@
+import itertools
+import typing
+
+
 class Type:
     """
     Base class for query language types
@@ -6,9 +10,15 @@ class Type:
     def __eq__(self, other):
         return isinstance(other, Type) and self.__class__ == other.__class__
 
+    def __hash__(self):
+        return hash(self.__class__)
+
     def __str__(self):
         return self.__class__.__name__
 
+    def __repr__(self):
+        return str(self)
+
 
 class StringType(Type):
     pass
@@ -41,15 +51,58 @@ class RSMType(AutomataType):
 class ContainerType(Type):
     """
     Base class for query language container types
+
+    Container is either homogeneous, then all elements have type elem,
+    or heterogeneous, then params stores type of each element.
+    Params of equal types are turned into homogeneous form
+
+    Parameters
+    ----------
+    params :
+        Types of elements
+    elem :
+        Type of all elements of homogeneous container
     """
 
-    def __init__(self, params=None):
-        self.params: tuple[Type] = params or []
+    def __init__(
+        self,
+        params: typing.Optional[typing.Iterable[Type]] = None,
+        elem: typing.Optional[Type] = None,
+    ):
+        params = tuple(params or ())
+        if elem is None and params:
+            first = params[0]
+            if all(param is first or param == first for param in params):
+                elem = first
+        self.elem: typing.Optional[Type] = elem
+        self.params: tuple[Type, ...] = () if elem is not None else params
+
+    def element_types(self) -> typing.Iterator[Type]:
+        """
+        Types of elements in the order of elements
+        """
+        if self.elem is not None:
+            return itertools.repeat(self.elem)
+        return iter(self.params)
+
+    def element_type(self, index: int) -> Type:
+        if self.elem is not None:
+            return self.elem
+        return self.params[index]
 
     def __eq__(self, other):
-        return super().__eq__(other) and self.params == other.params
+        return (
+            super().__eq__(other)
+            and self.elem == other.elem
+            and self.params == other.params
+        )
+
+    def __hash__(self):
+        return hash((self.__class__, self.elem, frozenset(self.params)))
 
     def __str__(self):
+        if self.elem is not None:
+            return f"{self.__class__.__name__}(elem={self.elem})"
         return f"{self.__class__.__name__}{self.params}"
 
 
@@ -59,7 +112,19 @@ class ListType(ContainerType):
 
 class SetType(ContainerType):
     def __eq__(self, other):
-        return super().__eq__(other) and set(self.params) == set(other.params)
+        return (
+            Type.__eq__(self, other)
+            and self.elem == other.elem
+            and self.params_set() == other.params_set()
+        )
+
+    def __hash__(self):
+        return super().__hash__()
+
+    def params_set(self) -> frozenset[Type]:
+        if not hasattr(self, "_params_set"):
+            self._params_set = frozenset(self.params)
+        return self._params_set
 
 
 class LambdaType(Type):
@@ -0,0 +1,265 @@
+import typing
+
+import numpy as np
+
+from project.query_language.interpreter.types import *
+
+_ITERATION_CHUNK = 4096
+
+
+def type_of_value(value: typing.Any) -> Type:
+    """
+    Infers query language type of python value, used for values returned by
+    automata operations
+    """
+    if isinstance(value, bool):
+        return BoolType()
+    if isinstance(value, int):
+        return IntType()
+    if isinstance(value, str):
+        return StringType()
+    if isinstance(value, SetValue):
+        return SetType(tuple(value.types()))
+    if isinstance(value, tuple):
+        return ListType(tuple(type_of_value(el) for el in value))
+    return Type()
+
+
+class SetValue:
+    """
+    Immutable set of query language values
+
+    Elements are stored in a dictionary with their types, so membership check
+    is O(1) and union and intersection don't rebuild anything per element.
+    Iteration order is the insertion order and matches the order of types()
+
+    Parameters
+    ----------
+    elements :
+        Dictionary of values and their types
+    element_type :
+        Type of all elements if it is known that the set is homogeneous
+    """
+
+    def __init__(
+        self,
+        elements: typing.Optional[dict[typing.Any, Type]] = None,
+        element_type: typing.Optional[Type] = None,
+    ):
+        self._elements = elements if elements is not None else {}
+        self.element_type = element_type
+
+    @classmethod
+    def from_expressions(cls, expressions: typing.Iterable) -> "SetValue":
+        """
+        Creates set from expressions, first expression with equal value wins
+        """
+        elements = {}
+        element_type = None
+        homogeneous = True
+        for expr in expressions:
+            if expr.value not in elements:
+                elements[expr.value] = expr.type
+                if element_type is None:
+                    element_type = expr.type
+                elif homogeneous and not (
+                    expr.type is element_type or expr.type == element_type
+                ):
+                    homogeneous = False
+        return cls(elements, element_type if homogeneous else None)
+
+    @classmethod
+    def from_range(cls, start: int, end: int) -> "SetValue":
+        int_type = IntType()
+        return cls(dict.fromkeys(range(start, end), int_type), int_type)
+
+    @property
+    def elements(self) -> dict[typing.Any, Type]:
+        return self._elements
+
+    def types(self) -> typing.Iterable[Type]:
+        return self.elements.values()
+
+    def union(self, other: "SetValue") -> "SetValue":
+        """
+        Union of sets, types of equal values are taken from the other set
+        """
+        elements = dict(self.elements)
+        elements.update(other.elements)
+        if len(self) == 0 or len(other) == 0:
+            element_type = self.element_type or other.element_type
+        elif self.element_type == other.element_type:
+            element_type = self.element_type
+        else:
+            element_type = None
+        return SetValue(elements, element_type)
+
+    def intersection(self, other: "SetValue") -> "SetValue":
+        """
+        Intersection of sets, types of values are taken from the other set
+        """
+        smaller, larger = (self, other) if len(self) <= len(other) else (other, self)
+        other_elements = other.elements
+        return SetValue(
+            {value: other_elements[value] for value in smaller if value in larger},
+            other.element_type,
+        )
+
+    def __iter__(self):
+        return iter(self.elements)
+
+    def __len__(self):
+        return len(self.elements)
+
+    def __contains__(self, value):
+        try:
+            return value in self.elements
+        except TypeError:
+            return False
+
+    def __eq__(self, other):
+        if not isinstance(other, SetValue):
+            return False
+        return len(self) == len(other) and all(value in other for value in self)
+
+    def __hash__(self):
+        return hash(frozenset(self))
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
+class EncodedSetValue(SetValue):
+    """
+    Homogeneous set of values or fixed length tuples of values, e.g. vertices,
+    pairs of vertices or edges of graph
+
+    Every distinct value is stored once in the table, elements are rows of
+    sorted numpy structured array of indexes in this table. Union, intersection
+    and membership check work on the arrays without creating python objects
+    for elements
+
+    Parameters
+    ----------
+    ids :
+        Sorted array without duplicates with one field of indexes per
+        element component
+    table :
+        Distinct values referenced by ids
+    """
+
+    def __init__(self, ids: np.ndarray, table: typing.Sequence):
+        super().__init__(None)
+        self.ids = ids
+        self.table = tuple(table)
+        self._index: typing.Optional[dict[typing.Any, int]] = None
+        self._materialized: typing.Optional[dict[typing.Any, Type]] = None
+
+    @staticmethod
+    def ids_dtype(arity: int) -> np.dtype:
+        return np.dtype([(f"v{i}", np.int64) for i in range(arity)])
+
+    @classmethod
+    def from_values(cls, values: typing.Iterable, arity: int = 1) -> "EncodedSetValue":
+        """
+        Encodes values, if arity is greater than one then values must be
+        tuples of this length
+        """
+        index = {}
+        rows = []
+        for value in values:
+            components = (value,) if arity == 1 else value
+            rows.append(
+                tuple(
+                    index.setdefault(component, len(index)) for component in components
+                )
+            )
+        ids = np.unique(np.array(rows, dtype=cls.ids_dtype(arity)))
+        result = cls(ids, tuple(index))
+        result._index = index
+        return result
+
+    @property
+    def arity(self) -> int:
+        return len(self.ids.dtype.names)
+
+    @property
+    def index(self) -> dict[typing.Any, int]:
+        if self._index is None:
+            self._index = {value: i for i, value in enumerate(self.table)}
+        return self._index
+
+    @property
+    def elements(self) -> dict[typing.Any, Type]:
+        if self._materialized is None:
+            self._materialized = {value: type_of_value(value) for value in self}
+        return self._materialized
+
+    def types(self) -> typing.Iterable[Type]:
+        return (type_of_value(value) for value in self)
+
+    def _encode(self, value) -> typing.Optional[np.ndarray]:
+        if self.arity == 1:
+            components = (value,)
+        elif isinstance(value, tuple) and len(value) == self.arity:
+            components = value
+        else:
+            return None
+        try:
+            key = tuple(self.index[component] for component in components)
+        except (KeyError, TypeError):
+            return None
+        return np.array(key, dtype=self.ids.dtype)
+
+    def _aligned(self, other: "EncodedSetValue") -> tuple[tuple, np.ndarray]:
+        """
+        Returns common table and ids of other set translated to this table
+        """
+        if other.table is self.table:
+            return self.table, other.ids
+        index = dict(self.index)
+        mapping = np.array(
+            [index.setdefault(value, len(index)) for value in other.table],
+            dtype=np.int64,
+        )
+        other_ids = np.empty_like(other.ids)
+        for field in other.ids.dtype.names:
+            other_ids[field] = mapping[other.ids[field]]
+        return tuple(index), other_ids
+
+    def _is_compatible(self, other: SetValue) -> bool:
+        return isinstance(other, EncodedSetValue) and other.arity == self.arity
+
+    def union(self, other: SetValue) -> SetValue:
+        if not self._is_compatible(other):
+            return super().union(other)
+        table, other_ids = self._aligned(other)
+        return EncodedSetValue(np.union1d(self.ids, other_ids), table)
+
+    def intersection(self, other: SetValue) -> SetValue:
+        if not self._is_compatible(other):
+            return super().intersection(other)
+        table, other_ids = self._aligned(other)
+        return EncodedSetValue(np.intersect1d(self.ids, other_ids), table)
+
+    def __iter__(self):
+        # Ids are converted to python ints by chunks, so iteration over a
+        # large set takes memory of one chunk
+        table = self.table
+        for start in range(0, len(self.ids), _ITERATION_CHUNK):
+            ids = self.ids[start : start + _ITERATION_CHUNK]
+            if self.arity == 1:
+                yield from (table[i] for i in ids["v0"].tolist())
+            else:
+                columns = [ids[field].tolist() for field in ids.dtype.names]
+                yield from (tuple(table[i] for i in row) for row in zip(*columns))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, value):
+        key = self._encode(value)
+        if key is None:
+            return False
+        position = np.searchsorted(self.ids, key)
+        return bool(position < len(self.ids) and self.ids[position] == key)
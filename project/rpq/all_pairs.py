@@ -1,14 +1,16 @@
-from typing import Optional
+import math
+from collections import defaultdict
+from typing import Iterable, Optional
 
 import networkx as nx
-from pyformlang.finite_automaton import EpsilonNFA
+from pyformlang.finite_automaton import EpsilonNFA, State, Symbol
 from pyformlang.regular_expression import Regex
-from scipy.sparse import kron
+from scipy.sparse import csr_matrix, dok_matrix, kron
 
-from project import automata
-from project.boolean_decomposition import *
+from project import automata, budget, instrumentation
 
 
+@instrumentation.timed("rpq.intersection")
 def finite_automata_intersection(
     fa1: EpsilonNFA,
     fa2: EpsilonNFA,
@@ -37,14 +39,15 @@ def finite_automata_intersection(
     fa1_boolean_decomposition = get_boolean_decomposition_of_fa(fa1, states_order_fa_1)
     fa2_boolean_decomposition = get_boolean_decomposition_of_fa(fa2, states_order_fa_2)
     result_boolean_decomposition = dict()
-    for symbol in fa1.symbols:
-        if symbol.value in set([s.value for s in fa2.symbols]):
-            result_boolean_decomposition[symbol.value] = dok_matrix(
-                kron(
-                    fa1_boolean_decomposition[symbol.value],
-                    fa2_boolean_decomposition[symbol.value],
+    with instrumentation.timer("rpq.kron"):
+        for symbol in fa1.symbols:
+            if symbol.value in set([s.value for s in fa2.symbols]):
+                result_boolean_decomposition[symbol.value] = dok_matrix(
+                    kron(
+                        fa1_boolean_decomposition[symbol.value],
+                        fa2_boolean_decomposition[symbol.value],
+                    )
                 )
-            )
     states_mapping = {
         states_order_fa_1[state1] * len(fa2.states)
         + states_order_fa_2[state2]: (state1.value, state2.value)
@@ -179,6 +182,7 @@ def enumerate_states(fa: EpsilonNFA) -> dict[State, int]:
     return {state: i for i, state in enumerate(fa.states)}
 
 
+@instrumentation.timed("rpq.decomposition")
 def get_boolean_decomposition_of_fa(
     fa: EpsilonNFA,
     states_order_fa: dict[State, int],
@@ -245,6 +249,20 @@ def get_transitive_closure_of_boolean_decomposition(
     for matrix in boolean_decomposition.values():
         sum_of_matrices += matrix
     result_matrix = sum_of_matrices.tocsc()
-    for _ in range(math.ceil(math.log2(states_number))):
-        result_matrix = result_matrix + result_matrix @ result_matrix
+    collector = instrumentation.current()
+    limit = budget.current()
+    if collector is None and limit is None:
+        for _ in range(math.ceil(math.log2(states_number))):
+            result_matrix = result_matrix + result_matrix @ result_matrix
+        return result_matrix
+    with instrumentation.timer("rpq.closure"):
+        for iteration in range(math.ceil(math.log2(states_number))):
+            result_matrix = result_matrix + result_matrix @ result_matrix
+            if collector is not None:
+                collector.count("rpq.closure.iterations")
+                collector.record("rpq.closure.nnz", result_matrix.nnz)
+            if limit is not None:
+                limit.check(
+                    "rpq.closure", iteration=iteration + 1, nnz=result_matrix.nnz
+                )
     return result_matrix
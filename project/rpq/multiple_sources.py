@@ -1,12 +1,12 @@
-from typing import Optional, Any, Collection
+from typing import Any, Collection, Iterable, Optional
 
-from pyformlang.regular_expression import Regex
-from scipy.sparse import block_diag
 import networkx as nx
+from pyformlang.regular_expression import Regex
+from scipy.sparse import block_diag, dok_matrix
 
-from project import automata
+from project import automata, budget, instrumentation
+from project.boolean_decomposition import get_boolean_decomposition_of_fa
 from project.rpq.all_pairs import enumerate_states
-from project.boolean_decomposition import *
 
 
 def multiple_sources_reachability_with_regular_constraints(
@@ -92,9 +92,20 @@ def multiple_sources_reachability_with_regular_constraints(
 
     result = set()
     M_new = dok_matrix(M.shape, dtype=bool)
+    collector = instrumentation.current()
+    limit = budget.current()
+    iteration = 0
     while True:
         for symbol, matrix in block_diagonal_boolean_decomposition.items():
             M_new += _transform_rows(M @ matrix, query_vertices_number)
+        iteration += 1
+        if collector is not None:
+            collector.count("rpq.bfs.iterations")
+            collector.record("rpq.bfs.nnz", M_new.nnz)
+        if limit is not None:
+            limit.check(
+                "rpq.bfs", iteration=iteration, nnz=M_new.nnz, results=len(result)
+            )
         if for_each_vertex:
             for j in range(len(graph_sources)):
                 result |= set(
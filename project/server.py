@@ -0,0 +1,568 @@
+"""
+Long running query server which keeps graphs resident between queries.
+
+Graphs are converted to the binary format once when the server starts, worker
+processes open them with memory mapping, so all workers share pages of the
+adjacency matrices and every request against a graph reuses the boolean
+decomposition built by the worker for the first one. Queries are evaluated
+in the process pool, workers put results into a queue in chunks as they are
+produced and the event loop sends every chunk as soon as it arrives. Lines
+printed by scripts are sent while the script runs, RPQ and CFPQ algorithms
+find all pairs at once, so their pairs are sent chunk by chunk after the query
+is evaluated, without pickling the whole result.
+
+Protocol
+--------
+Client sends requests as JSON objects, one per line, and gets responses as
+JSON lines with the id of request: chunks {"id", "results"} followed by
+{"id", "done": true, "count"}, or {"id", "error"} with "statistics" if the
+query exceeded its time limit. Error can follow chunks which were sent
+before it. Requests:
+
+{"type": "rpq", "graph", "query", "algorithm": "tensor" | "bfs"} :
+    Pairs of vertices connected by path in the language of regular expression
+{"type": "cfpq", "graph", "grammar", "start", "algorithm": "hellings"} :
+    Pairs of vertices connected by path in the language of grammar
+{"type": "script", "script"} :
+    Lines printed by query language script, load "<name>" loads the
+    resident graph with the name instead of a file
+{"type": "graphs"} :
+    Names, sizes and labels of loaded graphs
+
+Queries to graphs accept optional "sources" and "targets" lists of vertices,
+all requests except graphs accept optional "time_limit" in seconds.
+
+Usage: python -m project.server --socket /tmp/query.sock name=graph.dot
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import queue
+import socket
+import tempfile
+import threading
+import typing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Optional
+
+import numpy as np
+from pyformlang.cfg import CFG, Variable
+from pyformlang.regular_expression import Regex
+from scipy.sparse import kron
+
+from project import automata, budget
+from project.boolean_decomposition import get_boolean_decomposition_of_fa
+from project.cfpq import hellings
+from project.graph_binary import (
+    META_FILE,
+    CsrGraph,
+    convert_dot_to_binary,
+    open_graph_binary,
+)
+from project.graph_utils import get_csr_graph_by_name
+from project.labeled_graph import LabeledGraph
+from project.query_language.interpreter.automaton import AutomatonValue, ValueTable
+from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.loaded_graph_cache import (
+    default_loaded_graph_cache,
+)
+from project.rpq.all_pairs import (
+    enumerate_states,
+    get_transitive_closure_of_boolean_decomposition,
+)
+from project.rpq.multiple_sources import (
+    multiple_sources_reachability_with_regular_constraints,
+)
+
+DATASET_PREFIX = "dataset:"
+
+
+class GraphIndex:
+    """
+    Graph resident in worker process with its boolean decomposition
+
+    Parameters
+    ----------
+    graph :
+        Graph opened from binary format
+    """
+
+    def __init__(self, graph: CsrGraph):
+        self.graph = graph
+        self.nodes = graph.nodes.tolist()
+        self.index = {node: i for i, node in enumerate(self.nodes)}
+        self.decomposition = graph.boolean_decomposition()
+        self._networkx = None
+        self._automaton = None
+
+    def automaton(self) -> AutomatonValue:
+        """
+        Automaton of the graph for load statements of scripts, it shares
+        matrices of the decomposition
+        """
+        if self._automaton is None:
+            states = np.arange(len(self.nodes), dtype=np.int64)
+            matrices = {
+                label: matrix
+                for label, matrix in self.decomposition.items()
+                if matrix.nnz > 0
+            }
+            self._automaton = AutomatonValue(
+                ValueTable(self.nodes), matrices, states, states
+            )
+        return self._automaton
+
+    @property
+    def networkx(self):
+        """
+        The graph with vertices numbered from zero, which CFPQ algorithms need
+        """
+        if self._networkx is None:
+            graph = self.graph.to_labeled_graph()
+            self._networkx = LabeledGraph(
+                list(range(len(self.nodes))), graph.edges
+            ).to_networkx()
+        return self._networkx
+
+    def indexes(self, nodes: Optional[Iterable]) -> list[int]:
+        """
+        Returns sorted indexes of vertices, indexes of all vertices if None
+        """
+        if nodes is None:
+            return list(range(len(self.nodes)))
+        try:
+            return sorted({self.index[node] for node in nodes})
+        except KeyError as error:
+            raise ValueError(f"Unknown vertex {error.args[0]!r}") from None
+
+    def _pairs(self, pairs: Iterable[tuple[int, int]]) -> list[list]:
+        return [[self.nodes[src], self.nodes[dst]] for src, dst in sorted(pairs)]
+
+    def rpq(
+        self,
+        query: str,
+        sources: Optional[Iterable] = None,
+        targets: Optional[Iterable] = None,
+        algorithm: str = "tensor",
+    ) -> list[list]:
+        """
+        Executes regular query with tensor algorithm or multiple sources BFS,
+        BFS doesn't return pairs of sources like multiple_sources_regular_query_for_graph
+        """
+        if algorithm not in ("tensor", "bfs"):
+            raise ValueError(f"Unknown RPQ algorithm {algorithm!r}")
+        sources, targets = self.indexes(sources), self.indexes(targets)
+        query_fa = automata.get_deterministic_automata_from_regex(Regex(query))
+        states_order = enumerate_states(query_fa)
+        query_decomposition = get_boolean_decomposition_of_fa(query_fa, states_order)
+        start_states = [states_order[state] for state in query_fa.start_states]
+        final_states = [states_order[state] for state in query_fa.final_states]
+        if algorithm == "bfs":
+            pairs = multiple_sources_reachability_with_regular_constraints(
+                query_decomposition,
+                self.decomposition,
+                sources,
+                start_states,
+                final_states,
+                True,
+            )
+            targets = set(targets)
+            return self._pairs(pair for pair in pairs if pair[1] in targets)
+        products = {
+            symbol: kron(query_matrix, self.decomposition[symbol], format="csr")
+            for symbol, query_matrix in query_decomposition.items()
+            if symbol in self.decomposition
+        }
+        if not products:
+            return []
+        closure = get_transitive_closure_of_boolean_decomposition(products)
+        n = len(self.nodes)
+        rows = [state * n + src for state in start_states for src in sources]
+        columns = [state * n + dst for state in final_states for dst in targets]
+        reachable = closure[rows][:, columns].tocoo()
+        return self._pairs(
+            {
+                (rows[i] % n, columns[j] % n)
+                for i, j in zip(reachable.row.tolist(), reachable.col.tolist())
+            }
+        )
+
+    def cfpq(
+        self,
+        grammar: str,
+        start: str = "S",
+        sources: Optional[Iterable] = None,
+        targets: Optional[Iterable] = None,
+        algorithm: str = "hellings",
+    ) -> list[list]:
+        """
+        Executes context free query with Hellings algorithm. Matrix CFPQ is
+        not served, it returns more pairs than Hellings algorithm on the same
+        graphs
+        """
+        if algorithm != "hellings":
+            raise ValueError(f"Unknown CFPQ algorithm {algorithm!r}")
+        pairs = hellings.cf_query_to_graph(
+            CFG.from_text(grammar),
+            self.networkx,
+            Variable(start),
+            set(self.indexes(sources)),
+            set(self.indexes(targets)),
+        )
+        return self._pairs(pairs)
+
+
+# Graphs of worker process by name, filled by _initialize_worker
+_graphs: dict[str, GraphIndex] = {}
+
+
+def _initialize_worker(paths: dict[str, str]):
+    _graphs.update(
+        {name: GraphIndex(open_graph_binary(path)) for name, path in paths.items()}
+    )
+    for name, index in _graphs.items():
+        default_loaded_graph_cache.add(name, index.automaton)
+
+
+def _graph(name: str) -> GraphIndex:
+    if name not in _graphs:
+        raise ValueError(f"Unknown graph {name!r}")
+    return _graphs[name]
+
+
+class _LinesFile:
+    """
+    File for output of scripts which passes every printed line to emit
+    """
+
+    def __init__(self, emit: typing.Callable[[str], None]):
+        self.emit = emit
+        # Parts of the line which is not finished yet
+        self._parts: list[str] = []
+
+    def write(self, text: str):
+        *lines, last = text.split("\n")
+        for line in lines:
+            self._parts.append(line)
+            self.emit("".join(self._parts))
+            self._parts = []
+        if last:
+            self._parts.append(last)
+
+    def close(self):
+        if self._parts:
+            self.emit("".join(self._parts))
+            self._parts = []
+
+
+def _execute(request: dict, emit: typing.Callable[[typing.Any], None]):
+    """
+    Executes request in worker process and passes its results to emit one
+    by one
+    """
+    kind = request.get("type")
+    time_limit = request.get("time_limit")
+    limit = (
+        contextlib.nullcontext()
+        if time_limit is None
+        else budget.limited(budget.Budget(time_limit=time_limit))
+    )
+    with limit:
+        if kind == "rpq":
+            results = _graph(request["graph"]).rpq(
+                request["query"],
+                request.get("sources"),
+                request.get("targets"),
+                request.get("algorithm", "tensor"),
+            )
+        elif kind == "cfpq":
+            results = _graph(request["graph"]).cfpq(
+                request["grammar"],
+                request.get("start", "S"),
+                request.get("sources"),
+                request.get("targets"),
+                request.get("algorithm", "hellings"),
+            )
+        elif kind == "script":
+            output = _LinesFile(emit)
+            Interpreter(file=output, time_limit=time_limit).execute_script(
+                request["script"]
+            )
+            output.close()
+            return
+        else:
+            raise ValueError(f"Unknown request type {kind!r}")
+    for result in results:
+        emit(result)
+
+
+def execute(request: dict) -> list:
+    """
+    Executes request in worker process and returns all its results
+    """
+    results = []
+    _execute(request, results.append)
+    return results
+
+
+def execute_to_queue(request: dict, results: queue.Queue, chunk_size: int) -> int:
+    """
+    Executes request in worker process and puts its results into the queue
+    in lists of at most chunk_size results, None is put after the last one
+
+    Returns
+    -------
+    count :
+        Number of results
+    """
+    chunk = []
+    count = 0
+
+    def emit(result: typing.Any):
+        nonlocal chunk, count
+        chunk.append(result)
+        count += 1
+        if len(chunk) >= chunk_size:
+            results.put(chunk)
+            chunk = []
+
+    try:
+        _execute(request, emit)
+        if chunk:
+            results.put(chunk)
+    finally:
+        results.put(None)
+    return count
+
+
+def _next_chunk(results: queue.Queue) -> typing.Optional[typing.Union[list, bool]]:
+    """
+    Waits for the next chunk of results, returns False if there is no chunk
+    in a second, so the caller can check that the worker is alive
+    """
+    try:
+        return results.get(timeout=1)
+    except queue.Empty:
+        return False
+
+
+class QueryServer:
+    """
+    Server of queries over asyncio Unix or TCP socket
+
+    Parameters
+    ----------
+    graphs :
+        Dictionary from name of graph to path of DOT file, directory of graph
+        in binary format or name of cfpq_data graph with dataset: prefix
+    workers :
+        Number of worker processes, number of CPUs by default
+    directory :
+        Directory for graphs converted from DOT, temporary directory by default
+    chunk_size :
+        Maximum number of results in one response line
+    """
+
+    def __init__(
+        self,
+        graphs: dict[str, str],
+        workers: Optional[int] = None,
+        directory: Optional[str] = None,
+        chunk_size: int = 1000,
+    ):
+        self.graphs = graphs
+        self.workers = workers
+        self.directory = directory
+        self.chunk_size = chunk_size
+        self.paths: dict[str, str] = {}
+        self.info: list[dict] = []
+        self.address = None
+        self.ready = threading.Event()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    def prepare(self, directory: str):
+        """
+        Converts graphs to binary format, graphs which are already in it are
+        used in place
+        """
+        for name, spec in self.graphs.items():
+            if spec.startswith(DATASET_PREFIX):
+                path = get_csr_graph_by_name(spec[len(DATASET_PREFIX) :]).path
+            elif os.path.isfile(os.path.join(spec, META_FILE)):
+                path = spec
+            else:
+                path = os.path.join(directory, name)
+                convert_dot_to_binary(spec, path)
+            self.paths[name] = path
+            graph = open_graph_binary(path)
+            self.info.append(
+                {
+                    "name": name,
+                    "nodes": graph.number_of_nodes,
+                    "edges": graph.number_of_edges,
+                    "labels": [label for label in graph.labels if label is not None],
+                }
+            )
+
+    async def serve(
+        self,
+        path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Loads graphs and serves requests on Unix socket at path or on TCP
+        host and port until stop is called
+        """
+        with contextlib.ExitStack() as stack:
+            directory = self.directory
+            if directory is None:
+                directory = stack.enter_context(tempfile.TemporaryDirectory())
+            self.prepare(directory)
+            # Queues of the manager can be sent to workers with requests
+            self._manager = stack.enter_context(multiprocessing.Manager())
+            self._executor = stack.enter_context(
+                ProcessPoolExecutor(
+                    self.workers,
+                    initializer=_initialize_worker,
+                    initargs=(self.paths,),
+                )
+            )
+            if path is not None:
+                server = await asyncio.start_unix_server(self._handle, path)
+            else:
+                server = await asyncio.start_server(self._handle, host, port)
+            self.address = server.sockets[0].getsockname()
+            self._loop = asyncio.get_running_loop()
+            self._stopped = asyncio.Event()
+            self.ready.set()
+            async with server:
+                await self._stopped.wait()
+
+    def stop(self):
+        """
+        Stops the server, it is safe to call from other threads
+        """
+        self._loop.call_soon_threadsafe(self._stopped.set)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while line := await reader.readline():
+                await self._respond(line, writer)
+        finally:
+            writer.close()
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter):
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request.get("type") == "graphs":
+                for start in range(0, len(self.info), self.chunk_size):
+                    results = self.info[start : start + self.chunk_size]
+                    await _send(writer, {"id": request_id, "results": results})
+                count = len(self.info)
+            else:
+                count = await self._stream(request, request_id, writer)
+        except Exception as error:
+            response = {"id": request_id, "error": str(error)}
+            if isinstance(error, budget.BudgetExceeded):
+                response["statistics"] = error.statistics
+            await _send(writer, response)
+            return
+        await _send(writer, {"id": request_id, "done": True, "count": count})
+
+    async def _stream(
+        self, request: dict, request_id: typing.Any, writer: asyncio.StreamWriter
+    ) -> int:
+        """
+        Executes request in the pool and sends chunks of results as the
+        worker produces them, returns number of results
+        """
+        loop = asyncio.get_running_loop()
+        results = self._manager.Queue()
+        future = loop.run_in_executor(
+            self._executor, execute_to_queue, request, results, self.chunk_size
+        )
+        while True:
+            chunk = await loop.run_in_executor(None, _next_chunk, results)
+            if chunk is None or (chunk is False and future.done()):
+                break
+            if chunk:
+                await _send(writer, {"id": request_id, "results": chunk})
+        return await future
+
+
+async def _send(writer: asyncio.StreamWriter, response: dict):
+    writer.write(json.dumps(response).encode() + b"\n")
+    await writer.drain()
+
+
+def request(
+    message: dict,
+    path: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: Optional[int] = None,
+) -> typing.Iterator[dict]:
+    """
+    Sends request to the server on Unix socket at path or on TCP host and
+    port, yields responses until the last one
+    """
+    if path is not None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.connect(path)
+    else:
+        connection = socket.create_connection((host, port))
+    with connection, connection.makefile("rb") as file:
+        connection.sendall(json.dumps(message).encode() + b"\n")
+        for line in file:
+            response = json.loads(line)
+            yield response
+            if "done" in response or "error" in response:
+                return
+
+
+def _parse_graph(spec: str) -> tuple[str, str]:
+    name, separator, path = spec.partition("=")
+    if not separator:
+        path = spec
+        name = os.path.splitext(os.path.basename(spec.rstrip("/")))[0]
+        name = name[len(DATASET_PREFIX) :] if spec.startswith(DATASET_PREFIX) else name
+    return name, path
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(
+        description="Server of RPQ, CFPQ and query language requests"
+    )
+    arg_parser.add_argument(
+        "graphs",
+        nargs="*",
+        help="graphs as name=path of DOT file or binary graph directory, "
+        "name=dataset:cfpq_data_name, name is file name if omitted",
+    )
+    arg_parser.add_argument("--socket", default=None, help="path of Unix socket")
+    arg_parser.add_argument("--host", default="127.0.0.1")
+    arg_parser.add_argument("--port", type=int, default=8765)
+    arg_parser.add_argument(
+        "--workers", type=int, default=None, help="number of worker processes"
+    )
+    arg_parser.add_argument(
+        "--directory", default=None, help="directory for converted graphs"
+    )
+    args = arg_parser.parse_args()
+    server = QueryServer(
+        dict(_parse_graph(spec) for spec in args.graphs),
+        workers=args.workers,
+        directory=args.directory,
+    )
+    try:
+        asyncio.run(server.serve(args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
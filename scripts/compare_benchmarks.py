@@ -0,0 +1,72 @@
+import argparse
+import sys
+
+import shared
+
+sys.path.append(str(shared.ROOT))
+
+from benchmarks.compare import Thresholds, compare, format_comparisons, load_results
+
+
+def _thresholds(values: list[str]) -> dict[str, float]:
+    result = {}
+    for value in values:
+        name, _, threshold = value.rpartition("=")
+        result[name] = float(threshold)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compares json reports of benchmarks and fails on regressions"
+    )
+    parser.add_argument("old", help="report of the base run")
+    parser.add_argument("new", help="report of the compared run")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="allowed relative slowdown"
+    )
+    parser.add_argument(
+        "--algorithm-threshold",
+        nargs="*",
+        default=[],
+        metavar="ALGORITHM=THRESHOLD",
+    )
+    parser.add_argument(
+        "--graph-threshold", nargs="*", default=[], metavar="GRAPH=THRESHOLD"
+    )
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument(
+        "--allow-missing",
+        action="store_true",
+        help="do not fail if cases of the base run are missing in the new run",
+    )
+    args = parser.parse_args()
+
+    old, new = load_results(args.old), load_results(args.new)
+    thresholds = Thresholds(
+        args.threshold,
+        _thresholds(args.algorithm_threshold),
+        _thresholds(args.graph_threshold),
+    )
+    comparisons = compare(old, new, thresholds, args.confidence)
+    print(format_comparisons(comparisons))
+    missing = old.keys() - new.keys()
+    for case in missing:
+        print(f"missing in new run: {case}")
+    for case in new.keys() - old.keys():
+        print(f"missing in old run: {case}")
+
+    if not comparisons:
+        print("no common cases to compare")
+        sys.exit(1)
+    if missing and not args.allow_missing:
+        print(f"{len(missing)} cases of the base run are missing in the new run")
+        sys.exit(1)
+    regressions = [comparison for comparison in comparisons if comparison.is_regression]
+    if regressions:
+        print(f"{len(regressions)} of {len(comparisons)} cases regressed")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
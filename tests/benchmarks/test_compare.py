@@ -0,0 +1,110 @@
+import json
+import pathlib
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.compare import Thresholds, compare, load_results
+
+
+def _result(algorithm, graph, times):
+    times = list(times)
+    return {
+        "algorithm": algorithm,
+        "graph": graph,
+        "query": "a*",
+        "sources": None,
+        "times": times,
+        "median": sorted(times)[len(times) // 2],
+    }
+
+
+def _write(path, results):
+    path.write_text(json.dumps({"environment": {}, "results": results}))
+    return str(path)
+
+
+@pytest.fixture
+def reports(tmp_path):
+    old = _write(
+        tmp_path / "old.json",
+        [
+            _result("rpq_tensor", "chain:10", [1.0, 1.01, 0.99, 1.0, 1.02]),
+            _result("rpq_bfs", "chain:10", [1.0, 1.01, 0.99, 1.0, 1.02]),
+            _result("cfpq_hellings", "chain:10", [1.0, 1.5, 0.7, 1.2, 0.9]),
+        ],
+    )
+    new = _write(
+        tmp_path / "new.json",
+        [
+            _result("rpq_tensor", "chain:10", [1.5, 1.51, 1.49, 1.5, 1.52]),
+            _result("rpq_bfs", "chain:10", [0.5, 0.51, 0.49, 0.5, 0.52]),
+            _result("cfpq_hellings", "chain:10", [1.2, 1.4, 0.8, 1.5, 1.0]),
+        ],
+    )
+    return old, new
+
+
+def test_compare(reports):
+    comparisons = compare(*map(load_results, reports))
+    assert [comparison.is_regression for comparison in comparisons] == [
+        True,
+        False,
+        False,
+    ]
+    assert [comparison.is_improvement for comparison in comparisons] == [
+        False,
+        True,
+        False,
+    ]
+    assert comparisons[0].ratio == pytest.approx(1.5, 0.01)
+    low, high = comparisons[0].interval
+    assert low <= comparisons[0].ratio <= high
+
+
+def test_thresholds(reports):
+    thresholds = Thresholds(0.1, {"rpq_tensor": 0.3}, {"chain:10": 0.6})
+    assert thresholds.get("rpq_tensor", "chain:10") == 0.6
+    assert thresholds.get("rpq_tensor", "grid:2,2") == 0.3
+    assert thresholds.get("rpq_bfs", "grid:2,2") == 0.1
+    comparisons = compare(*map(load_results, reports), thresholds)
+    assert not any(comparison.is_regression for comparison in comparisons)
+
+
+def test_exit_code(reports):
+    script = pathlib.Path(__file__).parents[2] / "scripts" / "compare_benchmarks.py"
+    failed = subprocess.run([sys.executable, script, *reports], capture_output=True)
+    assert failed.returncode == 1
+    assert b"REGRESSION" in failed.stdout
+    passed = subprocess.run(
+        [sys.executable, script, *reports, "--algorithm-threshold", "rpq_tensor=0.6"],
+        capture_output=True,
+    )
+    assert passed.returncode == 0
+
+
+def test_missing_cases(reports, tmp_path):
+    script = pathlib.Path(__file__).parents[2] / "scripts" / "compare_benchmarks.py"
+    old, _ = reports
+    results = json.loads(pathlib.Path(old).read_text())["results"]
+    renamed = _write(
+        tmp_path / "renamed.json",
+        [dict(result, graph="chain:11") for result in results],
+    )
+    failed = subprocess.run([sys.executable, script, old, renamed], capture_output=True)
+    assert failed.returncode == 1
+    assert b"no common cases" in failed.stdout
+    failed = subprocess.run(
+        [sys.executable, script, old, renamed, "--allow-missing"], capture_output=True
+    )
+    assert failed.returncode == 1
+
+    partial = _write(tmp_path / "partial.json", results[1:])
+    failed = subprocess.run([sys.executable, script, old, partial], capture_output=True)
+    assert failed.returncode == 1
+    assert b"missing in the new run" in failed.stdout
+    passed = subprocess.run(
+        [sys.executable, script, old, partial, "--allow-missing"], capture_output=True
+    )
+    assert passed.returncode == 0
@@ -0,0 +1,43 @@
+import pytest
+
+from benchmarks.importtime import (
+    CLI,
+    main,
+    measure_cli,
+    measure_import,
+    over_budget,
+    parse_importtime,
+)
+
+
+def test_parse_skips_header_and_other_lines():
+    modules = parse_importtime(
+        "import time: self [us] | cumulative | imported package\n"
+        "import sources directory\n"
+        "import time:        15 |         40 |     project.labeled_graph\n"
+    )
+    assert modules == {"project.labeled_graph": (15, 40)}
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "project.graph_binary",
+        "project.graph_utils",
+        "project.query_language.interpreter.interpreter",
+    ],
+)
+def test_heavy_dependencies_are_lazy(module):
+    result = measure_import(module, repeat=1)
+    assert result["lazy_imported"] == []
+    assert result["median"] > 0
+
+
+def test_cli_and_budgets(capsys):
+    result = measure_cli(repeat=1)
+    assert result["target"] == CLI and len(result["times"]) == 1
+    assert over_budget([result], {CLI: 0}) == [result]
+    assert over_budget([result], {}) == []
+    assert main(["--targets", "project.budget", "--repeat", "1"]) == 0
+    assert main(["--targets", CLI, "--repeat", "1", "--budget", "cli=0"]) == 1
+    assert "project.budget: median" in capsys.readouterr().out
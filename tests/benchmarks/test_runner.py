@@ -0,0 +1,81 @@
+import csv
+import io
+import json
+
+import pytest
+
+from benchmarks.__main__ import main
+from benchmarks.cases import ALGORITHMS, BenchmarkCase, make_cases, make_graph
+from benchmarks.runner import run_case, write_csv, write_json
+
+
+@pytest.mark.parametrize(
+    "spec, nodes, edges",
+    [
+        ("two_cycles:3,2", 6, 7),
+        ("chain:4", 5, 4),
+        ("grid:2,3", 6, 7),
+        ("random:10,20,1", 10, 20),
+        ("dot:tests/query_language/interpreter/data/example_graph.dot", 18, 19),
+    ],
+)
+def test_make_graph(spec, nodes, edges):
+    graph = make_graph(spec)
+    assert graph.number_of_nodes() == nodes
+    assert graph.number_of_edges() == edges
+
+
+def test_make_cases():
+    cases = make_cases(ALGORITHMS, ["chain:3"], ["a*"], ["S -> a S b | a b"], [1])
+    assert {case.algorithm for case in cases} == set(ALGORITHMS)
+    assert {(case.algorithm, case.query) for case in cases} == {
+        ("rpq_tensor", "a*"),
+        ("rpq_bfs", "a*"),
+        ("cfpq_hellings", "S -> a S b | a b"),
+    }
+
+
+@pytest.mark.parametrize(
+    "algorithm, query, expected",
+    [
+        ("rpq_tensor", "a a", 1),
+        ("rpq_bfs", "a a", 1),
+        ("cfpq_hellings", "S -> a S b | a b", 2),
+    ],
+)
+def test_run_case(algorithm, query, expected):
+    result = run_case(BenchmarkCase(algorithm, "worst_case:2", query, 1), 0, 2)
+    assert result["result_size"] == expected
+    assert len(result["times"]) == 2
+    assert result["min"] <= result["median"]
+    assert result["peak_rss_kb"] > 0
+
+
+def test_reports(tmp_path):
+    json_path, csv_path = tmp_path / "report.json", tmp_path / "report.csv"
+    main(
+        [
+            "--algorithms",
+            "rpq_tensor",
+            "--graphs",
+            "chain:3",
+            "--regexes",
+            "a a",
+            "--sources",
+            "1",
+            "all",
+            "--repeat",
+            "1",
+            "--no-isolate",
+            "--json",
+            str(json_path),
+            "--csv",
+            str(csv_path),
+        ]
+    )
+    report = json.loads(json_path.read_text())
+    assert "commit" in report["environment"]
+    assert [result["result_size"] for result in report["results"]] == [1, 2]
+    with open(csv_path, newline="") as file:
+        rows = list(csv.DictReader(file))
+    assert [row["sources"] for row in rows] == ["1", ""]
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+from pyformlang.regular_expression import Regex
+
+from project import graph_utils
+from project.automata import get_nondeterministic_automata_from_labeled_graph
+from project.labeled_graph import LabeledGraph
+from project.query_language.interpreter.automaton import AutomatonValue
+from project.query_language.interpreter.values import EncodedSetValue
+from project.rpq.all_pairs import (
+    finite_automata_intersection,
+    get_reachable_by_intersection_pairs,
+)
+
+
+def _graph() -> LabeledGraph:
+    return LabeledGraph.from_networkx(
+        graph_utils.create_two_cycles_graph(3, 2, ("a", "b"))
+    )
+
+
+def _without_nfa(monkeypatch):
+    def to_nfa(self):
+        raise AssertionError("pyformlang automaton is built")
+
+    monkeypatch.setattr(AutomatonValue, "to_nfa", to_nfa)
+
+
+def test_from_nfa():
+    fa = Regex("a b* | c").to_epsilon_nfa()
+    value = AutomatonValue.from_nfa(fa)
+    assert value.number_of_states == len(fa.states)
+    assert set(value.states) == {state.value for state in fa.states}
+    assert set(value.labels) == {"a", "b", "c"}
+    assert set(value.edge_set()) == {
+        (src.value, symbol.value, dst.value) for src, symbol, dst in fa
+    }
+    assert value.to_nfa() is fa
+    rebuilt = AutomatonValue(
+        value.states, value.matrices, value.start_states, value.final_states
+    )
+    assert rebuilt.to_nfa().is_equivalent_to(fa)
+    assert rebuilt.accepts("abb") and not rebuilt.accepts("cb")
+
+
+def test_from_labeled_graph(monkeypatch):
+    graph = _graph()
+    value = AutomatonValue.from_labeled_graph(graph)
+    expected = get_nondeterministic_automata_from_labeled_graph(graph)
+    assert value.to_nfa().is_equivalent_to(expected)
+    assert value.number_of_transitions() == {"a": 4, "b": 3}
+
+    _without_nfa(monkeypatch)
+    assert sorted(value.reachable_pairs()) == sorted(
+        get_reachable_by_intersection_pairs(expected)
+    )
+
+
+def test_columnar_sets(monkeypatch):
+    graph = LabeledGraph(
+        ["a", "b", "c"],
+        {
+            "a": (np.array([0, 1, 1]), np.array([1, 2, 2])),
+            "d": (np.array([2]), np.array([0])),
+        },
+    )
+    _without_nfa(monkeypatch)
+    value = AutomatonValue.from_labeled_graph(graph).with_start_states(["b"])
+    edges = value.edge_set()
+    assert isinstance(edges, EncodedSetValue) and edges.arity == 3
+    assert list(edges) == [("a", "a", "b"), ("b", "a", "c"), ("c", "d", "a")]
+    assert ("b", "a", "c") in edges and ("a", "d", "b") not in edges
+    assert len(edges.table) == 4
+    assert edges.union(EncodedSetValue.from_values([("c", "d", "a")], 3)) == edges
+    assert list(value.state_set()) == ["a", "b", "c"]
+    assert list(value.start_set()) == ["b"]
+    assert "c" in value.final_set()
+    assert set(value.label_set()) == {"a", "d"}
+
+
+def test_epsilon_edges():
+    value = AutomatonValue.from_nfa(Regex("a*").to_epsilon_nfa())
+    assert None in value.matrices
+    labels = {label for _, label, _ in value.edge_set()}
+    assert labels == {"a", "epsilon"}
+    assert value.labels == ["a"]
+
+
+def test_states_share_matrices(monkeypatch):
+    _without_nfa(monkeypatch)
+    value = AutomatonValue.from_labeled_graph(_graph())
+    changed = value.with_start_states([1, 2]).add_final_state(1)
+    assert changed.matrices is value.matrices
+    assert changed.states is value.states
+    assert [changed.states[i] for i in changed.start_states] == [1, 2]
+
+    extended = changed.add_start_state(100)
+    assert extended.number_of_states == value.number_of_states + 1
+    assert extended.states[extended.start_states[-1]] == 100
+    assert value.number_of_states == 6 and value.states.index(100) is None
+    assert all(
+        matrix.shape == (7, 7) and matrix.nnz == value.matrices[label].nnz
+        for label, matrix in extended.matrices.items()
+    )
+
+
+@pytest.mark.parametrize("regex", ["a* b", "b b", "a | b*"])
+def test_intersection(monkeypatch, regex):
+    graph = _graph()
+    query = Regex(regex).to_epsilon_nfa().minimize()
+    graph_fa = get_nondeterministic_automata_from_labeled_graph(graph, [0], [1, 2])
+    expected = finite_automata_intersection(query, graph_fa)
+
+    query_value = AutomatonValue.from_nfa(query)
+    graph_value = AutomatonValue.from_labeled_graph(graph)
+    graph_value = graph_value.with_start_states([0]).with_final_states([1, 2])
+    _without_nfa(monkeypatch)
+    intersection = query_value.intersection(graph_value)
+    assert set(intersection.states) == {state.value for state in expected.states}
+    assert sorted(intersection.reachable_pairs()) == sorted(
+        get_reachable_by_intersection_pairs(expected)
+    )
+    monkeypatch.undo()
+    assert intersection.to_nfa().is_equivalent_to(expected)
+
+
+def test_intersection_without_common_labels():
+    query = AutomatonValue.from_nfa(Regex("c").to_epsilon_nfa().minimize())
+    intersection = query.intersection(AutomatonValue.from_labeled_graph(_graph()))
+    assert intersection.matrices == {}
+    assert intersection.reachable_pairs() == []
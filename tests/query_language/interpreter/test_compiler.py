@@ -0,0 +1,99 @@
+import io
+
+import pytest
+from antlr4 import *
+
+from project.query_language.grammar.QueryLanguageLexer import QueryLanguageLexer
+from project.query_language.grammar.QueryLanguageParser import QueryLanguageParser
+from project.query_language.interpreter.compiler import compile_program
+from project.query_language.interpreter.exceptions import (
+    InterpretException,
+    UnknownVariable,
+)
+from project.query_language.interpreter.interpret_visitor import InterpretVisitor
+from project.query_language.interpreter.types import *
+
+
+def _parse(script: str):
+    lexer = QueryLanguageLexer(InputStream(script))
+    parser = QueryLanguageParser(CommonTokenStream(lexer))
+    return parser.prog()
+
+
+@pytest.mark.parametrize(
+    "script",
+    [
+        "a = [ 1, 2, 3 ]\nb = map ( \\el -> [ el, a ] ) ( a )\n",
+        "a = [ 0..10 ]\nb = filter ( \\el -> ( el ) in { 1, 2 } ) ( a )\n",
+        "el = 5\nb = map ( \\el -> el ) ( [ 1, 2 ] )\nc = el\n",
+        "a = [ 1, 2 ]\nb = map ( \\x -> map ( \\y -> [ x, y ] ) ( a ) ) ( a )\n",
+        'a = ( smb "a" ++ smb "b" )\nb = getStart ( a )\nc = getLabels ( a )\n',
+        "a = [ 1, 2 ]\nb = ( a )[ 1 ]\nc = ( 3 ) in a\n",
+        "a = filter ( \\x -> ( ( x )[ 0 ] ) in { 1, 3 } ) ( map ( \\x -> [ x ] ) ( [ 0..5 ] ) )\n",
+        "a = map ( \\x -> [ x ] ) ( filter ( \\x -> True ) ( ( { 0..5 } ) ) )\n",
+        "a = [ 1, 2 ]\nb = filter ( \\x -> ( x ) in a ) ( filter ( \\y -> True ) ( a ) )\n",
+    ],
+)
+def test_same_values_as_visitor(script):
+    tree = _parse(script)
+    visitor = InterpretVisitor()
+    visitor.visit(tree)
+    variables = compile_program(tree).run(io.StringIO())
+
+    for name, expr in variables.items():
+        expected = visitor._get_value(name)
+        assert expected is not None
+        assert expr.value == expected.value
+        assert expr.type == expected.type
+
+
+def test_lambda_argument_shadows_variable():
+    variables = compile_program(
+        _parse("el = 5\nb = map ( \\el -> [ el ] ) ( [ 1, 2 ] )\n")
+    ).run(io.StringIO())
+    assert variables["el"].value == 5
+    assert variables["b"].value == ((1,), (2,))
+
+
+def test_recursive_declaration():
+    variables = compile_program(_parse('q = *( ( smb "type" | q ) )\n')).run(
+        io.StringIO()
+    )
+    assert isinstance(variables["q"].type, RSMType)
+
+
+def test_program_runs_many_times():
+    program = compile_program(_parse("a = { 0..3 }\nprint ( 1 ) in a\n"))
+    for _ in range(3):
+        output = io.StringIO()
+        program.run(output)
+        assert output.getvalue() == "True\n"
+
+
+def test_errors_raised_after_previous_statements():
+    output = io.StringIO()
+    program = compile_program(_parse("print 1\na = b\nb = 1\n"))
+    with pytest.raises(UnknownVariable):
+        program.run(output)
+    assert output.getvalue() == "1\n"
+
+    with pytest.raises(InterpretException):
+        compile_program(_parse("a = 1\na = 2\n")).run(io.StringIO())
+
+
+def test_pipeline_is_fused():
+    program = compile_program(
+        _parse(
+            "a = filter ( \\x -> ( x ) in { 3, 5 } ) "
+            "( map ( \\x -> x ) ( [ 0..1000000 ] ) )\n"
+        )
+    )
+    # Range source of the pipeline is not materialized as a constant
+    assert program.run(io.StringIO())["a"].value == (3, 5)
+
+
+def test_pipeline_errors():
+    with pytest.raises(InterpretException):
+        compile_program(
+            _parse("a = filter ( \\x -> 1 ) ( map ( \\x -> x ) ( [ 0..3 ] ) )\n")
+        ).run(io.StringIO())
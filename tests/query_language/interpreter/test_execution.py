@@ -0,0 +1,127 @@
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from project import budget
+from project.query_language.interpreter.exceptions import (
+    BudgetException,
+    InterpretException,
+)
+from project.query_language.interpreter.execution import (
+    ExecutionContext,
+    apply_lambda_chunk,
+    initialize_worker,
+)
+from project.query_language.interpreter.expression import Expression
+from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.program_cache import ProgramCache
+from project.query_language.interpreter.types import IntType
+
+
+def _execute(script: str, **kwargs) -> str:
+    output = io.StringIO()
+    Interpreter(file=output, cache=ProgramCache(), **kwargs).execute_script(script)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize(
+    "script",
+    [
+        "a = [ 0..20 ]\nprint map ( \\x -> [ x, a ] ) ( a )\n",
+        "a = { 3, 5 }\nprint filter ( \\x -> ( x ) in a ) ( [ 0..20 ] )\n",
+        "print map ( \\x -> map ( \\y -> [ x, y ] ) ( [ 0..3 ] ) ) ( [ 0..5 ] )\n",
+        'print map ( \\x -> getReachable ( ( smb x ++ smb "b" ) ) ) ( [ "a", "c" ] )\n',
+        "print map ( \\x -> x ) ( [ 1 ] )\n",
+    ],
+)
+def test_parallel_output_is_same(script):
+    expected = _execute(script)
+    assert _execute(script, workers=2, always_parallel=True) == expected
+    assert _execute(script, workers=2) == expected
+
+
+def test_parallel_errors():
+    with pytest.raises(InterpretException) as error:
+        _execute(
+            "a = 1\nb = filter ( \\x -> 1 ) ( [ 0..5 ] )\n",
+            workers=2,
+            always_parallel=True,
+        )
+    assert error.value.statement == 2
+
+
+def test_heavy_lambdas():
+    program = ProgramCache().get(
+        "a = map ( \\x -> x ) ( [ 1 ] )\n"
+        'b = map ( \\x -> getReachable ( smb x ) ) ( [ "a" ] )\n'
+    )
+    assert [lambda_info.is_heavy for lambda_info in program.lambdas] == [False, True]
+
+
+def test_statement_budget():
+    script = 'a = smb "a"\nprint getReachable ( ( a & a ) )\n'
+    assert _execute(script, time_limit=60, memory_limit=1 << 40) == _execute(script)
+    with pytest.raises(BudgetException) as error:
+        _execute(script, time_limit=0)
+    assert error.value.statement == 1
+    assert "Time limit" in error.value.msg
+    assert error.value.statistics["engine"] == "interpreter"
+
+
+def test_unlimited_statements_are_not_checked(monkeypatch):
+    def limited(limit):
+        raise AssertionError("budget is installed")
+
+    monkeypatch.setattr(budget, "limited", limited)
+    assert _execute("print 1\n") == "1\n"
+    with pytest.raises(AssertionError):
+        _execute("print 1\n", cancellable=True)
+
+
+def test_cancel():
+    interpreter = Interpreter(file=io.StringIO(), cancellable=True)
+    interpreter.cancel()
+    interpreter.execute_script("print 1\n")
+    assert interpreter.file.getvalue() == "1\n"
+    with pytest.raises(ValueError):
+        Interpreter().cancel()
+
+
+def _chunk(source: str, time_limit=None, memory_limit=None):
+    program = ProgramCache().get(source)
+    elements = [Expression(i, IntType()) for i in range(3)]
+    return program, (source, 0, {}, elements, time_limit, memory_limit)
+
+
+def test_lambda_chunk_budget():
+    _, chunk = _chunk("a = map ( \\x -> x ) ( [ 0..3 ] )\n")
+    assert [expr.value for expr in apply_lambda_chunk(chunk)] == [0, 1, 2]
+    _, chunk = _chunk("a = map ( \\x -> x ) ( [ 0..3 ] )\n", 60, 1 << 40)
+    assert [expr.value for expr in apply_lambda_chunk(chunk)] == [0, 1, 2]
+    _, chunk = _chunk("a = map ( \\x -> x ) ( [ 0..3 ] )\n", 0)
+    with pytest.raises(budget.BudgetExceeded) as error:
+        apply_lambda_chunk(chunk)
+    assert error.value.statistics["engine"] == "lambda"
+
+
+@pytest.mark.parametrize("cancelled", [False, True])
+def test_workers_are_limited(cancelled):
+    source = "a = map ( \\x -> x ) ( [ 0..3 ] )\n"
+    program, (_, _, _, elements, _, _) = _chunk(source)
+    token = multiprocessing.Event()
+    with ProcessPoolExecutor(
+        2, initializer=initialize_worker, initargs=(token,)
+    ) as executor:
+        context = ExecutionContext(executor, 2, True)
+        if cancelled:
+            token.set()
+            limit = budget.Budget(token=token)
+        else:
+            limit = budget.Budget(time_limit=0)
+        with budget.limited(limit):
+            with pytest.raises(budget.BudgetExceeded) as error:
+                list(context.apply(source, program.lambdas[0], [], elements))
+    assert error.value.statistics["engine"] == "lambda"
+    assert ("cancelled" in error.value.reason) == cancelled
@@ -0,0 +1,106 @@
+import io
+
+import pytest
+from antlr4 import InputStream
+
+from project import instrumentation
+from project.query_language.grammar.parser import parse_stream
+from project.query_language.interpreter.exceptions import InterpretException
+from project.query_language.interpreter.interpret_visitor import InterpretVisitor
+from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.profiler import Profiler
+from project.query_language.interpreter.program_cache import ProgramCache
+
+DECLARATIONS = (
+    'g = load "tests/query_language/interpreter/data/example_graph.dot"\n'
+    'q = ( smb "a" ++ *smb "b" )\n'
+)
+
+
+def _visit(script: str) -> str:
+    output = io.StringIO()
+    InterpretVisitor(output).visit(parse_stream(InputStream(script)))
+    return output.getvalue()
+
+
+def _execute(script: str) -> str:
+    output = io.StringIO()
+    Interpreter(file=output, cache=ProgramCache()).execute_script(script)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("run", [_visit, _execute])
+def test_explain(run):
+    output = run(DECLARATIONS + "explain getReachable ( ( q & g ) )\n")
+    assert output.splitlines() == [
+        "getReachable: Set, elements 324 "
+        "[tensor RPQ: transitive closure of 36x36 matrix, 6 squarings]",
+        "  intersect: FA, states 36, transitions 19, starts 18, finals 18 "
+        "[Kronecker product of boolean decompositions]",
+        "    q (variable): FA, states 2, transitions 2, starts 1, finals 1",
+        "    g (variable): FA, states 18, transitions 19, starts 18, finals 18",
+    ]
+
+
+@pytest.mark.parametrize("run", [_visit, _execute])
+def test_explain_does_not_evaluate(run):
+    output = run('explain getReachable ( load "missing.dot" )\n')
+    assert output.splitlines() == [
+        "getReachable: Set [tensor RPQ: transitive closure of boolean matrix]",
+        "  load missing.dot: FA [streaming DOT reader, file not found]",
+    ]
+
+
+@pytest.mark.parametrize("run", [_visit, _execute])
+def test_explain_analyze(run):
+    output = run(DECLARATIONS + "explain analyze getReachable ( ( q & g ) )\n")
+    lines = output.splitlines()
+    assert lines[4].startswith("actual: Set, elements 18, ")
+    assert any(line.startswith("  rpq.kron: 1 calls") for line in lines)
+    assert "  rpq.closure.iterations: 6" in lines
+    nnz = next(line for line in lines if line.startswith("  rpq.closure.nnz: "))
+    assert len(nnz.split(" -> ")) == 6
+
+
+@pytest.mark.parametrize("run", [_visit, _execute])
+def test_explain_lambda(run):
+    output = run(
+        "s = { 1, 2 }\nexplain analyze filter ( \\x -> ( x ) in s ) ( [ 0..10 ] )\n"
+    )
+    assert output.splitlines() == [
+        "filter: List, elements 10 [lambda is evaluated for each of 10 elements]",
+        "  list range: List, elements 10",
+        "  in: Bool",
+        "    x (lambda argument): ?",
+        "    s (variable): Set, elements 2",
+        output.splitlines()[5],
+    ]
+    assert output.splitlines()[5].startswith("actual: List, elements 2, ")
+
+
+def test_explain_analyze_with_profiler():
+    profiler = Profiler()
+    output = io.StringIO()
+    Interpreter(file=output, cache=ProgramCache(), profiler=profiler).execute_script(
+        DECLARATIONS
+        + "r = getReachable ( ( q & g ) )\n"
+        + "explain analyze getReachable ( ( q & g ) )\n"
+    )
+    lines = output.getvalue().splitlines()
+    assert "  rpq.closure.iterations: 6" in lines
+    assert any(line.startswith("  rpq.kron: 1 calls") for line in lines)
+    assert {"rpq.intersection", "rpq.closure"} <= profiler.statements[3].engine.keys()
+    stacks = io.StringIO()
+    profiler.write_collapsed(stacks)
+    assert "explain analyze getReachable ( ( q & g ) );rpq.intersection" in (
+        stacks.getvalue()
+    )
+    assert instrumentation.current() is None
+
+
+@pytest.mark.parametrize("run", [_visit, _execute])
+def test_misformed_regex(run):
+    assert run('explain smb "."\n') == 'smb ".": FA\n'
+    for script in ['print smb "."\n', 'explain analyze smb "."\n']:
+        with pytest.raises(InterpretException, match="Misformed regex"):
+            run(script)
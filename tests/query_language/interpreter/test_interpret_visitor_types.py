@@ -91,6 +91,35 @@ def test_containers():
         assert expr.type.__class__ == expected_type_class
 
 
+def test_homogeneous_containers():
+    script = (
+        "r = [ 0..1000 ]\n"
+        "r_set = { 0..1000 }\n"
+        "m = map ( \\x -> [ x ] ) ( r )\n"
+        "f = filter ( \\x -> ( x ) in { 1, 2 } ) ( r_set )\n"
+        "l = [ 1, 2, 3 ]\n"
+        "s = ( r_set | { 1, 2 } )\n"
+        'h = [ 1, "a" ]\n'
+    )
+    input_stream = InputStream(script)
+    lexer = QueryLanguageLexer(input_stream)
+    stream = CommonTokenStream(lexer)
+    parser = QueryLanguageParser(stream)
+    tree = parser.prog()
+    visitor = InterpretVisitor()
+    visitor.visit(tree)
+
+    assert visitor._get_value("r").type == ListType(elem=IntType())
+    assert visitor._get_value("r").type.params == ()
+    assert visitor._get_value("r_set").type == SetType(elem=IntType())
+    assert visitor._get_value("m").type == ListType(elem=ListType(elem=IntType()))
+    assert visitor._get_value("f").type == ListType(elem=IntType())
+    assert visitor._get_value("l").type == ListType([IntType()] * 3)
+    assert visitor._get_value("s").type == SetType(elem=IntType())
+    assert visitor._get_value("h").type == ListType([IntType(), StringType()])
+    assert visitor._get_value("h").type.element_type(1) == StringType()
+
+
 def test_lambdas():
     variables = [
         ("a", "[ 1, 2, 3, 4, 5, 6 ]", ListType),
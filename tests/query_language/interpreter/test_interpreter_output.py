@@ -26,8 +26,8 @@ from project.query_language.interpreter.interpreter import Interpreter
         'q2 = ( smb "sub_class_of" ++ q2 )\n',
         'res1 = ( ( smb "a" ) & ( smb "b" ) )\n',
         'res2 = ( ( ( smb "a" ) & ( smb "b" ) ) ++ ( smb "c" ) )\n',
-        'vertices1 = filter ( \\v -> ( v ) in { 1 } ) ( map ( \\edge -> ( ( edge )[ 0 ] )[ 0 ] ) ( getEdges ( smb "a" ) ) )\n',
-        'vertices2 = filter ( \\v -> ( v ) in { 1 } ) ( map ( \\edge -> ( ( edge )[ 0 ] )[ 0 ] ) ( getEdges ( smb "a" ) ) )\n',
+        'vertices1 = filter ( \\v -> ( v ) in { 1 } ) ( map ( \\edge -> ( edge )[ 0 ] ) ( getEdges ( smb "a" ) ) )\n',
+        'vertices2 = filter ( \\v -> ( v ) in { 1 } ) ( map ( \\edge -> ( edge )[ 0 ] ) ( getEdges ( smb "a" ) ) )\n',
         "vertices = ( { 1 } & { 1, 2 } )\n",
     ],
 )
@@ -647,3 +647,39 @@ def test_output_fa(script, expected, capsys):
     captured = capsys.readouterr()
     assert captured.out == expected
     assert captured.err == ""
+
+
+@pytest.mark.parametrize(
+    "script, expected",
+    [
+        ('print map ( \\e -> e ) ( getEdges ( smb "ab" ) )', "(('0', 'ab', '1'),)"),
+        (
+            'print map ( \\e -> ( e )[ 1 ] ) ( getEdges ( smb "ab" ) )',
+            "('ab',)",
+        ),
+        (
+            'print filter ( \\e -> True ) ( getEdges ( smb "ab" ) )',
+            "(('0', 'ab', '1'),)",
+        ),
+        (
+            'print filter ( \\v -> ( v ) in { "1" } ) ( getVertices ( smb "ab" ) )',
+            "('1',)",
+        ),
+        (
+            'print map ( \\p -> ( p )[ 0 ] ) ( getReachable ( smb "ab" ) )',
+            "('0',)",
+        ),
+        (
+            'print filter ( \\p -> ( ( p )[ 1 ] ) in { "1" } ) '
+            '( getReachable ( smb "ab" ) )',
+            "(('0', '1'),)",
+        ),
+    ],
+)
+@pytest.mark.parametrize("workers", [None, 2])
+def test_output_map_filter_automata_results(script, expected, workers, capsys):
+    interpreter = Interpreter(workers=workers, always_parallel=True)
+    interpreter.execute_script(script + "\n")
+    captured = capsys.readouterr()
+    assert captured.out == expected + "\n"
+    assert captured.err == ""
@@ -0,0 +1,85 @@
+import ast
+import io
+import os
+import shutil
+
+import pytest
+
+from project import graph_utils
+from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.loaded_graph_cache import (
+    LoadedGraphCache,
+    default_loaded_graph_cache,
+)
+from project.query_language.interpreter.program_cache import ProgramCache
+
+EXAMPLE_GRAPH = "tests/query_language/interpreter/data/example_graph.dot"
+
+
+@pytest.fixture
+def graph_path(tmp_path):
+    path = str(tmp_path / "graph.dot")
+    shutil.copy(EXAMPLE_GRAPH, path)
+    return path
+
+
+def test_graph_is_loaded_once(graph_path):
+    cache = LoadedGraphCache()
+    first = cache.get(graph_path)
+    assert cache.get(os.path.relpath(graph_path)) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first.graph.number_of_nodes == len(first.fa.states)
+
+
+def test_changed_file_is_loaded_again(graph_path):
+    cache = LoadedGraphCache()
+    first = cache.get(graph_path)
+    graph_utils.create_two_cycles_graph_and_save(3, 2, ("a", "b"), graph_path)
+    second = cache.get(graph_path)
+    assert second is not first
+    assert second.graph.number_of_nodes == 6
+    assert cache.size == second.size
+
+
+def test_eviction(graph_path, tmp_path):
+    other_path = str(tmp_path / "other.dot")
+    graph_utils.create_two_cycles_graph_and_save(3, 2, ("a", "b"), other_path)
+    sizes = LoadedGraphCache()
+    size = sizes.get(graph_path).size
+    cache = LoadedGraphCache(max_bytes=size + sizes.get(other_path).size - 1)
+    cache.get(graph_path)
+    cache.get(other_path)
+    assert list(cache.graphs) == [other_path]
+    assert cache.size == cache.graphs[other_path][1].size
+
+    small = LoadedGraphCache(max_bytes=size - 1)
+    small.get(graph_path)
+    assert small.graphs == {} and small.size == 0
+
+
+def test_set_start_does_not_change_cached_graph(graph_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    output = io.StringIO()
+    Interpreter(file=output, cache=ProgramCache()).execute_script(
+        'g = load "graph.dot"\n'
+        'h = addFinal ( setStart ( g ) ( { "1" } ) ) ( "100" )\n'
+        "print getStart ( h )\n"
+        'print getStart ( load "graph.dot" )\n'
+        "print getVertices ( g )\n"
+    )
+    start, loaded_start, vertices = output.getvalue().splitlines()
+    assert start == "('1',)"
+    assert set(ast.literal_eval(loaded_start)) == set(ast.literal_eval(vertices))
+    cached = default_loaded_graph_cache.get(graph_path).fa
+    assert cached.start_states == cached.states == cached.final_states
+
+
+def test_resident_graph(graph_path):
+    cache = LoadedGraphCache()
+    automaton = cache.get(graph_path).automaton
+    cache.add("example", lambda: automaton)
+    assert cache.automaton("example") is automaton
+    assert cache.automaton(graph_path) is automaton
+    assert cache.size == cache.get(graph_path).size
+    with pytest.raises(OSError):
+        cache.automaton("other")
@@ -0,0 +1,96 @@
+import io
+import json
+import tracemalloc
+
+import pytest
+
+from project.query_language.interpreter.expression import Expression
+from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.printer import write_expression
+from project.query_language.interpreter.program_cache import ProgramCache
+from project.query_language.interpreter.types import *
+from project.query_language.interpreter.values import EncodedSetValue, SetValue
+
+
+class CountingFile:
+    def __init__(self):
+        self.writes = []
+
+    def write(self, text: str):
+        self.writes.append(len(text))
+
+
+def _pairs(number: int) -> Expression:
+    values = EncodedSetValue.from_values(
+        ((str(i), f"{i};\t{i + 1}") for i in range(number)), 2
+    )
+    return Expression(values, SetType())
+
+
+VALUES = [
+    Expression(1, IntType()),
+    Expression("a", StringType()),
+    Expression(True, BoolType()),
+    Expression((), ListType([])),
+    Expression((1,), ListType([IntType()])),
+    Expression(SetValue({"a": StringType()}), SetType()),
+    Expression(SetValue({(1, "b"): None, 2: IntType()}), SetType()),
+    _pairs(100),
+]
+
+
+@pytest.mark.parametrize("expr", VALUES)
+@pytest.mark.parametrize("buffer_size", [1, 16, 64 * 1024])
+def test_repr_is_str_of_value(expr, buffer_size):
+    output = io.StringIO()
+    write_expression(output, expr, buffer_size=buffer_size)
+    assert output.getvalue() == str(expr) + "\n"
+
+
+def test_buffer():
+    output = CountingFile()
+    write_expression(output, _pairs(1000), buffer_size=1024)
+    assert len(output.writes) > 1
+    assert max(output.writes) < 1024 + 100
+
+
+def test_ndjson():
+    output = io.StringIO()
+    write_expression(output, _pairs(3), "ndjson")
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert lines == [["0", "0;\t1"], ["1", "1;\t2"], ["2", "2;\t3"]]
+    output = io.StringIO()
+    write_expression(output, Expression(5, IntType()), "ndjson")
+    assert output.getvalue() == "5\n"
+
+
+def test_tsv():
+    output = io.StringIO()
+    write_expression(output, _pairs(2), "tsv")
+    assert output.getvalue() == "0\t0;\\t1\n1\t1;\\t2\n"
+    output = io.StringIO()
+    write_expression(output, Expression((1, (2, 3)), ListType()), "tsv")
+    assert output.getvalue() == "1\n2\t3\n"
+
+
+def test_memory_does_not_depend_on_size():
+    expr = _pairs(200000)
+    tracemalloc.start()
+    write_expression(CountingFile(), expr)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert peak < 2 * 1024 * 1024
+    assert peak < len(str(expr)) / 4
+
+
+@pytest.mark.parametrize("workers", [None, 2])
+def test_interpreter_output_format(workers):
+    output = io.StringIO()
+    Interpreter(
+        file=output, cache=ProgramCache(), workers=workers, output_format="ndjson"
+    ).execute_script(
+        'print map ( \\x -> [ x, "a" ] ) ( [ 1..3 ] )\nprint smb "a"\nprint 3\n'
+    )
+    assert output.getvalue().splitlines() == ['[1, "a"]', '[2, "a"]', '"FAType"', "3"]
+    with pytest.raises(ValueError):
+        Interpreter(output_format="xml")
@@ -0,0 +1,59 @@
+import io
+
+import pytest
+
+from project import instrumentation
+from project.query_language.interpreter.exceptions import InterpretException
+from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.profiler import Profiler
+from project.query_language.interpreter.program_cache import ProgramCache
+
+SCRIPT = (
+    'g = load "tests/query_language/interpreter/data/example_graph.dot"\n'
+    'q = ( smb "a" ++ smb "b" )\n'
+    "r = getReachable ( ( q & g ) )\n"
+    "print r\n"
+)
+
+
+def _profile(script: str) -> Profiler:
+    profiler = Profiler()
+    Interpreter(
+        file=io.StringIO(), cache=ProgramCache(), profiler=profiler
+    ).execute_script(script)
+    return profiler
+
+
+def test_statements():
+    profiler = _profile(SCRIPT)
+    assert [profile.number for profile in profiler.statements] == [1, 2, 3, 4]
+    assert profiler.statements[3].text == "print r"
+    assert all(
+        profile.wall >= 0 and profile.cpu >= 0 for profile in profiler.statements
+    )
+    assert "graph.load" in profiler.statements[0].engine
+    assert {"rpq.intersection", "rpq.closure"} <= profiler.statements[2].engine.keys()
+    assert profiler.statements[2].peak_memory > 0
+    assert instrumentation.current() is None
+
+
+def test_outputs():
+    profiler = _profile(SCRIPT)
+    table = profiler.format_table().splitlines()
+    assert len(table) == 5
+    assert table[4].endswith("print r")
+    output = io.StringIO()
+    profiler.write_collapsed(output)
+    stacks = dict(line.rsplit(" ", 1) for line in output.getvalue().splitlines())
+    stack = "statement 3: r = getReachable ( ( q & g ) );rpq.intersection;rpq.kron"
+    assert stack in stacks
+    assert all(int(value) > 0 for value in stacks.values())
+
+
+def test_failed_statement():
+    profiler = Profiler()
+    with pytest.raises(InterpretException):
+        Interpreter(
+            file=io.StringIO(), cache=ProgramCache(), profiler=profiler
+        ).execute_script("a = 1\nb = ( a & a )\n")
+    assert [profile.number for profile in profiler.statements] == [1, 2]
@@ -0,0 +1,39 @@
+import io
+import os
+
+import pytest
+
+from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.program_cache import ProgramCache
+
+
+def test_program_compiled_once():
+    cache = ProgramCache()
+    script = "a = [ 1, 2 ]\nprint a\n"
+    assert cache.get(script) is cache.get(script)
+    assert cache.get(script) is not cache.get(script + "print a\n")
+
+
+def test_memory_cache_eviction():
+    cache = ProgramCache(max_size=2)
+    first = cache.get("a = 1\n")
+    cache.get("a = 2\n")
+    cache.get("a = 3\n")
+    assert len(cache.programs) == 2
+    assert cache.get("a = 1\n") is not first
+
+
+def test_disk_cache(tmp_path):
+    script = 'a = map ( \\el -> [ el, "a" ] ) ( [ 0..3 ] )\nprint a\n'
+    ProgramCache(directory=str(tmp_path)).get(script)
+    assert len(os.listdir(tmp_path)) == 1
+
+    output = io.StringIO()
+    interpreter = Interpreter(output, ProgramCache(directory=str(tmp_path)))
+    interpreter.execute_script(script)
+    assert output.getvalue() == "((0, 'a'), (1, 'a'), (2, 'a'))\n"
+
+
+def test_parse_error():
+    with pytest.raises(Exception):
+        ProgramCache().get("g = =0\n")
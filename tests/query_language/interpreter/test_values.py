@@ -0,0 +1,65 @@
+import pytest
+
+from project.query_language.interpreter.expression import Expression
+from project.query_language.interpreter.types import *
+from project.query_language.interpreter.values import EncodedSetValue, SetValue
+
+
+def test_set_value():
+    value = SetValue.from_expressions(
+        [
+            Expression(1, IntType()),
+            Expression("a", StringType()),
+            Expression(1, IntType()),
+            Expression((1, 2), ListType([IntType(), IntType()])),
+        ]
+    )
+    assert list(value) == [1, "a", (1, 2)]
+    assert list(value.types()) == [
+        IntType(),
+        StringType(),
+        ListType([IntType(), IntType()]),
+    ]
+    assert 1 in value
+    assert (1, 2) in value
+    assert 2 not in value
+    assert str(value) == "(1, 'a', (1, 2))"
+
+
+def test_set_value_operations():
+    left = SetValue({1: IntType(), 2: IntType(), 3: IntType()})
+    right = SetValue({2: IntType(), 4: IntType()})
+    assert set(left.union(right)) == {1, 2, 3, 4}
+    assert set(left.intersection(right)) == {2}
+    assert left.union(right) == right.union(left)
+    assert {left: 1}[SetValue({3: IntType(), 2: IntType(), 1: IntType()})] == 1
+
+
+@pytest.mark.parametrize("arity", [1, 2, 3])
+def test_encoded_set_value(arity):
+    values = [tuple(f"{i + j}" for j in range(arity)) for i in range(10)]
+    if arity == 1:
+        values = [value[0] for value in values]
+    value = EncodedSetValue.from_values(values + values[:3], arity)
+    assert len(value) == 10
+    assert set(value) == set(values)
+    assert all(el in value for el in values)
+    assert "100" not in value
+    assert ("100",) * arity not in value
+    assert value == SetValue({el: None for el in values})
+
+
+def test_encoded_set_value_operations():
+    left = EncodedSetValue.from_values([("a", "b"), ("b", "c"), ("c", "d")], 2)
+    right = EncodedSetValue.from_values([("c", "d"), ("d", "e")], 2)
+    union = left.union(right)
+    assert isinstance(union, EncodedSetValue)
+    assert set(union) == {("a", "b"), ("b", "c"), ("c", "d"), ("d", "e")}
+    assert ("d", "e") in union
+    intersection = left.intersection(right)
+    assert isinstance(intersection, EncodedSetValue)
+    assert set(intersection) == {("c", "d")}
+
+    mixed = left.union(SetValue({1: IntType()}))
+    assert set(mixed) == {("a", "b"), ("b", "c"), ("c", "d"), 1}
+    assert set(right.intersection(SetValue({("d", "e"): None}))) == {("d", "e")}
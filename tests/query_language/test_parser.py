@@ -1,3 +1,5 @@
+import json
+
 import pytest
 from networkx.drawing.nx_pydot import read_dot
 from networkx.utils.misc import graphs_equal
@@ -39,6 +41,8 @@ from project.query_language.grammar.parser import *
         "vertices2 = filter ( \\v -> ( v ) in s ) ( map ( \\edge -> ( ( edge )[ 0 ] )[ 0 ] ) ( getEdges ( res2 ) ) )\n",
         "vertices = ( vertices1 & vertices2 )\n",
         "print vertices\n",
+        "explain ( g & q1 )\n",
+        "explain analyze getReachable ( res1 )\n",
     ],
 )
 def test_check_script_positive(script):
@@ -54,6 +58,7 @@ def test_check_script_positive(script):
         "g = /aaa\n",
         "g = load a/a\n",
         "print ~~~\n",
+        "explain\n",
         "g_1 += 0\n",
         "-g_112 = 0\n",
         "g_112 = { 0, test_script, 2 ]\n",
@@ -83,18 +88,33 @@ def test_check_script_from_file_positive():
     assert check_script_correct(script)
 
 
-def test_export_tree_to_dot():
+def test_export_tree_to_dot(tmp_path):
     script_path = "tests/query_language/data/test_script"
-    result_path = "tests/query_language/data/result.dot"
+    result_path = str(tmp_path / "result.dot")
     expected_path = "tests/query_language/data/expected.dot"
     with open(script_path, "r", newline="") as script_file:
         export_script_to_dot(script_file.read(), result_path)
     assert graphs_equal(read_dot(expected_path), read_dot(result_path))
 
 
-def test_export_tree_from_file_to_dot():
+def test_export_tree_from_file_to_dot(tmp_path):
     script_path = "tests/query_language/data/test_script"
-    result_path = "tests/query_language/data/result.dot"
+    result_path = str(tmp_path / "result.dot")
     expected_path = "tests/query_language/data/expected.dot"
     export_script_file_to_dot(script_path, result_path)
     assert graphs_equal(read_dot(expected_path), read_dot(result_path))
+
+
+def test_serialized_tree_restores():
+    script_path = "tests/query_language/data/test_script"
+    tree = parse_stream(FileStream(script_path))
+    data = json.loads(json.dumps(serialize_tree(tree)))
+    restored = deserialize_tree(data)
+    assert restored.toStringTree(recog=QueryLanguageParser) == tree.toStringTree(
+        recog=QueryLanguageParser
+    )
+    assert restored.getText() == tree.getText()
+
+
+def test_parse_stream_negative():
+    assert parse_stream(InputStream("g = =0\n")) is None
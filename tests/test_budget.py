@@ -0,0 +1,93 @@
+import threading
+
+import pytest
+from pyformlang.cfg import CFG, Variable
+from pyformlang.regular_expression import Regex
+
+from project import budget, graph_utils
+from project.budget import Budget, BudgetExceeded
+from project.cfpq import hellings, matrix
+from project.rpq.all_pairs import regular_query_to_graph
+from project.rpq.multiple_sources import multiple_sources_regular_query_for_graph
+
+
+def _graph():
+    return graph_utils.create_two_cycles_graph(3, 2, ("a", "b"))
+
+
+def test_unlimited_check():
+    limit = Budget()
+    limit.check("test")
+    limit.check("test")
+    assert limit.checks == 2
+    assert not limit.cancelled
+
+
+def test_cancel_with_shared_token():
+    token = threading.Event()
+    first, second = Budget(token=token), Budget(token=token)
+    first.cancel()
+    assert second.cancelled
+    with pytest.raises(BudgetExceeded, match="cancelled"):
+        second.check("test")
+
+
+def test_time_limit_statistics():
+    with pytest.raises(BudgetExceeded) as error:
+        Budget(time_limit=-1).check("test", iteration=3)
+    assert error.value.statistics["engine"] == "test"
+    assert error.value.statistics["iteration"] == 3
+    assert "Time limit" in str(error.value)
+
+
+def test_memory_limit():
+    Budget(memory_limit=1 << 40).check("test")
+    with pytest.raises(BudgetExceeded, match="Memory limit"):
+        Budget(memory_limit=-1).check("test")
+
+
+def test_limited_restores_previous():
+    assert budget.current() is None
+    outer, inner = Budget(), Budget()
+    with budget.limited(outer):
+        with budget.limited(inner):
+            assert budget.current() is inner
+        assert budget.current() is outer
+    assert budget.current() is None
+
+
+@pytest.mark.parametrize(
+    "query,engine",
+    [
+        (
+            lambda graph: regular_query_to_graph(
+                Regex("a* b"), graph, graph.nodes, graph.nodes
+            ),
+            "rpq.closure",
+        ),
+        (
+            lambda graph: multiple_sources_regular_query_for_graph(
+                Regex("a* b"), graph, [0], graph.nodes, True
+            ),
+            "rpq.bfs",
+        ),
+        (
+            lambda graph: hellings.cf_query_to_graph(
+                CFG.from_text("S -> a S b | a b"), graph, Variable("S"), {0}, {0}
+            ),
+            "cfpq.hellings",
+        ),
+        (
+            lambda graph: matrix.cf_query_to_graph(
+                CFG.from_text("S -> a S b | a b"), graph, Variable("S"), {0}, {0}
+            ),
+            "cfpq.matrix",
+        ),
+    ],
+)
+def test_engines_stop(query, engine):
+    with budget.limited(Budget(time_limit=-1)):
+        with pytest.raises(BudgetExceeded) as error:
+            query(_graph())
+    assert error.value.statistics["engine"] == engine
+    assert error.value.statistics["checks"] == 1
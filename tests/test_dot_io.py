@@ -0,0 +1,135 @@
+import networkx as nx
+import pydot
+import pytest
+
+from project import automata, graph_utils
+from project.dot_io import UnsupportedDotError, read_dot, write_dot
+from project.labeled_graph import LabeledGraph
+
+
+def _edges(graph: nx.Graph):
+    return sorted((src, dst, label) for src, dst, label in graph.edges(data="label"))
+
+
+def _nodes(graph: nx.Graph):
+    return dict(graph.nodes(data=True))
+
+
+def _pydot_graph(path) -> nx.Graph:
+    graph = nx.nx_pydot.from_pydot(pydot.graph_from_dot_file(str(path))[0])
+    # pydot reads line break after the last statement as a node
+    if "\\n" in graph:
+        graph.remove_node("\\n")
+    return graph
+
+
+def test_same_graph_as_pydot():
+    path = "tests/query_language/interpreter/data/example_graph.dot"
+    graph = read_dot(path).to_networkx()
+    expected = _pydot_graph(path)
+    assert _nodes(graph) == _nodes(expected)
+    assert _edges(graph) == _edges(expected)
+
+
+def test_saved_two_cycles_graph(tmp_path):
+    path = tmp_path / "graph.dot"
+    graph = graph_utils.create_two_cycles_graph(9, 4, ("a", "b"))
+    graph_utils.save_graph_to_dot(graph, str(path))
+    labeled_graph = read_dot(str(path))
+    assert labeled_graph.number_of_nodes == 14
+    assert labeled_graph.number_of_edges == 15
+    assert set(labeled_graph.labels) == {"a", "b"}
+    assert _edges(labeled_graph.to_networkx()) == _edges(_pydot_graph(path))
+
+
+def test_quoted_names(tmp_path):
+    path = tmp_path / "graph.dot"
+    path.write_text(
+        "digraph  {\n"
+        '"a b";\n'
+        '"a b" -> 2  [key=0, label="x y"];\n'
+        '2 -> "a b"  [key=0, label=b];\n'
+        "3 [is_start=True];\n"
+        "}\n"
+    )
+    graph = read_dot(str(path)).to_networkx()
+    expected = _pydot_graph(path)
+    assert _nodes(graph) == _nodes(expected)
+    assert _edges(graph) == _edges(expected)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "graph  {\n1 -- 2;\n}\n",
+        "digraph  {\n1 -> 2 -> 3;\n}\n",
+        "digraph  {\nsubgraph s {\n1;\n}\n}\n",
+        "digraph  {\n1 -> 2  [color=red];\n}\n",
+        "digraph  {\nnode [shape=box];\n}\n",
+        "digraph  {\n1;\n",
+        "graph parsing_tree {\n0 [label=prog];\n}\n",
+    ],
+)
+def test_unsupported_syntax_falls_back_to_pydot(tmp_path, text):
+    path = tmp_path / "graph.dot"
+    path.write_text(text)
+    with pytest.raises(UnsupportedDotError):
+        read_dot(str(path))
+    if text.endswith("}\n"):
+        graph = graph_utils.load_graph_from_dot(str(path))
+        assert _edges(graph) == _edges(_pydot_graph(path))
+
+
+def test_nfa_from_labeled_graph():
+    path = "tests/query_language/interpreter/data/example_graph.dot"
+    nfa = automata.get_nondeterministic_automata_from_labeled_graph(read_dot(path))
+    expected = automata.get_nondeterministic_automata_from_graph(_pydot_graph(path))
+    assert nfa.states == expected.states
+    assert nfa.start_states == expected.start_states
+    assert nfa.final_states == expected.final_states
+    assert nfa.to_dict() == expected.to_dict()
+
+
+def test_labeled_graph_from_networkx():
+    graph = graph_utils.create_two_cycles_graph(5, 3, ("a", "b"))
+    labeled_graph = LabeledGraph.from_networkx(graph)
+    assert labeled_graph.number_of_nodes == 9
+    assert labeled_graph.number_of_edges == 10
+    assert _edges(labeled_graph.to_networkx()) == _edges(graph)
+
+
+def _two_cycles_graph():
+    return graph_utils.create_two_cycles_graph(4, 3, ("a", "b"))
+
+
+def _digraph():
+    graph = nx.DiGraph()
+    graph.add_edge(1, 2, label="a")
+    graph.add_node("a b", color="red")
+    return graph
+
+
+def _named_graph():
+    graph = nx.Graph(name="my g")
+    graph.add_edge(1, 2, label="x y")
+    return graph
+
+
+@pytest.mark.parametrize("make_graph", [_two_cycles_graph, _digraph, _named_graph])
+def test_networkx_writer_matches_pydot(tmp_path, make_graph):
+    graph = make_graph()
+    path = tmp_path / "graph.dot"
+    graph_utils.save_graph_to_dot(graph, str(path))
+    assert path.read_text() == nx.nx_pydot.to_pydot(graph).to_string()
+
+
+def test_write_labeled_graph(tmp_path):
+    path = tmp_path / "graph.dot"
+    graph = LabeledGraph.from_networkx(_two_cycles_graph())
+    graph.nodes[0] = "first node"
+    with open(path, "w") as file:
+        write_dot(graph, file, chunk_size=2)
+    written = read_dot(str(path))
+    assert written.nodes == [str(node) for node in graph.nodes]
+    assert _edges(written.to_networkx()) == _edges(_pydot_graph(path))
+    assert written.number_of_edges == graph.number_of_edges
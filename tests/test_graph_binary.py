@@ -0,0 +1,71 @@
+import subprocess
+import sys
+
+import numpy as np
+from pyformlang.regular_expression import Regex
+
+from project import graph_utils
+from project.automata import get_deterministic_automata_from_regex
+from project.boolean_decomposition import get_boolean_decomposition_of_fa
+from project.dot_io import read_dot
+from project.graph_binary import open_graph_binary, save_graph_binary
+from project.labeled_graph import LabeledGraph
+from project.rpq.all_pairs import enumerate_states
+from project.rpq.multiple_sources import (
+    multiple_sources_reachability_with_regular_constraints,
+    multiple_sources_regular_query_for_graph,
+)
+
+
+def _edges(graph: LabeledGraph):
+    return sorted(
+        (graph.nodes[src], label, graph.nodes[dst])
+        for label, (sources, destinations) in graph.edges.items()
+        for src, dst in zip(sources.tolist(), destinations.tolist())
+    )
+
+
+def test_round_trip(tmp_path):
+    graph = LabeledGraph.from_networkx(
+        graph_utils.create_two_cycles_graph(9, 4, ("a", "b"))
+    )
+    save_graph_binary(graph, str(tmp_path))
+    csr_graph = open_graph_binary(str(tmp_path))
+    assert isinstance(csr_graph.nodes, np.memmap)
+    assert csr_graph.number_of_nodes == 14
+    assert csr_graph.number_of_edges == 15
+    assert _edges(csr_graph.to_labeled_graph()) == _edges(graph)
+    matrix = csr_graph.matrix("a")
+    assert np.shares_memory(matrix.indices, csr_graph.matrices["a"][1])
+    assert matrix.nnz == 10
+
+
+def test_string_nodes_and_converter(tmp_path):
+    dot_path = "tests/query_language/interpreter/data/example_graph.dot"
+    subprocess.run(
+        [sys.executable, "-m", "project.graph_binary", dot_path, str(tmp_path)],
+        check=True,
+    )
+    csr_graph = open_graph_binary(str(tmp_path))
+    assert _edges(csr_graph.to_labeled_graph()) == _edges(read_dot(dot_path))
+
+
+def test_query_on_boolean_decomposition(tmp_path):
+    nx_graph = graph_utils.create_two_cycles_graph(5, 3, ("a", "b"))
+    save_graph_binary(LabeledGraph.from_networkx(nx_graph), str(tmp_path))
+    csr_graph = open_graph_binary(str(tmp_path))
+
+    query_fa = get_deterministic_automata_from_regex(Regex("a* b"))
+    query_order = enumerate_states(query_fa)
+    sources = [0, 1]
+    result = multiple_sources_reachability_with_regular_constraints(
+        get_boolean_decomposition_of_fa(query_fa, query_order),
+        csr_graph.boolean_decomposition(),
+        [csr_graph.nodes.tolist().index(source) for source in sources],
+        [query_order[state] for state in query_fa.start_states],
+        [query_order[state] for state in query_fa.final_states],
+    )
+    expected = multiple_sources_regular_query_for_graph(
+        Regex("a* b"), nx_graph, sources, list(nx_graph.nodes)
+    )
+    assert sorted(csr_graph.nodes[i] for i in result) == sorted(expected)
@@ -0,0 +1,51 @@
+import cfpq_data
+
+from project import graph_utils
+from project.graph_cache import GraphCache
+
+FIXTURE = "tests/data/graphs/tiny.csv"
+
+
+def _fixture_cache(directory, downloads: list) -> GraphCache:
+    def download(name):
+        downloads.append(name)
+        return FIXTURE
+
+    return GraphCache(str(directory), download, version="test")
+
+
+def test_graph_is_converted_once(tmp_path, monkeypatch):
+    downloads = []
+    cache = _fixture_cache(tmp_path, downloads)
+    first = cache.get("tiny")
+    assert first.number_of_nodes == 4
+    assert first.number_of_edges == 6
+
+    def fail(*args, **kwargs):
+        raise AssertionError("csv must not be parsed")
+
+    monkeypatch.setattr(cfpq_data, "graph_from_csv", fail)
+    monkeypatch.setattr("pandas.read_csv", fail)
+    second = _fixture_cache(tmp_path, downloads).get("tiny")
+    assert downloads == ["tiny"]
+    assert second.boolean_decomposition()["a"].nnz == 4
+
+
+def test_same_graph_as_cfpq_data(tmp_path):
+    cache = _fixture_cache(tmp_path, [])
+    graph = graph_utils.get_graph_by_name("tiny", cache)
+    expected = cfpq_data.graph_from_csv(FIXTURE)
+    assert list(graph.nodes) == list(expected.nodes)
+    assert sorted(graph.edges(data="label")) == sorted(expected.edges(data="label"))
+    assert set(graph_utils.get_labels(graph)) == {"a", "d"}
+
+
+def test_versions_are_separated(tmp_path):
+    downloads = []
+    GraphCache(str(tmp_path), lambda name: downloads.append(name) or FIXTURE, "1").get(
+        "tiny"
+    )
+    GraphCache(str(tmp_path), lambda name: downloads.append(name) or FIXTURE, "2").get(
+        "tiny"
+    )
+    assert downloads == ["tiny", "tiny"]
@@ -0,0 +1,59 @@
+import networkx as nx
+import numpy as np
+import pytest
+
+from project import graph_generators, graph_utils
+
+
+def _edges(graph: nx.Graph):
+    return sorted(graph.edges(data="label"))
+
+
+def test_two_cycles_graph():
+    graph = graph_generators.two_cycles_graph(9, 4, ("a", "b"))
+    expected = graph_utils.create_two_cycles_graph(9, 4, ("a", "b"))
+    assert graph.number_of_nodes == 14
+    assert _edges(graph.to_networkx()) == _edges(expected)
+
+
+def test_worst_case_cfpq_graph():
+    graph = graph_generators.worst_case_cfpq_graph(4)
+    assert graph.number_of_nodes == 8
+    assert [len(sources) for sources, _ in graph.edges.values()] == [5, 4]
+
+
+def test_chain_graph():
+    graph = graph_generators.chain_graph(5, ("a", "b"))
+    assert _edges(graph.to_networkx()) == [
+        (0, 1, "a"),
+        (1, 2, "b"),
+        (2, 3, "a"),
+        (3, 4, "b"),
+        (4, 5, "a"),
+    ]
+
+
+def test_grid_graph():
+    graph = graph_generators.grid_graph(2, 3)
+    assert _edges(graph.to_networkx()) == [
+        (0, 1, "a"),
+        (0, 3, "b"),
+        (1, 2, "a"),
+        (1, 4, "b"),
+        (2, 5, "b"),
+        (3, 4, "a"),
+        (4, 5, "a"),
+    ]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_random_labeled_graph(seed):
+    graph = graph_generators.random_labeled_graph(100, 1000, ("a", "b", "c"), seed)
+    same = graph_generators.random_labeled_graph(100, 1000, ("a", "b", "c"), seed)
+    assert graph.number_of_edges == 1000
+    for label, (sources, destinations) in graph.edges.items():
+        assert np.array_equal(sources, same.edges[label][0])
+        assert np.array_equal(destinations, same.edges[label][1])
+        assert np.all(np.diff(sources) >= 0)
+        indptr, indices = graph.csr(label)
+        assert np.array_equal(indices, destinations)
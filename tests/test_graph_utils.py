@@ -1,6 +1,8 @@
 import networkx as nx
 
 from project import graph_utils
+from project.graph_binary import open_graph_binary, save_graph_binary
+from project.labeled_graph import LabeledGraph
 
 
 def test_get_graph_info():
@@ -10,7 +12,7 @@ def test_get_graph_info():
     assert set(graph_utils.get_labels(graph)) == {"a", "d"}
 
 
-def test_two_cycle_graph():
+def test_two_cycle_graph(tmp_path):
     graph = graph_utils.create_two_cycles_graph(
         9,
         4,
@@ -23,7 +25,24 @@ def test_two_cycle_graph():
     assert graph.number_of_edges() == 15
     assert set(graph_utils.get_labels(graph)) == {"a", "b"}
 
-    filename = "two_cycles_graph.dot"
+    filename = str(tmp_path / "two_cycles_graph.dot")
     graph_utils.save_graph_to_dot(graph, filename)
     graph_from_file = nx.drawing.nx_pydot.read_dot(filename)
     nx.utils.graphs_equal(graph, graph_from_file)
+
+
+def test_graph_statistics(tmp_path):
+    graph = graph_utils.create_two_cycles_graph(3, 2, ("a", "b"))
+    labeled_graph = LabeledGraph.from_networkx(graph)
+    save_graph_binary(labeled_graph, str(tmp_path))
+
+    for graph_form in [graph, labeled_graph, open_graph_binary(str(tmp_path))]:
+        statistics = graph_utils.get_graph_statistics(graph_form)
+        assert statistics["number_of_nodes"] == 6
+        assert statistics["number_of_edges"] == 7
+        assert set(statistics["labels"]) == {"a", "b"}
+        assert statistics["edges_per_label"] == {"a": 4, "b": 3}
+        # The common node of cycles has two incoming and two outgoing edges
+        assert statistics["in_degree_distribution"].tolist() == [0, 5, 1]
+        assert statistics["out_degree_distribution"].tolist() == [0, 5, 1]
+        assert graph_utils.get_graph_info(graph_form)["number_of_edges"] == 7
@@ -0,0 +1,79 @@
+import io
+import json
+
+from pyformlang.cfg import CFG, Variable
+from pyformlang.regular_expression import Regex
+
+from project import graph_utils, instrumentation
+from project.cfpq import hellings, matrix
+from project.query_language.interpreter.interpreter import Interpreter
+from project.query_language.interpreter.program_cache import ProgramCache
+from project.rpq.all_pairs import regular_query_to_graph
+from project.rpq.multiple_sources import multiple_sources_regular_query_for_graph
+
+
+def _graph():
+    return graph_utils.create_two_cycles_graph(3, 2, ("a", "b"))
+
+
+def test_disabled():
+    assert instrumentation.current() is None
+    regular_query_to_graph(Regex("a* b"), _graph(), [0], [1, 2, 3])
+    with instrumentation.collect() as collector:
+        assert instrumentation.current() is collector
+    assert instrumentation.current() is None
+
+
+def test_rpq():
+    graph = _graph()
+    with instrumentation.collect() as collector:
+        regular_query_to_graph(Regex("a* b"), graph, graph.nodes, graph.nodes)
+        multiple_sources_regular_query_for_graph(
+            Regex("a* b"), graph, [0], graph.nodes, True
+        )
+    data = collector.to_dict()
+    assert {"rpq.decomposition", "rpq.kron", "rpq.closure"} <= data["timers"].keys()
+    assert data["counters"]["rpq.closure.iterations"] == len(
+        data["values"]["rpq.closure.nnz"]
+    )
+    assert data["values"]["rpq.closure.nnz"] == sorted(
+        data["values"]["rpq.closure.nnz"]
+    )
+    assert data["counters"]["rpq.bfs.iterations"] > 0
+
+
+def test_cfpq():
+    cfg = CFG.from_text("S -> a S b | a b")
+    with instrumentation.collect() as collector:
+        hellings.cf_query_to_graph(cfg, _graph(), Variable("S"), {0}, {0})
+        matrix.cf_query_to_graph(cfg, _graph(), Variable("S"), {0}, {0})
+    assert collector.counters["cfpq.hellings.iterations"] == len(
+        collector.values["cfpq.hellings.worklist"]
+    )
+    assert collector.counters["cfpq.matrix.iterations"] == len(
+        collector.values["cfpq.matrix.nnz"]
+    )
+
+
+def test_interpreter_and_json():
+    events = []
+    with instrumentation.collect(lambda *event: events.append(event)) as collector:
+        Interpreter(file=io.StringIO(), cache=ProgramCache()).execute_script(
+            'a = 1\nprint a\nprint getReachable ( smb "a" )\n'
+        )
+    statements = collector.values["interpreter.statement"]
+    assert [number for number, _ in statements] == [1, 2, 3]
+    assert ("value", "interpreter.statement", statements[0]) in events
+    output = io.StringIO()
+    collector.to_json(output)
+    data = json.loads(output.getvalue())
+    assert data["timers"]["interpreter.statement"]["count"] == 3
+
+
+def test_nested_collectors():
+    with instrumentation.collect() as outer:
+        with instrumentation.collect() as inner:
+            instrumentation.current().count("x")
+        instrumentation.current().count("y")
+    assert inner.counters == {"x": 1}
+    assert outer.counters == {"y": 1}
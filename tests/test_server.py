@@ -0,0 +1,161 @@
+import asyncio
+import queue
+import threading
+
+import pytest
+from pyformlang.cfg import CFG, Variable
+from pyformlang.regular_expression import Regex
+
+from project import graph_utils
+from project.cfpq import hellings
+from project.graph_binary import open_graph_binary
+from project.rpq.all_pairs import regular_query_to_graph
+from project.rpq.multiple_sources import multiple_sources_regular_query_for_graph
+from project.query_language.interpreter.exceptions import InterpretException
+from project.server import (
+    GraphIndex,
+    QueryServer,
+    execute,
+    execute_to_queue,
+    request,
+)
+
+
+@pytest.fixture
+def dot_path(tmp_path):
+    path = str(tmp_path / "graph.dot")
+    graph_utils.create_two_cycles_graph_and_save(3, 2, ("a", "b"), path)
+    return path
+
+
+@pytest.fixture
+def index(dot_path, tmp_path):
+    server = QueryServer({"graph": dot_path})
+    server.prepare(str(tmp_path))
+    return GraphIndex(open_graph_binary(server.paths["graph"]))
+
+
+@pytest.mark.parametrize("query", ["a* b", "a a", "b b*", "a* b b*"])
+def test_rpq_tensor(index, dot_path, query):
+    graph = graph_utils.load_graph_from_dot(dot_path)
+    expected = regular_query_to_graph(Regex(query), graph, graph.nodes, graph.nodes)
+    assert index.rpq(query) == sorted(
+        [list(pair) for pair in expected],
+        key=lambda pair: [index.index[v] for v in pair],
+    )
+
+
+@pytest.mark.parametrize("query", ["a* b", "a a", "b b*"])
+def test_rpq_bfs(index, query):
+    graph = graph_utils.create_two_cycles_graph(3, 2, ("a", "b"))
+    expected = multiple_sources_regular_query_for_graph(
+        Regex(query), graph, [0, 1], graph.nodes, True
+    )
+    result = index.rpq(query, sources=["0", "1"], algorithm="bfs")
+    assert {tuple(pair) for pair in result} == {
+        (str(src), str(dst)) for src, dst in expected
+    }
+
+
+def test_cfpq(index, dot_path):
+    graph = graph_utils.load_graph_from_dot(dot_path)
+    cfg = CFG.from_text("S -> a S b | a b")
+    expected = hellings.cf_query_to_graph(
+        cfg, graph, Variable("S"), graph.nodes, graph.nodes
+    )
+    result = index.cfpq("S -> a S b | a b")
+    assert {tuple(pair) for pair in result} == expected
+    assert index.cfpq("S -> a S b | a b", sources=["3"]) == [
+        pair for pair in result if pair[0] == "3"
+    ]
+
+
+def test_errors(index):
+    with pytest.raises(ValueError, match="Unknown vertex"):
+        index.rpq("a", sources=["10"])
+    with pytest.raises(ValueError, match="Unknown RPQ algorithm"):
+        index.rpq("a", algorithm="dfs")
+    with pytest.raises(ValueError, match="Unknown CFPQ algorithm"):
+        index.cfpq("S -> a b", algorithm="matrix")
+    with pytest.raises(ValueError, match="Unknown request type"):
+        execute({"type": "delete"})
+
+
+def test_script():
+    assert execute({"type": "script", "script": "print [ 0..3 ]\n"}) == ["(0, 1, 2)"]
+
+
+def test_results_are_put_in_chunks():
+    results = queue.Queue()
+    script = "print 1\nprint 2\nprint 3\nprint x\n"
+    with pytest.raises(InterpretException):
+        execute_to_queue({"type": "script", "script": script}, results, 2)
+    assert [results.get_nowait() for _ in range(2)] == [["1", "2"], None]
+
+    script = "print 1\nprint 2\nprint 3\n"
+    assert execute_to_queue({"type": "script", "script": script}, results, 2) == 3
+    assert [results.get_nowait() for _ in range(3)] == [["1", "2"], ["3"], None]
+
+
+def test_automaton(index, dot_path):
+    automaton = index.automaton()
+    assert automaton is index.automaton()
+    assert set(automaton.edge_set()) == {
+        (str(src), label, str(dst))
+        for src, dst, label in graph_utils.load_graph_from_dot(dot_path).edges(
+            data="label"
+        )
+    }
+
+
+def test_server(dot_path, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    server = QueryServer({"graph": dot_path}, workers=1, chunk_size=2)
+    socket_path = str(tmp_path / "server.sock")
+    thread = threading.Thread(target=asyncio.run, args=(server.serve(socket_path),))
+    thread.start()
+    try:
+        assert server.ready.wait(60)
+        responses = list(
+            request(
+                {"id": 1, "type": "rpq", "graph": "graph", "query": "a* b"},
+                socket_path,
+            )
+        )
+        results = [pair for response in responses[:-1] for pair in response["results"]]
+        assert all(len(response["results"]) <= 2 for response in responses[:-1])
+        assert responses[-1] == {"id": 1, "done": True, "count": len(results)}
+        graph = graph_utils.load_graph_from_dot(dot_path)
+        assert {tuple(pair) for pair in results} == set(
+            regular_query_to_graph(Regex("a* b"), graph, graph.nodes, graph.nodes)
+        )
+
+        (error,) = request({"id": 2, "type": "rpq", "graph": "none"}, socket_path)
+        assert error["id"] == 2 and "error" in error
+
+        (error,) = request(
+            {"type": "rpq", "graph": "graph", "query": "a* b", "time_limit": 0},
+            socket_path,
+        )
+        assert "Time limit" in error["error"]
+        assert error["statistics"]["engine"] == "rpq.closure"
+
+        script = (
+            'g = load "graph"\n'
+            "print getReachable ( g )\n"
+            'print getReachable ( load "graph.dot" )\n'
+            "print 1\nprint 2\n"
+        )
+        responses = list(request({"type": "script", "script": script}, socket_path))
+        assert [response.get("results") for response in responses] == [
+            [responses[0]["results"][0]] * 2,
+            ["1", "2"],
+            None,
+        ]
+        assert responses[-1]["count"] == 4
+
+        info = list(request({"type": "graphs"}, socket_path))[0]["results"]
+        assert info == [{"name": "graph", "nodes": 6, "edges": 7, "labels": ["a", "b"]}]
+    finally:
+        server.stop()
+        thread.join()